@@ -0,0 +1,328 @@
+"""LoadGenerator micro-benchmarks against the recording fake driver.
+
+Each component of an operation is timed on its own - fake data generation,
+span creation, structured logging, operation dispatch - and then whole
+operations, so a regression shows up in the component that caused it.
+"""
+
+import random
+
+import pytest
+import structlog
+from opentelemetry import trace
+
+from loadgen.distributions import Distribution
+from loadgen.generator import LoadGenerator
+from loadgen.journal import OperationJournal
+from loadgen.keys import KeySampler
+from loadgen.recording import WorkloadRecorder
+from loadgen.registry import KeyRegistry
+from loadgen.rng import Streams, derive
+from loadgen.skew import KeySkew
+
+OPERATIONS = [
+    "insert_customer_with_order",
+    "insert_order_for_existing",
+    "update_order_status",
+    "update_customer",
+    "delete_order_item",
+]
+
+KEY_SELECTIONS = ["registry", "probe"]
+
+KEY_DISTRIBUTIONS = ["uniform", "zipf:0.99", "latest:1000"]
+
+
+def make_generator(
+    backend, data_pool, key_selection: str, skew: KeySkew | None = None, **kwargs
+) -> LoadGenerator:
+    """Build a generator wired the way main() wires it, with SEED=0 streams."""
+    keys = (
+        KeyRegistry("bench", backend, skew=skew)
+        if key_selection == "registry"
+        else KeySampler(backend, skew=skew)
+    )
+    kwargs.setdefault("streams", Streams.derive(0, "bench", 0))
+    return LoadGenerator(
+        backend=backend, database_name="bench", keys=keys, data=data_pool, **kwargs
+    )
+
+
+# Data generation
+
+
+@pytest.fixture
+def data_rng() -> random.Random:
+    """The data stream a SEED=0 worker draws values from."""
+    return derive(0, "bench", 0, "data")
+
+
+def bench_data_person(bench, data_pool, data_rng):
+    bench.measure("data", "DataPool.person", lambda: data_pool.person(data_rng))
+
+
+def bench_data_email(bench, data_pool, data_rng):
+    bench.measure("data", "DataPool.email", lambda: data_pool.email(rng=data_rng))
+
+
+def bench_data_product_name(bench, data_pool, data_rng):
+    bench.measure(
+        "data", "DataPool.product_name", lambda: data_pool.product_name(data_rng)
+    )
+
+
+def bench_data_order_items(bench, data_pool, data_rng):
+    def order_items():
+        return [
+            (
+                data_pool.product_name(data_rng),
+                data_rng.randint(1, 5),
+                round(data_rng.uniform(5.0, 100.0), 2),
+            )
+            for _ in range(data_rng.randint(1, 3))
+        ]
+
+    bench.measure("data", "order items (1-3)", order_items)
+
+
+# Operation journal
+
+
+def bench_journal_append(bench, tmp_path):
+    journal = OperationJournal(str(tmp_path))
+    writer = journal.writer("bench")
+    values = ("Jane", "Doe", "jane.doe1@example.com")
+
+    def append():
+        writer.append("Customers", "insert", 1, 1, values)
+
+    bench.measure("journal", "JournalWriter.append", append)
+    journal.close()
+
+
+# Span creation
+
+
+def _span(tracer):
+    def span():
+        with tracer.start_as_current_span(
+            "insert_customer_with_order",
+            attributes={
+                "db.name": "bench",
+                "operation.name": "insert_customer_with_order",
+            },
+        ):
+            pass
+
+    return span
+
+
+def bench_span_global_tracer(bench):
+    """Whatever provider is installed - a no-op unless telemetry is configured."""
+    bench.measure("span", "global tracer", _span(trace.get_tracer(__name__)))
+
+
+def bench_span_sdk_tracer(bench):
+    """A recording SDK span, as with Azure Monitor enabled (export excluded)."""
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    tracer = sdk_trace.TracerProvider().get_tracer(__name__)
+    bench.measure("span", "SDK tracer (no exporter)", _span(tracer))
+
+
+# Logging
+
+
+def bench_log_operation_event(bench):
+    log = structlog.get_logger("loadgen.generator")
+
+    def log_event():
+        log.info(
+            "inserted_customer_with_order",
+            database="bench",
+            customer_id=1,
+            order_id=1,
+            items=2,
+        )
+
+    bench.measure("logging", "info event (JSON)", log_event)
+
+
+def bench_log_filtered_event(bench):
+    log = structlog.get_logger("loadgen.generator")
+
+    def log_event():
+        log.debug("filtered", database="bench", customer_id=1)
+
+    bench.measure("logging", "filtered debug event", log_event)
+
+
+# Dispatch
+
+
+@pytest.fixture
+def noop_generator(backend, data_pool) -> LoadGenerator:
+    """A generator whose operations do nothing, leaving only dispatch overhead."""
+    generator = make_generator(backend, data_pool, "registry")
+    for name in OPERATIONS:
+        noop = lambda: None  # noqa: E731
+        noop.__name__ = name
+        setattr(generator, name, noop)
+    return generator
+
+
+def bench_dispatch_autocommit(bench, noop_generator):
+    bench.measure(
+        "dispatch",
+        "execute_random_operation (no-op ops)",
+        noop_generator.execute_random_operation,
+    )
+
+
+def bench_dispatch_transactional(bench, noop_generator):
+    noop_generator.ops_per_commit = 10
+    bench.measure(
+        "dispatch",
+        "execute_random_operation (no-op, commit/10)",
+        noop_generator.execute_random_operation,
+    )
+
+
+def bench_dispatch_seeded(bench, backend, data_pool):
+    """Generators with the same seed and place run the same operations."""
+    sequences = []
+    for _ in range(2):
+        generator = make_generator(backend, data_pool, "registry")
+        sequences.append(
+            [generator.mix.choose(generator.random.operations) for _ in range(1_000)]
+        )
+    assert sequences[0] == sequences[1]
+    generator = make_generator(backend, data_pool, "registry")
+    bench.measure(
+        "dispatch",
+        "OperationMix.choose (seeded stream)",
+        lambda: generator.mix.choose(generator.random.operations),
+    )
+
+
+# Whole operations
+
+
+@pytest.mark.parametrize("key_selection", KEY_SELECTIONS)
+@pytest.mark.parametrize("operation", OPERATIONS)
+def bench_operation(bench, backend, data_pool, operation, key_selection):
+    generator = make_generator(backend, data_pool, key_selection)
+    # Seed the key registry so updates and deletes have targets
+    for _ in range(1_000):
+        generator.insert_customer_with_order()
+    bench.measure(
+        "operation", f"{operation} [{key_selection}]", getattr(generator, operation)
+    )
+
+
+@pytest.mark.parametrize("key_selection", KEY_SELECTIONS)
+@pytest.mark.parametrize("key_distribution", KEY_DISTRIBUTIONS)
+def bench_key_skew(bench, backend, data_pool, key_distribution, key_selection):
+    generator = make_generator(
+        backend, data_pool, key_selection, skew=KeySkew.parse(key_distribution)
+    )
+    for _ in range(1_000):
+        generator.insert_customer_with_order()
+    bench.measure(
+        "operation",
+        f"update_customer [{key_selection}, {key_distribution}]",
+        generator.update_customer,
+    )
+
+
+@pytest.mark.parametrize("insert_mode", ["statements", "batch"])
+def bench_insert_round_trips(bench, backend, data_pool, insert_mode):
+    generator = make_generator(backend, data_pool, "registry", insert_mode=insert_mode)
+    generator.insert_customer_with_order()
+    statements = generator.connection.statements
+    round_trips = sum(statements.values()) - 1  # minus the registry warm-load
+    # Statements: customer, order, item array, item ids; batch: one round trip
+    assert round_trips == (1 if insert_mode == "batch" else 4)
+    bench.measure(
+        "operation",
+        f"insert_customer_with_order [{insert_mode}]",
+        generator.insert_customer_with_order,
+    )
+
+
+@pytest.mark.parametrize("key_selection", KEY_SELECTIONS)
+def bench_insert_large_orders(bench, backend, data_pool, key_selection):
+    generator = make_generator(
+        backend,
+        data_pool,
+        key_selection,
+        items_per_order=Distribution("uniform", 1, 20),
+    )
+    bench.measure(
+        "operation",
+        f"insert_customer_with_order [{key_selection}, 1-20 items]",
+        generator.insert_customer_with_order,
+    )
+
+
+@pytest.mark.parametrize("payload", ["1K", "64K"])
+def bench_insert_payload(bench, backend, data_pool, payload):
+    generator = make_generator(
+        backend,
+        data_pool,
+        "registry",
+        payload_bytes=Distribution.parse(f"constant:{payload}"),
+    )
+    bench.measure(
+        "operation",
+        f"insert_customer_with_order [{payload} payload/row]",
+        generator.insert_customer_with_order,
+    )
+
+
+@pytest.mark.parametrize("key_selection", KEY_SELECTIONS)
+@pytest.mark.parametrize("insert_mode", ["statements", "batch"])
+def bench_execute_random_operation(
+    bench, backend, data_pool, key_selection, insert_mode
+):
+    generator = make_generator(
+        backend, data_pool, key_selection, insert_mode=insert_mode
+    )
+    bench.measure(
+        "mix",
+        f"execute_random_operation [{key_selection}, {insert_mode}]",
+        generator.execute_random_operation,
+    )
+
+
+@pytest.mark.parametrize("journal", ["off", "on"])
+def bench_execute_with_journal(bench, backend, data_pool, tmp_path, journal):
+    operation_journal = OperationJournal(str(tmp_path))
+    generator = make_generator(
+        backend,
+        data_pool,
+        "registry",
+        journal=operation_journal.writer("bench") if journal == "on" else None,
+    )
+    bench.measure(
+        "mix",
+        f"execute_random_operation [journal {journal}]",
+        generator.execute_random_operation,
+    )
+    operation_journal.close()
+
+
+@pytest.mark.parametrize("recording", ["off", "on"])
+def bench_execute_with_recorder(bench, backend, data_pool, tmp_path, recording):
+    recorder = WorkloadRecorder(str(tmp_path / "bench.jsonl.gz"))
+    generator = make_generator(
+        backend,
+        data_pool,
+        "registry",
+        recorder=recorder if recording == "on" else None,
+    )
+    bench.measure(
+        "mix",
+        f"execute_random_operation [recording {recording}]",
+        generator.execute_random_operation,
+    )
+    recorder.close()
@@ -0,0 +1,227 @@
+"""Benchmark harness - a recording fake pyodbc driver plus ops/sec reporting.
+
+The fake driver answers the SqlServerBackend statements with canned rows
+(OUTPUT INSERTED ids, identity ranges, probe hits) without any I/O, so the
+numbers reported here are the client-side cost of an operation: the ceiling
+a single worker can reach however fast the database is.
+"""
+
+import itertools
+import os
+import random
+import time
+from collections import Counter
+from collections.abc import Callable
+
+import pytest
+
+from loadgen.backends import SqlServerBackend
+from loadgen.datapool import DataPool
+from loadgen.main import configure_logging
+
+DEFAULT_ITERATIONS = 20_000
+
+# SQL Server rejects statements with more parameters than this
+MAX_PARAMETERS = 2100
+
+
+class FakeError(Exception):
+    """Stands in for pyodbc.Error."""
+
+
+class RecordingCursor:
+    """DB-API cursor returning canned result sets, counting every statement."""
+
+    def __init__(self, connection: "RecordingConnection"):
+        self.connection = connection
+        self.rowcount = -1
+        self.fast_executemany = False
+        self._results: list[list[tuple]] = []
+
+    def execute(self, sql: str, params: tuple = ()) -> "RecordingCursor":
+        if len(params) > MAX_PARAMETERS:
+            raise FakeError(f"{len(params)} parameters, limit {MAX_PARAMETERS}")
+        self.connection.statements[sql] += 1
+        responder = self.connection.responders.get(sql)
+        if responder is None:
+            # Batches (insert_customer_order, warm-load, item keys) are built at runtime
+            responder = self.connection.batch_responder
+        self._results = responder(sql, params)
+        self.rowcount = 1
+        return self
+
+    def executemany(self, sql: str, seq_of_params: list[tuple]) -> None:
+        # One parameter array, one round trip
+        self.connection.statements[sql] += 1
+        self._results = []
+        self.rowcount = len(seq_of_params)
+
+    def fetchone(self) -> tuple | None:
+        rows = self._results[0] if self._results else []
+        return rows.pop(0) if rows else None
+
+    def fetchall(self) -> list[tuple]:
+        rows = self._results[0] if self._results else []
+        self._results[0:1] = [[]]
+        return rows
+
+    def fetchmany(self, size: int) -> list[tuple]:
+        rows = self._results[0] if self._results else []
+        chunk, self._results[0:1] = rows[:size], [rows[size:]]
+        return chunk
+
+    def nextset(self) -> bool:
+        if len(self._results) > 1:
+            del self._results[0]
+            return True
+        return False
+
+
+class RecordingConnection:
+    """DB-API connection handing out RecordingCursors.
+
+    statements counts executions per SQL text, so a benchmark can check how
+    many round trips an operation makes.
+    """
+
+    def __init__(self, backend: "FakeBackend"):
+        self.statements: Counter[str] = Counter()
+        self.commits = 0
+        self._ids = itertools.count(1)
+        b = backend
+        self.responders: dict[str, Callable[[str, tuple], list[list[tuple]]]] = {
+            b.INSERT_CUSTOMER: self._inserted,
+            b.INSERT_ORDER: self._inserted,
+            b.INSERT_ORDER_ITEMS: self._no_rows,
+            b.UPDATE_ORDER_STATUS: self._no_rows,
+            b.UPDATE_CUSTOMER_EMAIL: self._no_rows,
+            b.DELETE_ORDER_ITEM: self._no_rows,
+            b.CUSTOMER_RANGE: self._range,
+            b.OPEN_ORDER_RANGE: self._range,
+            b.CUSTOMER_PROBE: lambda sql, params: [[(params[0],)]],
+            b.OPEN_ORDER_PROBE: lambda sql, params: [[(params[0], "Pending")]],
+            b.DELETABLE_ITEM_PROBE: lambda sql, params: [[(params[0], params[0])]],
+        }
+
+    def _inserted(self, sql: str, params: tuple) -> list[list[tuple]]:
+        return [[(next(self._ids),)]]
+
+    def _no_rows(self, sql: str, params: tuple) -> list[list[tuple]]:
+        return []
+
+    def _range(self, sql: str, params: tuple) -> list[list[tuple]]:
+        return [[(1, 1_000_000)]]
+
+    def batch_responder(self, sql: str, params: tuple) -> list[list[tuple]]:
+        if "DECLARE @OrderId INT = ?" in sql:
+            # order_items_batch_sql: the OrderId, then 6 params per item
+            return [[(next(self._ids), seq) for seq in params[5::6]]]
+        if "SCOPE_IDENTITY" in sql:
+            # customer_order_batch_sql: 10 customer/order params, 6 per item,
+            # LoadgenSeq fifth of those
+            item_seqs = params[14::6]
+            return [
+                [(next(self._ids), next(self._ids))],
+                [(next(self._ids), seq) for seq in item_seqs],
+            ]
+        if "WHERE OrderId IN" in sql:
+            # order_item_keys_sql: one item per order
+            return [[(next(self._ids), order_id, 0) for order_id in params]]
+        # Registry warm-load: one empty result set per statement
+        return [[] for _ in sql.split(";")[1:]]
+
+    def cursor(self) -> RecordingCursor:
+        return RecordingCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def close(self) -> None:
+        pass
+
+
+class FakeBackend(SqlServerBackend):
+    """SqlServerBackend whose connections are RecordingConnections."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.error = FakeError
+
+    def connect(self, database: str, autocommit: bool = True) -> RecordingConnection:
+        return RecordingConnection(self)
+
+
+class BenchmarkResults:
+    """Collects timings and prints them at the end of the session."""
+
+    def __init__(self, iterations: int):
+        self.iterations = iterations
+        self.rows: list[tuple[str, str, int, float, float]] = []
+
+    def measure(self, group: str, name: str, fn: Callable[[], object]) -> float:
+        """Time fn over the configured iterations and return ops/sec."""
+        iterations = self.iterations
+        for _ in range(max(iterations // 10, 1)):
+            fn()  # warm-up: fill caches, registries and cached loggers
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        for _ in range(iterations):
+            fn()
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+
+        ops_per_sec = iterations / wall if wall else float("inf")
+        self.rows.append((group, name, iterations, ops_per_sec, cpu / iterations))
+        return ops_per_sec
+
+    def report(self, write_line: Callable[[str], None]) -> None:
+        """Write one line per benchmark, grouped by component."""
+        write_line(
+            f"{'component':<10} {'benchmark':<48} {'ops':>8} "
+            f"{'ops/sec':>12} {'cpu us/op':>10}"
+        )
+        for group, name, iterations, ops_per_sec, cpu_per_op in sorted(
+            self.rows, key=lambda row: row[0]
+        ):
+            write_line(
+                f"{group:<10} {name:<48} {iterations:>8} "
+                f"{ops_per_sec:>12,.0f} {cpu_per_op * 1e6:>10.2f}"
+            )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    iterations = int(os.environ.get("BENCH_ITERATIONS", DEFAULT_ITERATIONS))
+    config._bench_results = BenchmarkResults(iterations)
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    results = config._bench_results
+    if results.rows:
+        terminalreporter.section("loadgen benchmarks")
+        results.report(terminalreporter.write_line)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def production_logging():
+    """Log through the production structlog pipeline, rendered to /dev/null."""
+    with open(os.devnull, "w") as devnull:
+        configure_logging(devnull)
+        yield
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest) -> BenchmarkResults:
+    random.seed(0)
+    return request.config._bench_results
+
+
+@pytest.fixture
+def backend() -> FakeBackend:
+    return FakeBackend()
+
+
+@pytest.fixture(scope="session")
+def data_pool() -> DataPool:
+    return DataPool()
@@ -0,0 +1,20 @@
+"""
+Filtered index on open orders for random key probing.
+"""
+
+from yoyo import step
+
+__depends__ = {"0003_schema_change_log"}
+
+steps = [
+    step(
+        # Lets MIN/MAX and "first open order at or after ?" probes seek
+        # past completed orders instead of scanning them
+        """
+        CREATE INDEX IX_Orders_Open ON dbo.Orders(OrderId)
+        INCLUDE (Status)
+        WHERE Status <> 'Completed'
+        """,
+        "DROP INDEX IX_Orders_Open ON dbo.Orders"
+    ),
+]
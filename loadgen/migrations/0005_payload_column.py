@@ -0,0 +1,20 @@
+"""
+Optional wide payload on orders and order items to scale change-event size.
+"""
+
+from yoyo import step
+
+__depends__ = {"0004_open_order_index"}
+
+steps = [
+    step(
+        # NULL unless PAYLOAD_BYTES is configured - adding a nullable column
+        # is a metadata-only change
+        "ALTER TABLE dbo.Orders ADD Payload VARCHAR(MAX) NULL",
+        "ALTER TABLE dbo.Orders DROP COLUMN Payload"
+    ),
+    step(
+        "ALTER TABLE dbo.OrderItems ADD Payload VARCHAR(MAX) NULL",
+        "ALTER TABLE dbo.OrderItems DROP COLUMN Payload"
+    ),
+]
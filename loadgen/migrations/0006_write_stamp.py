@@ -0,0 +1,28 @@
+"""
+Generator-side write stamp, so CES events can be matched back to their writes.
+"""
+
+from yoyo import step
+
+__depends__ = {"0005_payload_column"}
+
+steps = [
+    step(
+        # LoadgenSeq identifies the write, LoadgenTs is when the generator
+        # issued it - both NULL for rows written by anything else
+        """
+        ALTER TABLE dbo.Customers ADD LoadgenSeq BIGINT NULL, LoadgenTs DATETIME2 NULL
+        """,
+        "ALTER TABLE dbo.Customers DROP COLUMN LoadgenSeq, LoadgenTs"
+    ),
+    step(
+        "ALTER TABLE dbo.Orders ADD LoadgenSeq BIGINT NULL, LoadgenTs DATETIME2 NULL",
+        "ALTER TABLE dbo.Orders DROP COLUMN LoadgenSeq, LoadgenTs"
+    ),
+    step(
+        """
+        ALTER TABLE dbo.OrderItems ADD LoadgenSeq BIGINT NULL, LoadgenTs DATETIME2 NULL
+        """,
+        "ALTER TABLE dbo.OrderItems DROP COLUMN LoadgenSeq, LoadgenTs"
+    ),
+]
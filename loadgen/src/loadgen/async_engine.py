@@ -0,0 +1,176 @@
+"""Asyncio engine - runs many virtual users as coroutines on one event loop."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+
+from loadgen.generator import LoadGenerator
+from loadgen.scheduler import IDLE_INTERVAL_SECONDS, ArrivalScheduler
+
+log = structlog.get_logger()
+
+
+class AsyncEngine:
+    """Runs virtual users as coroutines sharing a pool of connections.
+
+    pyodbc is blocking, so each operation is offloaded to a thread pool sized
+    to the number of connections. Virtual users spend most of their time in
+    think-time sleeps, which cost a coroutine rather than an OS thread, so a
+    small container can host thousands of them against a few dozen sessions.
+
+    Databases with an ArrivalScheduler are driven open-loop instead: a
+    dispatcher coroutine spawns one task per arrival at the target rate.
+    """
+
+    def __init__(
+        self,
+        generators: list[LoadGenerator],
+        virtual_users_per_database: int | dict[str, int] = 100,
+        schedulers: dict[str, ArrivalScheduler] | None = None,
+    ):
+        self.generators = generators
+        self.virtual_users_per_database = virtual_users_per_database
+        self.schedulers = schedulers or {}
+        self._failed = False
+
+    def run(self) -> bool:
+        """Run until interrupted or a virtual user fails. Returns False on failure."""
+        asyncio.run(self._run())
+        return not self._failed
+
+    async def _run(self) -> None:
+        """Start virtual users, wait for a stop signal, then drain."""
+        stop = asyncio.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=len(self.generators),
+            thread_name_prefix="loadgen-db",
+        )
+
+        # Each database gets a pool of generators (connections) to borrow from
+        pools: dict[str, asyncio.Queue[LoadGenerator]] = {}
+        for generator in self.generators:
+            pools.setdefault(generator.database_name, asyncio.Queue()).put_nowait(
+                generator
+            )
+
+        arrivals: set[asyncio.Task] = set()
+        tasks = []
+        for database, pool in pools.items():
+            scheduler = self.schedulers.get(database)
+            if scheduler:
+                tasks.append(
+                    asyncio.create_task(
+                        self._dispatch(scheduler, pool, executor, stop, arrivals)
+                    )
+                )
+            else:
+                tasks.extend(
+                    asyncio.create_task(self._virtual_user(pool, executor, stop))
+                    for _ in range(self._virtual_users(database))
+                )
+        log.info(
+            "virtual_users_started",
+            virtual_users=len(tasks),
+            connections=len(self.generators),
+        )
+
+        try:
+            await stop.wait()
+        finally:
+            for task in [*tasks, *arrivals]:
+                task.cancel()
+            await asyncio.gather(*tasks, *arrivals, return_exceptions=True)
+            # Let in-flight database calls finish before closing connections
+            executor.shutdown(wait=True)
+            for generator in self.generators:
+                generator.close()
+            for scheduler in self.schedulers.values():
+                scheduler.log_stats()
+            log.info("virtual_users_stopped", virtual_users=len(tasks))
+
+    def _virtual_users(self, database: str) -> int:
+        """Virtual users for a database - one count for all, or per database."""
+        if isinstance(self.virtual_users_per_database, dict):
+            return self.virtual_users_per_database[database]
+        return self.virtual_users_per_database
+
+    async def _execute(
+        self,
+        generator: LoadGenerator,
+        executor: ThreadPoolExecutor,
+        stop: asyncio.Event,
+        intended_start: float | None = None,
+    ) -> bool:
+        """Run one operation on a borrowed connection. Returns False on failure."""
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                executor, generator.execute_random_operation, intended_start
+            )
+        except Exception as e:
+            log.error(
+                "virtual_user_failed",
+                database=generator.database_name,
+                error=str(e),
+            )
+            self._failed = True
+            stop.set()
+            return False
+        return True
+
+    async def _virtual_user(
+        self,
+        pool: asyncio.Queue[LoadGenerator],
+        executor: ThreadPoolExecutor,
+        stop: asyncio.Event,
+    ) -> None:
+        """Virtual user loop: borrow a connection, run an operation, think."""
+        while True:
+            generator = await pool.get()
+            try:
+                if not await self._execute(generator, executor, stop):
+                    return
+            finally:
+                pool.put_nowait(generator)
+            await asyncio.sleep(generator.get_random_delay())
+
+    async def _dispatch(
+        self,
+        scheduler: ArrivalScheduler,
+        pool: asyncio.Queue[LoadGenerator],
+        executor: ThreadPoolExecutor,
+        stop: asyncio.Event,
+        arrivals: set[asyncio.Task],
+    ) -> None:
+        """Dispatcher loop: spawn an arrival task per intended start time."""
+        loop = asyncio.get_running_loop()
+        run_start = next_start = loop.time()
+        while True:
+            interval = scheduler.next_interval(next_start - run_start)
+            next_start += IDLE_INTERVAL_SECONDS if interval is None else interval
+            delay = next_start - loop.time()
+            # When behind schedule, issue immediately - those arrivals run late
+            await asyncio.sleep(max(delay, 0.0))
+            if interval is not None and scheduler.try_acquire():
+                task = asyncio.create_task(
+                    self._arrival(scheduler, next_start, pool, executor, stop)
+                )
+                arrivals.add(task)
+                task.add_done_callback(arrivals.discard)
+
+    async def _arrival(
+        self,
+        scheduler: ArrivalScheduler,
+        intended_start: float,
+        pool: asyncio.Queue[LoadGenerator],
+        executor: ThreadPoolExecutor,
+        stop: asyncio.Event,
+    ) -> None:
+        """Run a single scheduled operation and account for its lateness."""
+        generator = await pool.get()
+        actual_start = asyncio.get_running_loop().time()
+        try:
+            await self._execute(generator, executor, stop, intended_start)
+        finally:
+            pool.put_nowait(generator)
+            scheduler.release(intended_start, actual_start)
@@ -0,0 +1,683 @@
+"""Database backends - driver connection plus the SQL dialect for each operation."""
+
+import functools
+import os
+import sqlite3
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import structlog
+
+from loadgen.checksum import CHECKSUM_COLUMNS, MONEY_COLUMNS, checksum_queries, row_hash
+from loadgen.lag import EventSink, change_event
+
+try:
+    import pyodbc
+except ImportError:
+    # pyodbc needs the unixODBC runtime; without it only SQLite is usable
+    pyodbc = None
+
+log = structlog.get_logger()
+
+# DB-API connection/cursor of whichever backend is in use
+Connection = Any
+Cursor = Any
+
+# Items per batch statement. An item is 6 parameters and a VALUES row;
+# SQL Server allows 2100 parameters and 1000 VALUES rows per statement
+BATCH_ITEMS = 300
+
+# Rows per SQLite multi-row insert, 7 variables each - the variable limit
+# is 999 on SQLite builds before 3.32
+SQLITE_INSERT_ROWS = 999 // 7
+
+# Inserts the items of @OrderId, capturing their keys in @Items
+ORDER_ITEMS_INSERT = """
+            INSERT INTO dbo.OrderItems (
+                OrderId, ProductName, Quantity, UnitPrice, Payload,
+                LoadgenSeq, LoadgenTs
+            )
+            OUTPUT INSERTED.OrderItemId, INSERTED.LoadgenSeq INTO @Items
+            VALUES
+                {item_rows};"""
+
+
+def item_rows_sql(num_items: int) -> str:
+    """VALUES rows for num_items items of @OrderId."""
+    return ",\n                ".join(["(@OrderId, ?, ?, ?, ?, ?, ?)"] * num_items)
+
+
+@functools.lru_cache(maxsize=None)
+def customer_order_batch_sql(num_items: int) -> str:
+    """Build a single T-SQL batch inserting a customer, order and items.
+
+    Returns two result sets: (CustomerId, OrderId), then (OrderItemId, LoadgenSeq)
+    per item. num_items must not exceed BATCH_ITEMS.
+    """
+    items_insert = ORDER_ITEMS_INSERT.format(item_rows=item_rows_sql(num_items))
+    return f"""
+            SET NOCOUNT ON;
+            DECLARE @CustomerId INT, @OrderId INT;
+            DECLARE @Items TABLE (OrderItemId INT, LoadgenSeq BIGINT);
+
+            INSERT INTO dbo.Customers
+                (FirstName, LastName, Email, LoadgenSeq, LoadgenTs)
+            VALUES (?, ?, ?, ?, ?);
+            SET @CustomerId = SCOPE_IDENTITY();
+
+            INSERT INTO dbo.Orders
+                (CustomerId, TotalAmount, Status, Payload, LoadgenSeq, LoadgenTs)
+            VALUES (@CustomerId, ?, ?, ?, ?, ?);
+            SET @OrderId = SCOPE_IDENTITY();
+{items_insert}
+
+            SELECT @CustomerId, @OrderId;
+            SELECT OrderItemId, LoadgenSeq FROM @Items;
+            """
+
+
+@functools.lru_cache(maxsize=None)
+def order_items_batch_sql(num_items: int) -> str:
+    """Build a T-SQL batch inserting more items of an existing order.
+
+    Takes the OrderId, then the item parameters; returns (OrderItemId,
+    LoadgenSeq) per item. num_items must not exceed BATCH_ITEMS.
+    """
+    items_insert = ORDER_ITEMS_INSERT.format(item_rows=item_rows_sql(num_items))
+    return f"""
+            SET NOCOUNT ON;
+            DECLARE @OrderId INT = ?;
+            DECLARE @Items TABLE (OrderItemId INT, LoadgenSeq BIGINT);
+{items_insert}
+
+            SELECT OrderItemId, LoadgenSeq FROM @Items;
+            """
+
+
+@functools.lru_cache(maxsize=None)
+def order_item_keys_sql(num_orders: int) -> str:
+    """Select (OrderItemId, OrderId, LoadgenSeq) for every item of num_orders orders."""
+    placeholders = ", ".join(["?"] * num_orders)
+    return (
+        "SELECT OrderItemId, OrderId, LoadgenSeq FROM dbo.OrderItems "
+        f"WHERE OrderId IN ({placeholders})"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def sqlserver_checksum_queries(table: str) -> tuple[str, str, str]:
+    """Range checksum queries hashing rows with HASHBYTES, as row_hash() does."""
+    columns = CHECKSUM_COLUMNS[table]
+    text = ", ".join(
+        f"ISNULL(CONVERT(NVARCHAR(MAX), {column}), N'')" for column in columns
+    )
+    return checksum_queries(
+        f"dbo.{table}",
+        columns[0],
+        f"CAST(CAST(HASHBYTES('MD5', CONCAT_WS(N'|', {text})) AS BINARY(4)) AS INT)",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def sqlite_checksum_queries(table: str) -> tuple[str, str, str]:
+    """Range checksum queries hashing rows with the registered loadgen_row_hash()."""
+    columns = CHECKSUM_COLUMNS[table]
+    values = ", ".join(
+        f"printf('%.2f', {column})" if column in MONEY_COLUMNS else column
+        for column in columns
+    )
+    return checksum_queries(table, columns[0], f"loadgen_row_hash({values})")
+
+
+class SqlServerBackend:
+    """Azure SQL via pyodbc - the production backend."""
+
+    name = "sqlserver"
+
+    # Inserts and updates end with LoadgenSeq, LoadgenTs (see loadgen.lag)
+    INSERT_CUSTOMER = """
+        INSERT INTO dbo.Customers (FirstName, LastName, Email, LoadgenSeq, LoadgenTs)
+        OUTPUT INSERTED.CustomerId
+        VALUES (?, ?, ?, ?, ?)
+        """
+    INSERT_ORDER = """
+        INSERT INTO dbo.Orders
+            (CustomerId, TotalAmount, Status, Payload, LoadgenSeq, LoadgenTs)
+        OUTPUT INSERTED.OrderId
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+    # Parameter-array insert - fast_executemany can't return OUTPUT rows
+    INSERT_ORDER_ITEMS = """
+        INSERT INTO dbo.OrderItems (
+            OrderId, ProductName, Quantity, UnitPrice, Payload,
+            LoadgenSeq, LoadgenTs
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+    UPDATE_ORDER_STATUS = """
+        UPDATE dbo.Orders
+        SET Status = ?, LoadgenSeq = ?, LoadgenTs = ?
+        WHERE OrderId = ? AND Status = ?
+        """
+    UPDATE_CUSTOMER_EMAIL = """
+        UPDATE dbo.Customers
+        SET Email = ?, ModifiedAt = GETUTCDATE(), LoadgenSeq = ?, LoadgenTs = ?
+        WHERE CustomerId = ?
+        """
+    DELETE_ORDER_ITEM = """
+        DELETE FROM dbo.OrderItems
+        WHERE OrderItemId = ?
+          AND EXISTS (
+            SELECT 1 FROM dbo.Orders
+            WHERE OrderId = ? AND Status IN ('Pending', 'Processing')
+          )
+        """
+
+    # Identity-range probes (see KeySampler)
+    CUSTOMER_RANGE = "SELECT MIN(CustomerId), MAX(CustomerId) FROM dbo.Customers"
+    CUSTOMER_PROBE = """
+        SELECT TOP 1 CustomerId FROM dbo.Customers
+        WHERE CustomerId >= ?
+        ORDER BY CustomerId
+        """
+    # Open-order queries are seeks on the filtered IX_Orders_Open index
+    OPEN_ORDER_RANGE = """
+        SELECT MIN(OrderId), MAX(OrderId) FROM dbo.Orders
+        WHERE Status <> 'Completed'
+        """
+    OPEN_ORDER_PROBE = """
+        SELECT TOP 1 OrderId, Status FROM dbo.Orders
+        WHERE OrderId >= ? AND Status <> 'Completed'
+        ORDER BY OrderId
+        """
+    DELETABLE_ITEM_PROBE = """
+        SELECT TOP 1 oi.OrderItemId, oi.OrderId
+        FROM dbo.Orders o
+        JOIN dbo.OrderItems oi ON oi.OrderId = o.OrderId
+        WHERE o.OrderId >= ? AND o.Status IN ('Pending', 'Processing')
+        ORDER BY o.OrderId
+        """
+
+    # Key registry warm-load (see KeyRegistry)
+    CUSTOMER_KEYS = "SELECT CustomerId FROM dbo.Customers"
+    OPEN_ORDER_KEYS = (
+        "SELECT OrderId, Status FROM dbo.Orders WHERE Status <> 'Completed'"
+    )
+    DELETABLE_ITEM_KEYS = """
+        SELECT oi.OrderItemId, oi.OrderId
+        FROM dbo.OrderItems oi
+        JOIN dbo.Orders o ON oi.OrderId = o.OrderId
+        WHERE o.Status IN ('Pending', 'Processing')
+        """
+
+    # Bulk seeding with explicit keys (see loadgen.seed)
+    SEED_HIGH_WATER = """
+        SELECT
+            (SELECT COUNT_BIG(*) FROM dbo.Customers),
+            (SELECT MAX(CustomerId) FROM dbo.Customers),
+            (SELECT MAX(OrderId) FROM dbo.Orders),
+            (SELECT MAX(OrderItemId) FROM dbo.OrderItems)
+        """
+    SEED_INSERTS = {
+        "Customers": """
+            INSERT INTO dbo.Customers (CustomerId, FirstName, LastName, Email)
+            VALUES (?, ?, ?, ?)
+            """,
+        "Orders": """
+            INSERT INTO dbo.Orders (OrderId, CustomerId, TotalAmount, Status)
+            VALUES (?, ?, ?, ?)
+            """,
+        "OrderItems": """
+            INSERT INTO dbo.OrderItems
+                (OrderItemId, OrderId, ProductName, Quantity, UnitPrice)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+    }
+
+    # yoyo's bookkeeping table (see run_migrations' fast path)
+    APPLIED_MIGRATIONS = "SELECT migration_hash FROM dbo._yoyo_migration"
+
+    def __init__(self, connection_string: Callable[[str], str]):
+        if pyodbc is None:
+            raise RuntimeError("pyodbc is not available - is unixODBC installed?")
+        self.connection_string = connection_string
+        self.error = pyodbc.Error
+
+    def connect(self, database: str, autocommit: bool = True) -> Connection:
+        """Open a connection to a tenant database."""
+        return pyodbc.connect(self.connection_string(database), autocommit=autocommit)
+
+    def applied_migrations(self, database: str) -> set[str] | None:
+        """Return the hashes yoyo has recorded as applied, or None if unknown."""
+        try:
+            connection = self.connect(database)
+        except self.error:
+            return None
+        try:
+            return {row[0] for row in connection.execute(self.APPLIED_MIGRATIONS)}
+        except self.error:
+            # No bookkeeping table yet - a fresh database
+            return None
+        finally:
+            connection.close()
+
+    def checksum_queries(self, table: str) -> tuple[str, str, str]:
+        """Range checksum SQL for a table (see loadgen.checksum)."""
+        return sqlserver_checksum_queries(table)
+
+    def bulk_connect(self, database: str, table: str) -> Connection:
+        """Open a transactional connection allowed to insert explicit keys."""
+        connection = self.connect(database, autocommit=False)
+        # IDENTITY_INSERT is per session and one table at a time
+        connection.execute(f"SET IDENTITY_INSERT dbo.{table} ON")
+        return connection
+
+    def bulk_insert(self, cursor: Cursor, table: str, rows: list[tuple]) -> None:
+        """Insert rows with explicit keys, parameters sent as arrays."""
+        cursor.fast_executemany = True
+        cursor.executemany(self.SEED_INSERTS[table], rows)
+
+    def execute_batch(self, cursor: Cursor, statements: list[str]) -> Iterator[Cursor]:
+        """Run statements in one round trip, yielding the cursor per result set."""
+        cursor.execute("SET NOCOUNT ON;\n" + ";\n".join(statements))
+        yield cursor
+        while cursor.nextset():
+            yield cursor
+
+    def insert_order_items(
+        self, cursor: Cursor, rows: list[tuple], return_keys: bool = False
+    ) -> list[tuple[int, int, int]]:
+        """Insert (OrderId, ProductName, Quantity, UnitPrice, Payload, LoadgenSeq,
+        LoadgenTs) rows at once.
+
+        The rows go to the server as a single parameter array. With
+        return_keys, (OrderItemId, OrderId, LoadgenSeq) of every item of the affected
+        orders is read back in one more round trip - so the orders must have
+        been created by the caller, with no items of their own yet.
+        """
+        cursor.fast_executemany = True
+        cursor.executemany(self.INSERT_ORDER_ITEMS, rows)
+        if not return_keys:
+            return []
+        order_ids = list(dict.fromkeys(row[0] for row in rows))
+        cursor.execute(order_item_keys_sql(len(order_ids)), order_ids)
+        return [tuple(key) for key in cursor.fetchall()]
+
+    def insert_customer_order(
+        self,
+        cursor: Cursor,
+        customer: tuple,
+        order: tuple,
+        items: list[tuple],
+    ) -> tuple[int, int, list[tuple[int, int]]]:
+        """Insert a customer, order and items in one round trip.
+
+        Orders with more than BATCH_ITEMS items take one more round trip per
+        BATCH_ITEMS further items, keeping each batch within SQL Server's
+        parameter and VALUES row limits.
+
+        Returns (customer_id, order_id, [(item_id, LoadgenSeq), ...]).
+        """
+        first = items[:BATCH_ITEMS]
+        cursor.execute(
+            customer_order_batch_sql(len(first)),
+            (*customer, *order, *(value for item in first for value in item)),
+        )
+        customer_id, order_id = cursor.fetchone()
+        cursor.nextset()
+        keys = [tuple(row) for row in cursor.fetchall()]
+        for start in range(BATCH_ITEMS, len(items), BATCH_ITEMS):
+            chunk = items[start : start + BATCH_ITEMS]
+            cursor.execute(
+                order_items_batch_sql(len(chunk)),
+                (order_id, *(value for item in chunk for value in item)),
+            )
+            keys.extend(tuple(row) for row in cursor.fetchall())
+        return customer_id, order_id, keys
+
+
+# SQLite equivalent of the yoyo migrations, applied in order by user_version
+SQLITE_SCHEMA = [
+    # 0001_initial_schema
+    """
+    CREATE TABLE Customers (
+        CustomerId INTEGER PRIMARY KEY AUTOINCREMENT,
+        FirstName TEXT NOT NULL,
+        LastName TEXT NOT NULL,
+        Email TEXT NOT NULL,
+        CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP,
+        ModifiedAt TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE Orders (
+        OrderId INTEGER PRIMARY KEY AUTOINCREMENT,
+        CustomerId INTEGER NOT NULL REFERENCES Customers(CustomerId),
+        OrderDate TEXT DEFAULT CURRENT_TIMESTAMP,
+        TotalAmount NUMERIC NOT NULL,
+        Status TEXT NOT NULL DEFAULT 'Pending'
+    );
+    CREATE TABLE OrderItems (
+        OrderItemId INTEGER PRIMARY KEY AUTOINCREMENT,
+        OrderId INTEGER NOT NULL REFERENCES Orders(OrderId),
+        ProductName TEXT NOT NULL,
+        Quantity INTEGER NOT NULL,
+        UnitPrice NUMERIC NOT NULL
+    );
+    CREATE INDEX IX_Orders_CustomerId ON Orders(CustomerId);
+    CREATE INDEX IX_OrderItems_OrderId ON OrderItems(OrderId);
+    """,
+    # 0004_open_order_index
+    """
+    CREATE INDEX IX_Orders_Open ON Orders(OrderId, Status)
+    WHERE Status <> 'Completed';
+    """,
+    # 0005_payload_column
+    """
+    ALTER TABLE Orders ADD COLUMN Payload TEXT;
+    ALTER TABLE OrderItems ADD COLUMN Payload TEXT;
+    """,
+    # 0006_write_stamp
+    """
+    ALTER TABLE Customers ADD COLUMN LoadgenSeq INTEGER;
+    ALTER TABLE Customers ADD COLUMN LoadgenTs TEXT;
+    ALTER TABLE Orders ADD COLUMN LoadgenSeq INTEGER;
+    ALTER TABLE Orders ADD COLUMN LoadgenTs TEXT;
+    ALTER TABLE OrderItems ADD COLUMN LoadgenSeq INTEGER;
+    ALTER TABLE OrderItems ADD COLUMN LoadgenTs TEXT;
+    """,
+]
+
+# Columns of each table as the SQLite CES stand-in puts them in row images
+CES_COLUMNS = {
+    "Customers": (
+        "CustomerId", "FirstName", "LastName", "Email", "CreatedAt", "ModifiedAt",
+        "LoadgenSeq", "LoadgenTs",
+    ),
+    "Orders": (
+        "OrderId", "CustomerId", "OrderDate", "TotalAmount", "Status", "Payload",
+        "LoadgenSeq", "LoadgenTs",
+    ),
+    "OrderItems": (
+        "OrderItemId", "OrderId", "ProductName", "Quantity", "UnitPrice", "Payload",
+        "LoadgenSeq", "LoadgenTs",
+    ),
+}
+
+
+def ces_trigger_sql(table: str) -> str:
+    """Temp triggers passing every insert/update/delete on table to ces_event()."""
+
+    def image(row: str) -> str:
+        pairs = ", ".join(f"'{col}', {row}.{col}" for col in CES_COLUMNS[table])
+        return f"json_object({pairs})"
+
+    return "\n".join(
+        f"""
+        CREATE TEMP TRIGGER IF NOT EXISTS ces_{table}_{operation}
+        AFTER {event} ON main.{table}
+        BEGIN
+            SELECT ces_event('{table}', '{operation}', {old}, {current});
+        END;
+        """
+        for operation, event, old, current in (
+            ("INS", "INSERT", "NULL", image("NEW")),
+            ("UPD", "UPDATE", image("OLD"), image("NEW")),
+            ("DEL", "DELETE", image("OLD"), "NULL"),
+        )
+    )
+
+
+class CesConnection(sqlite3.Connection):
+    """SQLite connection that publishes change events, like SQL CES, on commit.
+
+    Temp triggers call ces_event() for every row written on this connection.
+    Autocommitted writes are published at once; inside a transaction they
+    are held until commit() and dropped on rollback().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nothing is published until enable_ces()
+        self.ces_pending: list[dict] = []
+
+    def enable_ces(self, database: str, sink: EventSink) -> None:
+        """Install the triggers and start publishing to sink."""
+        self.ces_database = database
+        self.ces_sink = sink
+        self.create_function("ces_event", 4, self._ces_event)
+        for table in CES_COLUMNS:
+            self.executescript(ces_trigger_sql(table))
+
+    def _ces_event(
+        self, table: str, operation: str, old: str | None, current: str | None
+    ) -> None:
+        event = change_event(self.ces_database, table, operation, old, current)
+        if self.in_transaction:
+            self.ces_pending.append(event)
+        else:
+            self.ces_sink.send([event])
+
+    def commit(self) -> None:
+        super().commit()
+        pending, self.ces_pending = self.ces_pending, []
+        if pending:
+            self.ces_sink.send(pending)
+
+    def rollback(self) -> None:
+        super().rollback()
+        self.ces_pending = []
+
+
+class SqliteBackend:
+    """Local SQLite stand-in, one file per tenant database.
+
+    Implements the same schema and operations as SqlServerBackend so the
+    engines, scheduler and telemetry can be exercised without a server. With
+    a ces_sink, load generator connections publish CES-shaped change events
+    to it (see CesConnection), standing in for Change Event Streaming.
+    """
+
+    name = "sqlite"
+    error = sqlite3.Error
+
+    INSERT_CUSTOMER = """
+        INSERT INTO Customers (FirstName, LastName, Email, LoadgenSeq, LoadgenTs)
+        VALUES (?, ?, ?, ?, ?)
+        RETURNING CustomerId
+        """
+    INSERT_ORDER = """
+        INSERT INTO Orders
+            (CustomerId, TotalAmount, Status, Payload, LoadgenSeq, LoadgenTs)
+        VALUES (?, ?, ?, ?, ?, ?)
+        RETURNING OrderId
+        """
+    UPDATE_ORDER_STATUS = """
+        UPDATE Orders
+        SET Status = ?, LoadgenSeq = ?, LoadgenTs = ?
+        WHERE OrderId = ? AND Status = ?
+        """
+    UPDATE_CUSTOMER_EMAIL = """
+        UPDATE Customers
+        SET Email = ?, ModifiedAt = CURRENT_TIMESTAMP, LoadgenSeq = ?, LoadgenTs = ?
+        WHERE CustomerId = ?
+        """
+    DELETE_ORDER_ITEM = """
+        DELETE FROM OrderItems
+        WHERE OrderItemId = ?
+          AND EXISTS (
+            SELECT 1 FROM Orders
+            WHERE OrderId = ? AND Status IN ('Pending', 'Processing')
+          )
+        """
+
+    CUSTOMER_RANGE = "SELECT MIN(CustomerId), MAX(CustomerId) FROM Customers"
+    CUSTOMER_PROBE = """
+        SELECT CustomerId FROM Customers
+        WHERE CustomerId >= ?
+        ORDER BY CustomerId
+        LIMIT 1
+        """
+    OPEN_ORDER_RANGE = """
+        SELECT MIN(OrderId), MAX(OrderId) FROM Orders
+        WHERE Status <> 'Completed'
+        """
+    OPEN_ORDER_PROBE = """
+        SELECT OrderId, Status FROM Orders
+        WHERE OrderId >= ? AND Status <> 'Completed'
+        ORDER BY OrderId
+        LIMIT 1
+        """
+    DELETABLE_ITEM_PROBE = """
+        SELECT oi.OrderItemId, oi.OrderId
+        FROM Orders o
+        JOIN OrderItems oi ON oi.OrderId = o.OrderId
+        WHERE o.OrderId >= ? AND o.Status IN ('Pending', 'Processing')
+        ORDER BY o.OrderId
+        LIMIT 1
+        """
+
+    CUSTOMER_KEYS = "SELECT CustomerId FROM Customers"
+    OPEN_ORDER_KEYS = "SELECT OrderId, Status FROM Orders WHERE Status <> 'Completed'"
+    DELETABLE_ITEM_KEYS = """
+        SELECT oi.OrderItemId, oi.OrderId
+        FROM OrderItems oi
+        JOIN Orders o ON oi.OrderId = o.OrderId
+        WHERE o.Status IN ('Pending', 'Processing')
+        """
+
+    SEED_HIGH_WATER = """
+        SELECT
+            (SELECT COUNT(*) FROM Customers),
+            (SELECT MAX(CustomerId) FROM Customers),
+            (SELECT MAX(OrderId) FROM Orders),
+            (SELECT MAX(OrderItemId) FROM OrderItems)
+        """
+    SEED_INSERTS = {
+        "Customers": """
+            INSERT INTO Customers (CustomerId, FirstName, LastName, Email)
+            VALUES (?, ?, ?, ?)
+            """,
+        "Orders": """
+            INSERT INTO Orders (OrderId, CustomerId, TotalAmount, Status)
+            VALUES (?, ?, ?, ?)
+            """,
+        "OrderItems": """
+            INSERT INTO OrderItems
+                (OrderItemId, OrderId, ProductName, Quantity, UnitPrice)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+    }
+
+    def __init__(self, directory: str, ces_sink: EventSink | None = None):
+        self.directory = directory
+        self.ces_sink = ces_sink
+
+    def path(self, database: str) -> str:
+        """Return the SQLite file for a tenant database."""
+        return os.path.join(self.directory, f"{database}.sqlite3")
+
+    def connect(
+        self, database: str, autocommit: bool = True, ces: bool = True
+    ) -> sqlite3.Connection:
+        """Open a connection to a tenant database file.
+
+        Its writes publish change events when the backend has a ces_sink,
+        unless ces is False.
+        """
+        connection = sqlite3.connect(
+            self.path(database),
+            timeout=30.0,
+            # IMMEDIATE takes the write lock up front, avoiding busy errors on
+            # lock upgrade when several workers share a file
+            isolation_level=None if autocommit else "IMMEDIATE",
+            # The async engine runs a connection on whichever pool thread is free
+            check_same_thread=False,
+            factory=CesConnection,
+        )
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.create_function("loadgen_row_hash", -1, row_hash, deterministic=True)
+        if ces and self.ces_sink:
+            connection.enable_ces(database, self.ces_sink)
+        return connection
+
+    def create_schema(self, database: str) -> None:
+        """Create or upgrade a tenant database file to the current schema."""
+        os.makedirs(self.directory, exist_ok=True)
+        connection = self.connect(database, ces=False)
+        try:
+            (version,) = connection.execute("PRAGMA user_version").fetchone()
+            for number, script in enumerate(SQLITE_SCHEMA[version:], start=version + 1):
+                connection.executescript(
+                    f"BEGIN; {script} PRAGMA user_version = {number}; COMMIT;"
+                )
+            log.info("sqlite_schema_ready", database=database, path=self.path(database))
+        finally:
+            connection.close()
+
+    def checksum_queries(self, table: str) -> tuple[str, str, str]:
+        """Range checksum SQL for a table (see loadgen.checksum)."""
+        return sqlite_checksum_queries(table)
+
+    def bulk_connect(self, database: str, table: str) -> sqlite3.Connection:
+        """Open a transactional connection for bulk inserts (publishing no events)."""
+        return self.connect(database, autocommit=False, ces=False)
+
+    def bulk_insert(self, cursor: Cursor, table: str, rows: list[tuple]) -> None:
+        """Insert rows with explicit keys."""
+        cursor.executemany(self.SEED_INSERTS[table], rows)
+
+    def execute_batch(self, cursor: Cursor, statements: list[str]) -> Iterator[Cursor]:
+        """Run statements one after another, yielding the cursor per result set."""
+        for statement in statements:
+            cursor.execute(statement)
+            yield cursor
+
+    def insert_order_items(
+        self, cursor: Cursor, rows: list[tuple], return_keys: bool = False
+    ) -> list[tuple[int, int, int]]:
+        """Insert (OrderId, ProductName, Quantity, UnitPrice, Payload, LoadgenSeq,
+        LoadgenTs) rows at once.
+
+        Rows are inserted SQLITE_INSERT_ROWS at a time, within the variable
+        limit. Returns (OrderItemId, OrderId, LoadgenSeq) per row when
+        return_keys is set.
+        """
+        keys = []
+        for start in range(0, len(rows), SQLITE_INSERT_ROWS):
+            chunk = rows[start : start + SQLITE_INSERT_ROWS]
+            cursor.execute(
+                f"""
+                INSERT INTO OrderItems (
+                    OrderId, ProductName, Quantity, UnitPrice, Payload,
+                    LoadgenSeq, LoadgenTs
+                )
+                VALUES {", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * len(chunk))}
+                RETURNING OrderItemId, OrderId, LoadgenSeq
+                """,
+                tuple(value for row in chunk for value in row),
+            )
+            keys.extend(tuple(key) for key in cursor.fetchall())
+        return keys if return_keys else []
+
+    def insert_customer_order(
+        self,
+        cursor: Cursor,
+        customer: tuple,
+        order: tuple,
+        items: list[tuple],
+    ) -> tuple[int, int, list[tuple[int, int]]]:
+        """Insert a customer, order and items, the items as one multi-row insert.
+
+        Returns (customer_id, order_id, [(item_id, LoadgenSeq), ...]).
+        """
+        cursor.execute(self.INSERT_CUSTOMER, customer)
+        (customer_id,) = cursor.fetchone()
+        cursor.execute(self.INSERT_ORDER, (customer_id, *order))
+        (order_id,) = cursor.fetchone()
+        keys = self.insert_order_items(
+            cursor, [(order_id, *item) for item in items], return_keys=True
+        )
+        return customer_id, order_id, [(item_id, seq) for item_id, _, seq in keys]
+
+
+Backend = SqlServerBackend | SqliteBackend
@@ -0,0 +1,284 @@
+"""Range checksums - finds the rows that differ between a source and a sink export.
+
+vw_TableRowCounts only compares totals. Here both sides aggregate a hash of
+every row over primary-key buckets; only buckets whose (count, checksum)
+differ are split again, down to ranges small enough to compare row by row.
+A matching table costs two queries per side - its key range, then its
+top-level buckets - and each divergent row a few queries per level, so
+verification cost grows with the logarithm of the table size rather than
+with the table.
+"""
+
+import hashlib
+import json
+import time
+from collections.abc import Iterable
+
+import structlog
+
+from loadgen.lag import PRIMARY_KEYS, parse_change_event
+
+log = structlog.get_logger()
+
+# Columns hashed per row: the primary key, then the columns writes set.
+# LoadgenSeq changes on every write, so a lost update shows even when a
+# later value happens to match.
+CHECKSUM_COLUMNS = {
+    "Customers": ("CustomerId", "FirstName", "LastName", "Email", "LoadgenSeq"),
+    "Orders": (
+        "OrderId",
+        "CustomerId",
+        "TotalAmount",
+        "Status",
+        "Payload",
+        "LoadgenSeq",
+    ),
+    "OrderItems": (
+        "OrderItemId",
+        "OrderId",
+        "ProductName",
+        "Quantity",
+        "UnitPrice",
+        "Payload",
+        "LoadgenSeq",
+    ),
+}
+
+# DECIMAL(18,2) columns, hashed as text with two decimal places
+MONEY_COLUMNS = {"TotalAmount", "UnitPrice"}
+
+# Buckets per range, and the range size compared row by row
+FANOUT = 16
+LEAF_KEYS = 256
+
+
+def row_hash(*values: object) -> int:
+    """Signed 32-bit hash of a row's canonical text, as the SQL dialects compute it.
+
+    The first four bytes of the MD5 of the values as UTF-16LE text joined
+    with "|", NULL as empty - what HASHBYTES('MD5', CONCAT_WS(N'|', ...))
+    gives on SQL Server. SQLite connections register this as
+    loadgen_row_hash().
+    """
+    text = "|".join("" if value is None else str(value) for value in values)
+    digest = hashlib.md5(text.encode("utf-16-le")).digest()
+    return int.from_bytes(digest[:4], "big", signed=True)
+
+
+def checksum_queries(
+    table_ref: str, key: str, row_hash_sql: str
+) -> tuple[str, str, str]:
+    """Build the (key range, bucket checksums, row hashes) queries for a table.
+
+    The key range returns (lowest key, highest key, rows). Bucket checksums
+    take (low, width, low, high) and return (bucket, rows, sum of row hashes);
+    row hashes take (low, high).
+    """
+    return (
+        f"SELECT MIN({key}), MAX({key}), COUNT(*) FROM {table_ref}",
+        f"""
+        SELECT Bucket, COUNT(*), SUM(RowHash)
+        FROM (
+            SELECT ({key} - ?) / ? AS Bucket, CAST({row_hash_sql} AS BIGINT) AS RowHash
+            FROM {table_ref}
+            WHERE {key} BETWEEN ? AND ?
+        ) AS Hashed
+        GROUP BY Bucket
+        """,
+        f"SELECT {key}, {row_hash_sql} FROM {table_ref} WHERE {key} BETWEEN ? AND ?",
+    )
+
+
+class ChecksumSide:
+    """One side of a comparison: a connection plus its backend's checksum SQL."""
+
+    def __init__(self, backend, database: str):
+        self.backend = backend
+        self.connection = backend.connect(database)
+        self.queries = 0
+
+    def _fetch(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        self.queries += 1
+        cursor = self.connection.cursor()
+        cursor.execute(sql, tuple(params))
+        return cursor.fetchall()
+
+    def key_range(self, table: str) -> tuple[int | None, int | None, int]:
+        """(lowest key, highest key, rows) of table; the keys are None when empty."""
+        sql, _, _ = self.backend.checksum_queries(table)
+        low, high, rows = self._fetch(sql)[0]
+        return low, high, rows
+
+    def buckets(
+        self, table: str, low: int, high: int, width: int
+    ) -> dict[int, tuple[int, int]]:
+        """bucket -> (rows, checksum) for keys low..high in buckets of width keys."""
+        _, sql, _ = self.backend.checksum_queries(table)
+        return {
+            bucket: (count, checksum)
+            for bucket, count, checksum in self._fetch(sql, (low, width, low, high))
+        }
+
+    def rows(self, table: str, low: int, high: int) -> dict[int, int]:
+        """key -> row hash for keys low..high."""
+        _, _, sql = self.backend.checksum_queries(table)
+        return dict(self._fetch(sql, (low, high)))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class RangeReconciler:
+    """Compares the tables of one database between source and sink by key range."""
+
+    def __init__(
+        self,
+        source,
+        sink,
+        database: str,
+        fanout: int = FANOUT,
+        leaf_keys: int = LEAF_KEYS,
+    ):
+        if fanout < 2 or leaf_keys < 1:
+            raise ValueError("Checksum fanout must be >= 2 and leaf keys >= 1")
+        self.source = source
+        self.sink = sink
+        self.database = database
+        self.fanout = fanout
+        self.leaf_keys = leaf_keys
+
+    def run(self) -> bool:
+        """Reconcile every table. Returns True if source and sink agree."""
+        source = ChecksumSide(self.source, self.database)
+        sink = ChecksumSide(self.sink, self.database)
+        try:
+            return all([self._table(table, source, sink) for table in CHECKSUM_COLUMNS])
+        finally:
+            source.close()
+            sink.close()
+
+    def _table(self, table: str, source: ChecksumSide, sink: ChecksumSide) -> bool:
+        """Drill down into mismatching ranges of one table."""
+        start = time.monotonic()
+        queries = source.queries + sink.queries
+        counts = dict.fromkeys(
+            ("ranges", "rows_compared", "missing", "unexpected", "mismatched"), 0
+        )
+        source_low, source_high, source_rows = source.key_range(table)
+        sink_low, sink_high, sink_rows = sink.key_range(table)
+        keys = [
+            key
+            for key in (source_low, source_high, sink_low, sink_high)
+            if key is not None
+        ]
+        ranges = [(min(keys), max(keys))] if keys else []
+        while ranges:
+            low, high = ranges.pop()
+            counts["ranges"] += 1
+            if high - low < self.leaf_keys:
+                self._compare_rows(table, source, sink, low, high, counts)
+                continue
+            # Ceiling division, so fanout buckets cover the whole range
+            width = -(-(high - low + 1) // self.fanout)
+            source_buckets = source.buckets(table, low, high, width)
+            sink_buckets = sink.buckets(table, low, high, width)
+            for bucket in sorted(source_buckets.keys() | sink_buckets.keys()):
+                if source_buckets.get(bucket) != sink_buckets.get(bucket):
+                    bucket_low = low + bucket * width
+                    ranges.append((bucket_low, min(bucket_low + width - 1, high)))
+        divergent = counts["missing"] + counts["unexpected"] + counts["mismatched"]
+        log.info(
+            "checksum_reconciled",
+            database=self.database,
+            table=table,
+            consistent=divergent == 0,
+            source_rows=source_rows,
+            sink_rows=sink_rows,
+            queries=source.queries + sink.queries - queries,
+            duration_seconds=round(time.monotonic() - start, 3),
+            **counts,
+        )
+        return divergent == 0
+
+    def _compare_rows(
+        self,
+        table: str,
+        source: ChecksumSide,
+        sink: ChecksumSide,
+        low: int,
+        high: int,
+        counts: dict[str, int],
+    ) -> None:
+        """Compare row hashes of one leaf range, logging each divergent key."""
+        source_rows = source.rows(table, low, high)
+        sink_rows = sink.rows(table, low, high)
+        counts["rows_compared"] += len(source_rows)
+        for key in sorted(source_rows.keys() | sink_rows.keys()):
+            source_hash, sink_hash = source_rows.get(key), sink_rows.get(key)
+            if source_hash == sink_hash:
+                continue
+            kind = (
+                "missing"
+                if sink_hash is None
+                else "unexpected"
+                if source_hash is None
+                else "mismatched"
+            )
+            counts[kind] += 1
+            log.warning(
+                "checksum_divergence",
+                database=self.database,
+                table=table,
+                key=key,
+                kind=kind,
+            )
+
+
+def replay_events(events_path: str, backend) -> list[str]:
+    """Apply captured change events to a SqliteBackend, as a sink would.
+
+    Inserts and updates upsert the checksummed columns of the row image,
+    deletes remove the row, so the files end up holding what a sink fed by
+    the same events would export. Returns the databases seen.
+    """
+    connections = {}
+    try:
+        with open(events_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    database, table, operation, old, current = parse_change_event(
+                        json.loads(line)
+                    )
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    log.warning("ces_event_invalid", error=str(e))
+                    continue
+                if table not in CHECKSUM_COLUMNS:
+                    continue
+                connection = connections.get(database)
+                if connection is None:
+                    backend.create_schema(database)
+                    connection = backend.connect(database, autocommit=False, ces=False)
+                    # Parents may predate the capture
+                    connection.execute("PRAGMA foreign_keys = OFF")
+                    connections[database] = connection
+                columns = CHECKSUM_COLUMNS[table]
+                if operation == "DEL":
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE {PRIMARY_KEYS[table]} = ?",
+                        ((old or {}).get(PRIMARY_KEYS[table]),),
+                    )
+                else:
+                    connection.execute(
+                        f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join(['?'] * len(columns))})",
+                        tuple((current or {}).get(column) for column in columns),
+                    )
+        for connection in connections.values():
+            connection.commit()
+    finally:
+        for connection in connections.values():
+            connection.close()
+    log.info("sink_replayed", events=events_path, databases=sorted(connections))
+    return sorted(connections)
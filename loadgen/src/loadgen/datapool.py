@@ -0,0 +1,196 @@
+"""Data pools - pre-generated fake values served by index."""
+
+import base64
+import random
+import threading
+import weakref
+from typing import NamedTuple
+
+import structlog
+from faker import Faker
+
+from loadgen.rng import UNSEEDED, derive
+
+log = structlog.get_logger()
+
+# Email domains are few in real data; no need to scale them with pool size
+EMAIL_DOMAIN_COUNT = 100
+
+# Emails end in a number below this, so two picks of the same names and
+# domain collide about once in this many
+EMAIL_SUFFIX_RANGE = 1_000_000
+
+# Generations kept once built; a stream that falls further behind than this
+# rebuilds the generation it needs
+KEEP_GENERATIONS = 3
+
+# Payloads up to this size are slices of one block of random text
+PAYLOAD_BLOCK_BYTES = 1024 * 1024
+
+
+class Pools(NamedTuple):
+    """One generation of pooled values."""
+
+    first_names: list[str]
+    last_names: list[str]
+    email_domains: list[str]
+    product_words: list[str]
+
+
+class DataPool:
+    """Pools of names, email domains and product words generated in bulk.
+
+    Faker's provider machinery costs more per call than an insert round trip
+    once pacing is removed, so values are generated up front and picked by
+    random index. Emails combine a first name, last name and a number drawn
+    from the caller's stream, so they rarely repeat however small the pools
+    are, and a seeded stream draws the same emails on every run.
+
+    With refresh_after > 0 the pools move on to a new generation every
+    refresh_after draws, to keep long runs from cycling through the same
+    values. Draws are counted per caller stream, so each stream switches
+    generation at the same draw on every run whatever the other workers do.
+    The next generation is built on a background thread as soon as the first
+    stream reaches the current one, well before anyone needs it, and swapped
+    in whole.
+
+    With a seed, Faker and the payload block are seeded, and every
+    generation is seeded from it, so the pools are the same on every run.
+    Picks draw from the caller's stream: the pool is shared by every worker,
+    which each bring their own.
+    """
+
+    def __init__(
+        self, size: int = 10_000, refresh_after: int = 0, seed: int | None = None
+    ):
+        self.size = size
+        self.refresh_after = refresh_after
+        self.seed = seed
+        # Faker isn't thread-safe: only used under _building
+        self._fake = Faker()
+        self._building = threading.Lock()
+        self._random = random.Random(seed)
+        self._payload_block = ""
+        # Draws so far per caller stream, counted only when refreshing
+        self._draws: weakref.WeakKeyDictionary[random.Random, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Built generations by number, replaced whole when one is added
+        self._generations: dict[int, Pools] = {}
+        self._build(0)
+
+    def _generate(self, generation: int) -> Pools:
+        """Generate every pool of a generation; call under _building."""
+        fake = self._fake
+        if self.seed is not None:
+            fake.seed_instance(
+                self.seed
+                if generation == 0
+                else derive(self.seed, "data pool", generation).getrandbits(64)
+            )
+        pools = Pools(
+            first_names=[fake.first_name() for _ in range(self.size)],
+            last_names=[fake.last_name() for _ in range(self.size)],
+            email_domains=[
+                fake.free_email_domain() for _ in range(EMAIL_DOMAIN_COUNT)
+            ],
+            product_words=[word.capitalize() for word in fake.words(self.size)],
+        )
+        log.info("data_pool_generated", size=self.size, generation=generation)
+        return pools
+
+    def _build(self, generation: int) -> Pools:
+        """Return a generation, building it unless it exists or is underway."""
+        with self._building:
+            pools = self._generations.get(generation)
+            if pools is None:
+                pools = self._generate(generation)
+                kept = list(self._generations.items())[1 - KEEP_GENERATIONS :]
+                self._generations = dict([*kept, (generation, pools)])
+        return pools
+
+    def _pools(self, rng: random.Random, draw: bool = False) -> Pools:
+        """Return the generation rng is on, counting a draw if draw is set."""
+        if not self.refresh_after:
+            return self._generations[0]
+        # A stream belongs to one worker, so its count is never raced - bar
+        # the shared UNSEEDED default, whose picks aren't reproducible anyway
+        draws = self._draws.get(rng, 0)
+        if draw:
+            self._draws[rng] = draws + 1
+        generation, position = divmod(draws, self.refresh_after)
+        if draw and position == 0 and generation + 1 not in self._generations:
+            threading.Thread(
+                target=self._build,
+                args=(generation + 1,),
+                name="loadgen-data-pool",
+                daemon=True,
+            ).start()
+        pools = self._generations.get(generation)
+        if pools is None:
+            # Not built ahead in time, or evicted since: build it here
+            pools = self._build(generation)
+        return pools
+
+    def person(self, rng: random.Random = UNSEEDED) -> tuple[str, str, str]:
+        """Return (first_name, last_name, email)."""
+        pools = self._pools(rng, draw=True)
+        first_name = rng.choice(pools.first_names)
+        last_name = rng.choice(pools.last_names)
+        return first_name, last_name, self._email(pools, first_name, last_name, rng)
+
+    def email(
+        self,
+        first_name: str | None = None,
+        last_name: str | None = None,
+        rng: random.Random = UNSEEDED,
+    ) -> str:
+        """Return an email, optionally based on the given names."""
+        return self._email(self._pools(rng), first_name, last_name, rng)
+
+    def _email(
+        self,
+        pools: Pools,
+        first_name: str | None,
+        last_name: str | None,
+        rng: random.Random,
+    ) -> str:
+        first_name = first_name or rng.choice(pools.first_names)
+        last_name = last_name or rng.choice(pools.last_names)
+        return (
+            f"{first_name}.{last_name}{rng.randrange(EMAIL_SUFFIX_RANGE)}"
+            f"@{rng.choice(pools.email_domains)}"
+        ).lower()
+
+    def product_name(self, rng: random.Random = UNSEEDED) -> str:
+        """Return a two-word product name."""
+        words = self._pools(rng, draw=True).product_words
+        return f"{rng.choice(words)} {rng.choice(words)}"
+
+    def payload(self, size: int, rng: random.Random = UNSEEDED) -> str | None:
+        """Return size characters of random base64 text, or None for size 0.
+
+        Base64 carries 6 bits per character, so compressors still shrink
+        payloads by about a quarter, but no further. Payloads up to the block
+        size are slices of one shared block; larger ones are drawn from rng
+        whole, about 6ms per MiB, since any reuse of the block would repeat.
+
+        The block is generated on first use, so runs without payloads don't
+        pay for it.
+        """
+        if size <= 0:
+            return None
+        if size > PAYLOAD_BLOCK_BYTES:
+            return base64.b64encode(rng.randbytes(-(-size * 3 // 4))).decode(
+                "ascii"
+            )[:size]
+        block = self._payload_block
+        if not block:
+            with self._building:
+                if not self._payload_block:
+                    self._payload_block = base64.b64encode(
+                        self._random.randbytes(PAYLOAD_BLOCK_BYTES * 3 // 4)
+                    ).decode("ascii")
+            block = self._payload_block
+        offset = rng.randrange(len(block) - size + 1)
+        return block[offset : offset + size]
@@ -0,0 +1,111 @@
+"""Value distributions - integer sizes and counts configured by short specs."""
+
+import math
+import random
+
+from loadgen.rng import UNSEEDED
+
+# Size suffixes accepted in specs, e.g. "lognormal:4K:1.5"
+UNITS = {"K": 1024, "M": 1024 * 1024}
+
+
+def _number(text: str) -> float:
+    """Parse a spec parameter, allowing a K or M suffix."""
+    text = text.strip()
+    unit = UNITS.get(text[-1:].upper())
+    if unit:
+        return float(text[:-1]) * unit
+    return float(text)
+
+
+class Distribution:
+    """A non-negative integer distribution parsed from "kind:param:param".
+
+    Kinds:
+        constant:N              always N
+        uniform:LOW:HIGH        uniform integer in [LOW, HIGH]
+        normal:MEAN:STDDEV      normal, rounded
+        lognormal:MEDIAN:SIGMA  log-normal with the given median; heavy tail
+        exponential:MEAN        exponential with the given mean
+
+    Samples are clamped to [0, maximum]. A bounded kind (constant, uniform)
+    whose largest value exceeds maximum is rejected rather than clamped, so
+    a spec can't silently draw less than it says. Parameters accept K/M
+    suffixes, so "uniform:1K:4M" draws payload sizes between 1 KiB and 4 MiB.
+    """
+
+    KINDS = {
+        "constant": 1,
+        "uniform": 2,
+        "normal": 2,
+        "lognormal": 2,
+        "exponential": 1,
+    }
+
+    def __init__(self, kind: str, *params: float, maximum: int | None = None):
+        if kind not in self.KINDS:
+            raise ValueError(
+                f"Unknown distribution {kind!r}, "
+                f"expected one of {', '.join(self.KINDS)}"
+            )
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(
+                f"Distribution {kind!r} takes {self.KINDS[kind]} parameter(s), "
+                f"got {len(params)}"
+            )
+        if any(param < 0 for param in params):
+            raise ValueError(f"Distribution {kind!r} parameters must be >= 0")
+        if kind == "uniform" and params[0] > params[1]:
+            raise ValueError("uniform LOW must not exceed HIGH")
+        self.kind = kind
+        self.params = tuple(float(param) for param in params)
+        self.maximum = maximum
+        upper = self.upper_bound()
+        if maximum is not None and upper is not None and upper > maximum:
+            raise ValueError(
+                f"Distribution {self!r} draws up to {upper}, "
+                f"more than the maximum of {maximum}"
+            )
+
+    def upper_bound(self) -> int | None:
+        """Largest value a sample can take before clamping; None if unbounded."""
+        if self.kind == "constant":
+            return round(self.params[0])
+        if self.kind == "uniform":
+            return int(self.params[1])
+        return None
+
+    @classmethod
+    def parse(cls, spec: str, maximum: int | None = None) -> "Distribution":
+        """Build a distribution from a spec such as "uniform:1:3"."""
+        kind, *params = spec.strip().split(":")
+        try:
+            values = [_number(param) for param in params]
+        except ValueError:
+            raise ValueError(f"Invalid distribution spec {spec!r}") from None
+        return cls(kind.strip().lower(), *values, maximum=maximum)
+
+    def sample(self, rng: random.Random = UNSEEDED) -> int:
+        """Draw one value from rng."""
+        kind, params = self.kind, self.params
+        if kind == "constant":
+            value = params[0]
+        elif kind == "uniform":
+            value = rng.randint(int(params[0]), int(params[1]))
+        elif kind == "normal":
+            value = rng.gauss(params[0], params[1])
+        elif kind == "lognormal":
+            value = rng.lognormvariate(math.log(max(params[0], 1e-9)), params[1])
+        else:
+            value = rng.expovariate(1.0 / params[0]) if params[0] else 0.0
+        value = max(0, round(value))
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return value
+
+    def __repr__(self) -> str:
+        params = ":".join(
+            str(int(param)) if param.is_integer() else f"{param:g}"
+            for param in self.params
+        )
+        return f"{self.kind}:{params}"
@@ -0,0 +1,146 @@
+"""Worker engine - runs load generators concurrently, one thread per worker."""
+
+import queue
+import threading
+import time
+
+import structlog
+
+from loadgen.generator import LoadGenerator
+from loadgen.scheduler import IDLE_INTERVAL_SECONDS, ArrivalScheduler
+
+log = structlog.get_logger()
+
+
+class WorkerEngine:
+    """Runs each LoadGenerator on its own thread with its own pacing.
+
+    Every worker owns its generator (and therefore its own connection), so
+    aggregate throughput grows with the number of workers instead of being
+    shared between them.
+
+    Without schedulers each worker sleeps get_random_delay() after every
+    operation (closed loop). With an ArrivalScheduler for a database, a
+    dispatcher thread issues arrivals at the target rate and that database's
+    workers execute them as they become free (open loop).
+    """
+
+    def __init__(
+        self,
+        generators: list[LoadGenerator],
+        schedulers: dict[str, ArrivalScheduler] | None = None,
+    ):
+        self.generators = generators
+        self.schedulers = schedulers or {}
+        self._arrivals: dict[str, queue.SimpleQueue[float]] = {
+            database: queue.SimpleQueue() for database in self.schedulers
+        }
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._failed = False
+
+    def start(self) -> None:
+        """Start one thread per generator, plus one dispatcher per scheduler."""
+        for database, scheduler in self.schedulers.items():
+            thread = threading.Thread(
+                target=self._run_dispatcher,
+                args=(scheduler, self._arrivals[database]),
+                name=f"loadgen-{database}-dispatcher",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+        for index, generator in enumerate(self.generators):
+            thread = threading.Thread(
+                target=self._run_worker,
+                args=(generator,),
+                name=f"loadgen-{generator.database_name}-{index}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+        log.info("workers_started", workers=len(self.generators))
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Signal all workers to stop and wait for in-flight operations."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        for scheduler in self.schedulers.values():
+            scheduler.log_stats()
+        log.info("workers_stopped", workers=len(self.generators))
+
+    def run(self) -> bool:
+        """Run until stopped or a worker fails. Returns False on failure.
+
+        Waits in short slices so the main thread stays responsive to
+        KeyboardInterrupt; workers are always drained before returning.
+        """
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(1.0)
+        finally:
+            self.stop()
+        return not self._failed
+
+    def _run_dispatcher(
+        self, scheduler: ArrivalScheduler, arrivals: queue.SimpleQueue[float]
+    ) -> None:
+        """Dispatcher loop: enqueue intended start times on an absolute timeline."""
+        run_start = next_start = time.monotonic()
+        while not self._stop.is_set():
+            interval = scheduler.next_interval(next_start - run_start)
+            next_start += IDLE_INTERVAL_SECONDS if interval is None else interval
+            delay = next_start - time.monotonic()
+            # When behind schedule, issue immediately - those arrivals run late
+            if delay > 0 and self._stop.wait(delay):
+                break
+            if interval is not None and scheduler.try_acquire():
+                arrivals.put(next_start)
+
+    def _run_worker(self, generator: LoadGenerator) -> None:
+        """Worker loop: run operations until stopped, then close the connection."""
+        scheduler = self.schedulers.get(generator.database_name)
+        try:
+            if scheduler:
+                self._run_paced(
+                    generator, scheduler, self._arrivals[generator.database_name]
+                )
+            else:
+                self._run_closed_loop(generator)
+        except Exception as e:
+            log.error(
+                "worker_failed",
+                database=generator.database_name,
+                error=str(e),
+            )
+            self._failed = True
+            self._stop.set()
+        finally:
+            generator.close()
+
+    def _run_closed_loop(self, generator: LoadGenerator) -> None:
+        """Execute an operation, then sleep for the generator's own delay."""
+        while not self._stop.is_set():
+            generator.execute_random_operation()
+            self._stop.wait(generator.get_random_delay())
+
+    def _run_paced(
+        self,
+        generator: LoadGenerator,
+        scheduler: ArrivalScheduler,
+        arrivals: queue.SimpleQueue[float],
+    ) -> None:
+        """Execute arrivals issued by the database's dispatcher."""
+        while not self._stop.is_set():
+            try:
+                intended_start = arrivals.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            actual_start = time.monotonic()
+            try:
+                generator.execute_random_operation(intended_start)
+            finally:
+                scheduler.release(intended_start, actual_start)
@@ -1,188 +1,511 @@
-"""Load generator - performs random CRUD operations against Azure SQL."""
+"""Load generator - performs random CRUD operations against a tenant database."""
 
-import random
+import itertools
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
 
-import pyodbc
 import structlog
-from faker import Faker
 from opentelemetry import trace
 
+from loadgen.backends import Backend, Connection, Cursor
+from loadgen.datapool import DataPool
+from loadgen.distributions import Distribution
+from loadgen.journal import JournalWriter
+from loadgen.keys import KeySampler, KeySelector
+from loadgen.lag import LagMonitor
+from loadgen.metrics import LatencyRecorder
+from loadgen.recording import WorkloadRecorder
+from loadgen.rng import Streams
+from loadgen.workload import DEFAULT_MIX, OperationMix
+
 log = structlog.get_logger()
-fake = Faker()
 tracer = trace.get_tracer(__name__)
 
+INSERT_MODES = ("statements", "batch")
+
+# LoadgenSeq values - unique within the process and increasing across restarts
+_sequence = itertools.count(time.time_ns() // 1_000)
+
+
+def write_stamp() -> tuple[int, str]:
+    """Return (LoadgenSeq, LoadgenTs) for one row about to be written."""
+    return next(_sequence), datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S.%f")
+
 
 class LoadGenerator:
-    """Generates synthetic CRUD operations for a single database."""
+    """Generates synthetic CRUD operations for a single database.
+
+    With ops_per_commit=0 every statement autocommits. Otherwise operations
+    run in explicit transactions, committed every ops_per_commit operations;
+    commit and whole-transaction latency are recorded as the "commit" and
+    "transaction" operations alongside the per-operation latencies.
+
+    Every inserted or updated row is stamped with write_stamp(). With a
+    LagMonitor, each write is reported to it once committed, so the monitor
+    can time the matching change event; with a JournalWriter, each committed
+    write is also appended to the operation journal.
+
+    Every random decision draws from the generator's own Streams - operation
+    choice, key picks, data and delays each from a separate one - so workers
+    never share RNG state, and seeded streams replay the same decisions.
+
+    Each operation is split in two: plan_* picks its target keys and data
+    and returns (operation, arguments), apply_* performs those arguments and
+    returns the keys it created, or None when it had nothing to do. With a
+    WorkloadRecorder every applied operation is recorded once committed, and
+    replay_operation() applies recorded arguments again.
+    """
 
     def __init__(
         self,
-        connection_string: str,
+        backend: Backend,
         database_name: str,
         min_delay: float = 1.0,
         max_delay: float = 5.0,
+        keys: KeySelector | None = None,
+        data: DataPool | None = None,
+        insert_mode: str = "statements",
+        ops_per_commit: int = 0,
+        items_per_order: Distribution | None = None,
+        items_per_existing_order: Distribution | None = None,
+        payload_bytes: Distribution | None = None,
+        mix: OperationMix | None = None,
+        lag: LagMonitor | None = None,
+        journal: JournalWriter | None = None,
+        streams: Streams | None = None,
+        recorder: WorkloadRecorder | None = None,
     ):
-        self.connection_string = connection_string
+        self.backend = backend
         self.database_name = database_name
         self.min_delay = min_delay
         self.max_delay = max_delay
-        self._connection: pyodbc.Connection | None = None
+        self._connection: Connection | None = None
+        self.latencies = LatencyRecorder()
+        self.keys = keys or KeySampler(backend)
+        self.data = data or DataPool()
+        if insert_mode not in INSERT_MODES:
+            raise ValueError(
+                f"Unknown insert mode {insert_mode!r}, "
+                f"expected one of {', '.join(INSERT_MODES)}"
+            )
+        self.insert_mode = insert_mode
+        self.ops_per_commit = ops_per_commit
+        self.items_per_order = items_per_order or Distribution("uniform", 1, 3)
+        self.items_per_existing_order = items_per_existing_order or Distribution(
+            "uniform", 1, 2
+        )
+        self.payload_bytes = payload_bytes
+        self.mix = mix or OperationMix(DEFAULT_MIX)
+        self.lag = lag
+        self.journal = journal
+        self.random = streams or Streams.derive(None)
+        self.recorder = recorder
+        self._pending_items: list[tuple[int, str, list[tuple]]] = []
+        self._written: list[tuple[str, str, list[tuple]]] = []
+        self._recorded: list[tuple] = []
+        self._intended_start: float | None = None
+        # Set once replaying: the replay maps every key it creates
+        self._replaying = False
+        self._uncommitted = 0
+        self._transaction_start = 0.0
 
     @property
-    def connection(self) -> pyodbc.Connection:
+    def connection(self) -> Connection:
         """Lazy connection with auto-reconnect."""
         if self._connection is None:
             log.info("connecting_to_database", database=self.database_name)
-            self._connection = pyodbc.connect(self.connection_string, autocommit=True)
+            self._connection = self.backend.connect(
+                self.database_name, autocommit=self.ops_per_commit == 0
+            )
+            self.keys.prepare(self._connection)
+            if self.ops_per_commit:
+                # Don't carry the warm-load reads into the first transaction
+                self._connection.commit()
         return self._connection
 
-    def reconnect(self) -> None:
-        """Force reconnection on next operation."""
+    def commit(self) -> None:
+        """Commit the open transaction and record its latency."""
+        if not self._uncommitted:
+            return
+        commit_start = time.monotonic()
+        self.connection.commit()
+        end = time.monotonic()
+        self._uncommitted = 0
+        if self._written:
+            self._report(self._written)
+            self._written = []
+        if self._recorded:
+            self.recorder.record_many(self._recorded)
+            self._recorded = []
+        self.latencies.record(self.database_name, "commit", end - commit_start)
+        self.latencies.record(
+            self.database_name, "transaction", end - self._transaction_start
+        )
+
+    def close(self) -> None:
+        """Commit any open transaction, then close the connection if one is open."""
         if self._connection:
+            try:
+                self.commit()
+            except self.backend.error as e:
+                log.warning(
+                    "commit_failed", database=self.database_name, error=str(e)
+                )
             try:
                 self._connection.close()
             except Exception:
                 pass
         self._connection = None
+        self._uncommitted = 0
+
+    def reconnect(self) -> None:
+        """Force reconnection on next operation, discarding any open transaction."""
+        self._uncommitted = 0
+        self._pending_items = []
+        self._written = []
+        self._recorded = []
+        self.close()
+
+    def written(self, table: str, operation: str, rows: list[tuple]) -> None:
+        """Report writes to one table as (key, LoadgenSeq, values) rows.
+
+        values are the columns the write set, as in loadgen.journal.HASHED_COLUMNS.
+        Autocommitted writes are reported at once, others on commit().
+        """
+        if self.lag is None and self.journal is None:
+            return
+        if self.ops_per_commit:
+            self._written.append((table, operation, rows))
+        else:
+            self._report([(table, operation, rows)])
+
+    def _report(self, writes: list[tuple[str, str, list[tuple]]]) -> None:
+        """Pass committed writes to the journal and the lag monitor."""
+        committed_at = time.time()
+        if self.journal:
+            for table, operation, rows in writes:
+                for key, seq, values in rows:
+                    self.journal.append(table, operation, key, seq, values)
+        if self.lag:
+            # Deletes carry no stamp, so their events are matched by key
+            self.lag.expect(
+                self.database_name,
+                [
+                    (table, key) if operation == "delete" else seq
+                    for table, operation, rows in writes
+                    for key, seq, _ in rows
+                ],
+                committed_at,
+            )
+
+    def add_items(self, order_id: int, status: str, items: list[tuple]) -> None:
+        """Queue (ProductName, Quantity, UnitPrice, Payload) items until flush_items()."""
+        self._pending_items.append((order_id, status, items))
+
+    def flush_items(self, cursor: Cursor) -> dict[int, list[int]]:
+        """Insert every queued item in one call.
+
+        Returns each order's new OrderItemIds in the order its items were
+        queued, 0 where an id wasn't read back. Item ids are only read back
+        when the key selector tracks them, writes are journaled or recorded,
+        or the generator is replaying.
+        """
+        pending, self._pending_items = self._pending_items, []
+        rows = [
+            (order_id, *item, *write_stamp())
+            for order_id, _, items in pending
+            for item in items
+        ]
+        if not rows:
+            return {}
+        keys = self.backend.insert_order_items(
+            cursor,
+            rows,
+            return_keys=self.keys.wants_item_ids
+            or self.journal is not None
+            or self.recorder is not None
+            or self._replaying,
+        )
+        item_by_seq = {seq: item_id for item_id, _, seq in keys}
+        self.written(
+            "OrderItems",
+            "insert",
+            [(item_by_seq.get(row[-2], 0), row[-2], row[:-2]) for row in rows],
+        )
+        item_ids: dict[int, list[int]] = {}
+        for item_id, order_id, _ in keys:
+            item_ids.setdefault(order_id, []).append(item_id)
+        for order_id, status, _ in pending:
+            self.keys.items_added(order_id, status, item_ids.get(order_id, []))
+        queued: dict[int, list[int]] = {}
+        for row in rows:
+            queued.setdefault(row[0], []).append(item_by_seq.get(row[-2], 0))
+        return queued
+
+    def payload_size(self) -> int | None:
+        """Draw the payload size of one row, or None when payloads are disabled."""
+        if self.payload_bytes is None:
+            return None
+        return self.payload_bytes.sample(self.random.data)
+
+    def payload(self, size: int | None) -> str | None:
+        """Return a payload of size characters, or None for no payload."""
+        if size is None:
+            return None
+        return self.data.payload(size, self.random.data)
 
     def get_random_delay(self) -> float:
         """Return a random delay between min and max."""
-        return random.uniform(self.min_delay, self.max_delay)
-
-    def execute_random_operation(self) -> None:
-        """Execute a random CRUD operation with weighted distribution."""
-        # Weighted operations: more inserts/updates than deletes
-        operations = [
-            (self.insert_customer_with_order, 40),  # 40%
-            (self.update_order_status, 30),  # 30%
-            (self.insert_order_for_existing, 15),  # 15%
-            (self.update_customer, 10),  # 10%
-            (self.delete_order_item, 5),  # 5%
-        ]
+        return self.random.delays.uniform(self.min_delay, self.max_delay)
+
+    def execute_random_operation(self, intended_start: float | None = None) -> None:
+        """Execute an operation drawn from the workload's weighted mix.
+
+        Latency is measured from intended_start (a time.monotonic() value) when
+        the caller is pacing operations, so queueing delay is included rather
+        than hidden by coordinated omission.
+        """
+        name = self.mix.choose(self.random.operations)
+        self._execute(name, getattr(self, name), intended_start)
+
+    def replay_operation(
+        self, operation: str, arguments: dict, intended_start: float | None = None
+    ) -> dict | None:
+        """Apply recorded arguments, timed like execute_random_operation.
+
+        Returns the keys the operation created, or None if it failed or had
+        nothing to do - say the order's status had already moved on.
+        """
+        self._replaying = True
+        return self._execute(
+            operation, lambda: self.perform((operation, arguments)), intended_start
+        )
 
-        total_weight = sum(w for _, w in operations)
-        choice = random.randint(1, total_weight)
-
-        cumulative = 0
-        for operation, weight in operations:
-            cumulative += weight
-            if choice <= cumulative:
-                with tracer.start_as_current_span(
-                    operation.__name__,
-                    attributes={
-                        "db.name": self.database_name,
-                        "operation.name": operation.__name__,
-                    },
-                ):
-                    try:
-                        operation()
-                    except pyodbc.Error as e:
-                        log.warning(
-                            "operation_failed",
-                            database=self.database_name,
-                            operation=operation.__name__,
-                            error=str(e),
-                        )
-                        self.reconnect()
-                break
+    def _execute(
+        self, name: str, run: Callable[[], dict | None], intended_start: float | None
+    ) -> dict | None:
+        """Run one operation in a span, recording latency and committing when due."""
+        start = intended_start if intended_start is not None else time.monotonic()
+        self._intended_start = start
+        with tracer.start_as_current_span(
+            name,
+            attributes={
+                "db.name": self.database_name,
+                "operation.name": name,
+            },
+        ):
+            try:
+                if self.ops_per_commit and not self._uncommitted:
+                    self._transaction_start = time.monotonic()
+                result = run()
+                self.latencies.record(
+                    self.database_name, name, time.monotonic() - start
+                )
+                if self.ops_per_commit:
+                    self._uncommitted += 1
+                    if self._uncommitted >= self.ops_per_commit:
+                        self.commit()
+                return result
+            except self.backend.error as e:
+                self.latencies.record(
+                    self.database_name, name, time.monotonic() - start, "failed"
+                )
+                log.warning(
+                    "operation_failed",
+                    database=self.database_name,
+                    operation=name,
+                    error=str(e),
+                )
+                self.reconnect()
+            finally:
+                self._intended_start = None
+        return None
+
+    def perform(
+        self, planned: tuple[str, dict] | None, cursor: Cursor | None = None
+    ) -> dict | None:
+        """Apply a planned (operation, arguments) pair, recording it if applied.
+
+        Returns the keys the operation created, or None if there was no plan
+        or it had nothing to do.
+        """
+        if planned is None:
+            return None
+        operation, arguments = planned
+        keys = getattr(self, f"apply_{operation}")(
+            cursor or self.connection.cursor(), **arguments
+        )
+        if keys is not None and self.recorder:
+            started = self._intended_start
+            record = (
+                self.database_name,
+                time.monotonic() if started is None else started,
+                operation,
+                arguments,
+                keys,
+            )
+            if self.ops_per_commit:
+                self._recorded.append(record)
+            else:
+                self.recorder.record_many([record])
+        return keys
+
+    def _plan_items(self, count: int, max_quantity: int, max_price: float) -> list:
+        """Draw count items as [ProductName, Quantity, UnitPrice, payload size]."""
+        rng = self.random.data
+        return [
+            [
+                self.data.product_name(rng),
+                rng.randint(1, max_quantity),
+                round(rng.uniform(5.0, max_price), 2),
+                self.payload_size(),
+            ]
+            for _ in range(count)
+        ]
 
     def insert_customer_with_order(self) -> None:
         """Insert a new customer with an order and items."""
         cursor = self.connection.cursor()
+        self.perform(self.plan_insert_customer_with_order(cursor), cursor)
+
+    def plan_insert_customer_with_order(self, cursor: Cursor) -> tuple[str, dict]:
+        """Draw a new customer, their order and its items."""
+        rng = self.random.data
+        first_name, last_name, email = self.data.person(rng)
+        return "insert_customer_with_order", {
+            "customer": [first_name, last_name, email],
+            "total_amount": round(rng.uniform(10.0, 500.0), 2),
+            "status": rng.choice(["Pending", "Processing", "Shipped"]),
+            "payload": self.payload_size(),
+            # At least one order item
+            "items": self._plan_items(
+                max(self.items_per_order.sample(rng), 1), 5, 100.0
+            ),
+        }
 
-        # Insert customer
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        email = fake.email()
+    def apply_insert_customer_with_order(
+        self,
+        cursor: Cursor,
+        customer: list,
+        total_amount: float,
+        status: str,
+        payload: int | None,
+        items: list[list],
+    ) -> dict:
+        """Insert the customer, order and items. Returns their keys."""
+        customer = tuple(customer)
+        items = [
+            (product_name, quantity, unit_price, self.payload(payload_size))
+            for product_name, quantity, unit_price, payload_size in items
+        ]
+        order = (total_amount, status, self.payload(payload))
+        customer_stamp, order_stamp = write_stamp(), write_stamp()
+        if self.insert_mode == "batch":
+            # One round trip for the whole unit
+            stamped = [(*item, *write_stamp()) for item in items]
+            customer_id, order_id, item_keys = self.backend.insert_customer_order(
+                cursor, (*customer, *customer_stamp), (*order, *order_stamp), stamped
+            )
+        else:
+            # Insert customer
+            cursor.execute(self.backend.INSERT_CUSTOMER, (*customer, *customer_stamp))
+            customer_id = cursor.fetchone()[0]
 
-        cursor.execute(
-            """
-            INSERT INTO dbo.Customers (FirstName, LastName, Email)
-            OUTPUT INSERTED.CustomerId
-            VALUES (?, ?, ?)
-            """,
-            (first_name, last_name, email),
+            # Insert order
+            cursor.execute(
+                self.backend.INSERT_ORDER, (customer_id, *order, *order_stamp)
+            )
+            order_id = cursor.fetchone()[0]
+        self.written(
+            "Customers", "insert", [(customer_id, customer_stamp[0], customer)]
         )
-        customer_id = cursor.fetchone()[0]
-
-        # Insert order
-        total_amount = round(random.uniform(10.0, 500.0), 2)
-        status = random.choice(["Pending", "Processing", "Shipped"])
-
-        cursor.execute(
-            """
-            INSERT INTO dbo.Orders (CustomerId, TotalAmount, Status)
-            OUTPUT INSERTED.OrderId
-            VALUES (?, ?, ?)
-            """,
-            (customer_id, total_amount, status),
+        self.written(
+            "Orders", "insert", [(order_id, order_stamp[0], (customer_id, *order))]
         )
-        order_id = cursor.fetchone()[0]
-
-        # Insert 1-3 order items
-        num_items = random.randint(1, 3)
-        for _ in range(num_items):
-            product = fake.word().capitalize() + " " + fake.word().capitalize()
-            quantity = random.randint(1, 5)
-            unit_price = round(random.uniform(5.0, 100.0), 2)
 
-            cursor.execute(
-                """
-                INSERT INTO dbo.OrderItems (OrderId, ProductName, Quantity, UnitPrice)
-                VALUES (?, ?, ?, ?)
-                """,
-                (order_id, product, quantity, unit_price),
+        self.keys.customer_added(customer_id)
+        self.keys.order_added(order_id, status)
+        if self.insert_mode == "batch":
+            item_by_seq = {seq: item_id for item_id, seq in item_keys}
+            item_ids = [item_by_seq.get(item[-2], 0) for item in stamped]
+            self.written(
+                "OrderItems",
+                "insert",
+                [
+                    (item_id, item[-2], (order_id, *item[:-2]))
+                    for item_id, item in zip(item_ids, stamped)
+                ],
             )
+            self.keys.items_added(order_id, status, list(item_by_seq.values()))
+        else:
+            # Insert order items as one parameter array
+            self.add_items(order_id, status, items)
+            item_ids = self.flush_items(cursor).get(order_id, [])
 
         log.info(
             "inserted_customer_with_order",
             database=self.database_name,
             customer_id=customer_id,
             order_id=order_id,
-            items=num_items,
+            items=len(items),
         )
+        return {
+            "customer_id": customer_id,
+            "order_id": order_id,
+            "item_ids": item_ids,
+        }
 
     def insert_order_for_existing(self) -> None:
         """Insert a new order for an existing customer."""
         cursor = self.connection.cursor()
+        self.perform(self.plan_insert_order_for_existing(cursor), cursor)
 
+    def plan_insert_order_for_existing(self, cursor: Cursor) -> tuple[str, dict]:
+        """Pick an existing customer and draw an order with items for them."""
         # Get a random existing customer
-        cursor.execute("SELECT TOP 1 CustomerId FROM dbo.Customers ORDER BY NEWID()")
-        row = cursor.fetchone()
-        if not row:
+        customer_id = self.keys.pick_customer(cursor, self.random.keys)
+        if customer_id is None:
             # No customers yet, create one instead
-            return self.insert_customer_with_order()
-
-        customer_id = row[0]
+            return self.plan_insert_customer_with_order(cursor)
+
+        rng = self.random.data
+        return "insert_order_for_existing", {
+            "customer_id": customer_id,
+            "total_amount": round(rng.uniform(10.0, 500.0), 2),
+            "payload": self.payload_size(),
+            "items": self._plan_items(
+                max(self.items_per_existing_order.sample(rng), 1), 3, 50.0
+            ),
+        }
 
-        # Insert order
-        total_amount = round(random.uniform(10.0, 500.0), 2)
+    def apply_insert_order_for_existing(
+        self,
+        cursor: Cursor,
+        customer_id: int,
+        total_amount: float,
+        payload: int | None,
+        items: list[list],
+    ) -> dict:
+        """Insert a pending order and its items. Returns their keys."""
         status = "Pending"
-
-        cursor.execute(
-            """
-            INSERT INTO dbo.Orders (CustomerId, TotalAmount, Status)
-            OUTPUT INSERTED.OrderId
-            VALUES (?, ?, ?)
-            """,
-            (customer_id, total_amount, status),
-        )
+        order = (customer_id, total_amount, status, self.payload(payload))
+        seq, stamp = write_stamp()
+        cursor.execute(self.backend.INSERT_ORDER, (*order, seq, stamp))
         order_id = cursor.fetchone()[0]
-
-        # Insert 1-2 order items
-        num_items = random.randint(1, 2)
-        for _ in range(num_items):
-            product = fake.word().capitalize() + " " + fake.word().capitalize()
-            quantity = random.randint(1, 3)
-            unit_price = round(random.uniform(5.0, 50.0), 2)
-
-            cursor.execute(
-                """
-                INSERT INTO dbo.OrderItems (OrderId, ProductName, Quantity, UnitPrice)
-                VALUES (?, ?, ?, ?)
-                """,
-                (order_id, product, quantity, unit_price),
-            )
+        self.written("Orders", "insert", [(order_id, seq, order)])
+        self.keys.order_added(order_id, status)
+
+        # Insert order items in one call
+        self.add_items(
+            order_id,
+            status,
+            [
+                (product_name, quantity, unit_price, self.payload(payload_size))
+                for product_name, quantity, unit_price, payload_size in items
+            ],
+        )
+        item_ids = self.flush_items(cursor).get(order_id, [])
 
         log.info(
             "inserted_order_for_existing",
@@ -190,23 +513,18 @@ class LoadGenerator:
             customer_id=customer_id,
             order_id=order_id,
         )
+        return {"order_id": order_id, "item_ids": item_ids}
 
     def update_order_status(self) -> None:
         """Update status of a random order."""
         cursor = self.connection.cursor()
+        self.perform(self.plan_update_order_status(cursor), cursor)
 
-        # Get a random order that isn't completed
-        cursor.execute(
-            """
-            SELECT TOP 1 OrderId, Status 
-            FROM dbo.Orders 
-            WHERE Status != 'Completed'
-            ORDER BY NEWID()
-            """
-        )
-        row = cursor.fetchone()
+    def plan_update_order_status(self, cursor: Cursor) -> tuple[str, dict] | None:
+        """Pick an order that isn't completed and its next status."""
+        row = self.keys.pick_open_order(cursor, self.random.keys)
         if not row:
-            return
+            return None
 
         order_id, current_status = row
 
@@ -216,69 +534,91 @@ class LoadGenerator:
             "Processing": "Shipped",
             "Shipped": "Completed",
         }
-        new_status = status_progression.get(current_status, "Completed")
+        return "update_order_status", {
+            "order_id": order_id,
+            "status": current_status,
+            "new_status": status_progression.get(current_status, "Completed"),
+        }
 
+    def apply_update_order_status(
+        self, cursor: Cursor, order_id: int, status: str, new_status: str
+    ) -> dict | None:
+        """Move the order from status to new_status. None if it had moved on."""
+        # Only progress from the status we saw, in case another worker got there first
+        seq, stamp = write_stamp()
         cursor.execute(
-            "UPDATE dbo.Orders SET Status = ? WHERE OrderId = ?",
-            (new_status, order_id),
+            self.backend.UPDATE_ORDER_STATUS,
+            (new_status, seq, stamp, order_id, status),
         )
+        if cursor.rowcount == 0:
+            return None
+        self.written("Orders", "update", [(order_id, seq, (new_status,))])
+        self.keys.order_updated(order_id, new_status)
 
         log.info(
             "updated_order_status",
             database=self.database_name,
             order_id=order_id,
-            old_status=current_status,
+            old_status=status,
             new_status=new_status,
         )
+        return {}
 
     def update_customer(self) -> None:
         """Update a random customer's email."""
         cursor = self.connection.cursor()
+        self.perform(self.plan_update_customer(cursor), cursor)
+
+    def plan_update_customer(self, cursor: Cursor) -> tuple[str, dict] | None:
+        """Pick a customer and draw a new email for them."""
+        customer_id = self.keys.pick_customer(cursor, self.random.keys)
+        if customer_id is None:
+            return None
+        return "update_customer", {
+            "customer_id": customer_id,
+            "email": self.data.email(rng=self.random.data),
+        }
 
-        cursor.execute("SELECT TOP 1 CustomerId FROM dbo.Customers ORDER BY NEWID()")
-        row = cursor.fetchone()
-        if not row:
-            return
-
-        customer_id = row[0]
-        new_email = fake.email()
-
+    def apply_update_customer(
+        self, cursor: Cursor, customer_id: int, email: str
+    ) -> dict:
+        """Set the customer's email."""
+        seq, stamp = write_stamp()
         cursor.execute(
-            """
-            UPDATE dbo.Customers 
-            SET Email = ?, ModifiedAt = GETUTCDATE() 
-            WHERE CustomerId = ?
-            """,
-            (new_email, customer_id),
+            self.backend.UPDATE_CUSTOMER_EMAIL, (email, seq, stamp, customer_id)
         )
+        self.written("Customers", "update", [(customer_id, seq, (email,))])
 
         log.info(
             "updated_customer",
             database=self.database_name,
             customer_id=customer_id,
         )
+        return {}
 
     def delete_order_item(self) -> None:
         """Delete a random order item (simulate cancellation)."""
         cursor = self.connection.cursor()
+        self.perform(self.plan_delete_order_item(cursor), cursor)
 
-        # Only delete items from orders that aren't shipped/completed
-        cursor.execute(
-            """
-            SELECT TOP 1 oi.OrderItemId, oi.OrderId
-            FROM dbo.OrderItems oi
-            JOIN dbo.Orders o ON oi.OrderId = o.OrderId
-            WHERE o.Status IN ('Pending', 'Processing')
-            ORDER BY NEWID()
-            """
-        )
-        row = cursor.fetchone()
+    def plan_delete_order_item(self, cursor: Cursor) -> tuple[str, dict] | None:
+        """Pick an item of an order that isn't shipped or completed."""
+        row = self.keys.pick_deletable_item(cursor, self.random.keys)
         if not row:
-            return
-
+            return None
         item_id, order_id = row
-
-        cursor.execute("DELETE FROM dbo.OrderItems WHERE OrderItemId = ?", (item_id,))
+        return "delete_order_item", {"item_id": item_id, "order_id": order_id}
+
+    def apply_delete_order_item(
+        self, cursor: Cursor, item_id: int, order_id: int
+    ) -> dict | None:
+        """Delete the item. None if its order has since shipped or it is gone."""
+        # Re-check the order status - a picked key may be stale
+        cursor.execute(self.backend.DELETE_ORDER_ITEM, (item_id, order_id))
+        if cursor.rowcount == 0:
+            return None
+        # Deletes get a LoadgenSeq too, only to order them in the journal
+        self.written("OrderItems", "delete", [(item_id, next(_sequence), ())])
 
         log.info(
             "deleted_order_item",
@@ -286,3 +626,4 @@ class LoadGenerator:
             order_item_id=item_id,
             order_id=order_id,
         )
+        return {}
@@ -0,0 +1,357 @@
+"""Operation journal - an append-only binary log of every committed write.
+
+vw_TableRowCounts only compares row totals, so an update that never reached
+the CES sink goes unnoticed once a later update overwrites the row. The
+journal records each write the generator commits - table, key, operation, a
+hash of the values written and its LoadgenSeq - so reconcile_journal() can
+replay it against a captured event stream and report divergence per key.
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+import structlog
+
+from loadgen.lag import OPERATIONS, PRIMARY_KEYS, parse_change_event
+
+log = structlog.get_logger()
+
+# File header: magic, then the database name as length-prefixed UTF-8
+MAGIC = b"LGJ1"
+HEADER = struct.Struct("<4sH")
+
+# One record: LoadgenSeq, primary key, table, operation, values hash (26 bytes)
+RECORD = struct.Struct("<QqBB8s")
+
+TABLES = ("Customers", "Orders", "OrderItems")
+JOURNAL_OPERATIONS = ("insert", "update", "delete")
+
+# The columns each write sets, in the order the generator passes their values.
+# A change event's row image is hashed over the same columns.
+HASHED_COLUMNS = {
+    ("Customers", "insert"): ("FirstName", "LastName", "Email"),
+    ("Customers", "update"): ("Email",),
+    ("Orders", "insert"): ("CustomerId", "TotalAmount", "Status", "Payload"),
+    ("Orders", "update"): ("Status",),
+    ("OrderItems", "insert"): (
+        "OrderId",
+        "ProductName",
+        "Quantity",
+        "UnitPrice",
+        "Payload",
+    ),
+}
+
+# A writer's buffer goes to disk once it holds this much, and at least this often
+FLUSH_BYTES = 64 * 1024
+FLUSH_SECONDS = 1.0
+
+READ_CHUNK_RECORDS = 32_768
+
+DIVERGENCE_KINDS = ("missing", "mismatched", "duplicates", "unexpected", "reordered")
+
+
+def values_hash(values: Iterable) -> bytes:
+    """8-byte BLAKE2b of column values.
+
+    Numbers are compared by value, so the floats the generator sends hash
+    the same as the JSON numbers (integral or not) of a change event.
+    """
+    text = "\x1f".join(
+        "\x00"
+        if value is None
+        else repr(float(value))
+        if isinstance(value, int | float)
+        else str(value)
+        for value in values
+    )
+    return hashlib.blake2b(text.encode(), digest_size=8).digest()
+
+
+class JournalRecord(NamedTuple):
+    seq: int
+    key: int
+    table: str
+    operation: str
+    digest: bytes
+
+
+class JournalWriter:
+    """Appends records for one generator to its own file, in batched writes.
+
+    Records are packed into an in-memory buffer and written with a single
+    unbuffered write once it holds FLUSH_BYTES, or when OperationJournal's
+    flusher calls flush() every FLUSH_SECONDS, so an append costs a hash, a
+    struct.pack and an uncontended lock. Up to a second of writes is lost if
+    the process is killed outright.
+    """
+
+    def __init__(self, path: str, database: str):
+        self.path = path
+        self._file = open(path, "wb", buffering=0)
+        name = database.encode()
+        self._buffer = bytearray(HEADER.pack(MAGIC, len(name)) + name)
+        self._lock = threading.Lock()
+
+    def append(
+        self, table: str, operation: str, key: int, seq: int, values: Iterable
+    ) -> None:
+        """Record one committed write."""
+        record = RECORD.pack(
+            seq,
+            key,
+            TABLES.index(table),
+            JOURNAL_OPERATIONS.index(operation),
+            values_hash(values),
+        )
+        with self._lock:
+            self._buffer += record
+            if len(self._buffer) >= FLUSH_BYTES:
+                self._write()
+
+    def flush(self) -> None:
+        """Write out the buffer."""
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        """Write out the buffer; the caller holds the lock."""
+        if self._buffer and not self._file.closed:
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        with self._lock:
+            if not self._file.closed:
+                self._write()
+                self._file.close()
+
+
+class OperationJournal:
+    """Hands out one JournalWriter per generator, as files in a directory.
+
+    Files are named <database>-<run start>-<n>.journal; a writer is only
+    appended to by its generator. A flusher thread writes out every buffer
+    each FLUSH_SECONDS, so the tail of an idle generator still reaches disk.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._run = time.strftime("%Y%m%dT%H%M%S")
+        self._numbers = itertools.count()
+        self._writers: list[JournalWriter] = []
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._run_flusher, name="loadgen-journal-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def writer(self, database: str) -> JournalWriter:
+        """Open a new journal file for one generator of database."""
+        path = os.path.join(
+            self.directory, f"{database}-{self._run}-{next(self._numbers)}.journal"
+        )
+        writer = JournalWriter(path, database)
+        self._writers.append(writer)
+        return writer
+
+    def _run_flusher(self) -> None:
+        """Flusher loop."""
+        while not self._stop.wait(FLUSH_SECONDS):
+            for writer in list(self._writers):
+                writer.flush()
+
+    def close(self) -> None:
+        """Stop the flusher, then flush and close every writer."""
+        self._stop.set()
+        self._flusher.join()
+        for writer in self._writers:
+            writer.close()
+        log.info(
+            "journal_closed", directory=self.directory, files=len(self._writers)
+        )
+
+
+def read_journal(path: str) -> tuple[str, Iterator[JournalRecord]]:
+    """Return the database of a journal file and an iterator over its records."""
+    with open(path, "rb") as f:
+        magic, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a loadgen journal")
+        database = f.read(length).decode()
+        offset = HEADER.size + length
+
+    def records() -> Iterator[JournalRecord]:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while chunk := f.read(RECORD.size * READ_CHUNK_RECORDS):
+                whole = len(chunk) - len(chunk) % RECORD.size
+                if whole < len(chunk):
+                    # The tail of a journal cut short by a crash
+                    log.warning("journal_truncated", path=path)
+                for seq, key, table, operation, digest in RECORD.iter_unpack(
+                    chunk[:whole]
+                ):
+                    yield JournalRecord(
+                        seq, key, TABLES[table], JOURNAL_OPERATIONS[operation], digest
+                    )
+
+    return database, records()
+
+
+class _Event(NamedTuple):
+    position: int
+    table: str
+    operation: str
+    key: int | None
+    digest: bytes
+
+
+class _Reconciliation:
+    """Per-database state of reconcile_journal()."""
+
+    def __init__(self, database: str):
+        self.database = database
+        # LoadgenSeq -> event, for inserts and updates
+        self.by_seq: dict[int, _Event] = {}
+        # (table, key) -> delete events, in arrival order
+        self.deletes: dict[tuple[str, int], list[_Event]] = {}
+        # (table, key) -> position of the last matched event
+        self.last_position: dict[tuple[str, int], int] = {}
+        self.counts = dict.fromkeys(
+            ("records", "events", "matched", *DIVERGENCE_KINDS, "unstamped"), 0
+        )
+
+    def diverged(
+        self, kind: str, table: str, key: int | None, operation: str, seq: int | None
+    ) -> None:
+        """Count and log one divergence."""
+        self.counts[kind] += 1
+        log.warning(
+            "journal_divergence",
+            database=self.database,
+            kind=kind,
+            table=table,
+            key=key,
+            operation=operation,
+            seq=seq,
+        )
+
+    def add_event(self, position: int, event: dict) -> None:
+        """Index one captured event."""
+        self.counts["events"] += 1
+        _, table, code, old, current = parse_change_event(event)
+        operation = OPERATIONS.get(code, code.lower())
+        row = (old if code == "DEL" else current) or {}
+        key = row.get(PRIMARY_KEYS.get(table))
+        if code == "DEL":
+            self.deletes.setdefault((table, key), []).append(
+                _Event(position, table, operation, key, values_hash(()))
+            )
+            return
+        seq = row.get("LoadgenSeq")
+        if seq is None:
+            self.counts["unstamped"] += 1
+            return
+        columns = HASHED_COLUMNS.get((table, operation), ())
+        digest = values_hash(row.get(column) for column in columns)
+        if seq in self.by_seq:
+            self.diverged("duplicates", table, key, operation, seq)
+            return
+        self.by_seq[seq] = _Event(position, table, operation, key, digest)
+
+    def check(self, record: JournalRecord) -> None:
+        """Match one journal record to its event."""
+        self.counts["records"] += 1
+        if record.operation == "delete":
+            events = self.deletes.get((record.table, record.key))
+            event = events.pop(0) if events else None
+        else:
+            event = self.by_seq.pop(record.seq, None)
+        if event is None:
+            self.diverged(
+                "missing", record.table, record.key, record.operation, record.seq
+            )
+            return
+        if (event.table, event.operation, event.key, event.digest) != (
+            record.table,
+            record.operation,
+            record.key,
+            record.digest,
+        ):
+            self.diverged(
+                "mismatched", record.table, record.key, record.operation, record.seq
+            )
+            return
+        # Events for one key must arrive in the order the writes were made
+        row = (record.table, record.key)
+        if event.position < self.last_position.get(row, -1):
+            self.diverged(
+                "reordered", record.table, record.key, record.operation, record.seq
+            )
+        else:
+            self.last_position[row] = event.position
+        self.counts["matched"] += 1
+
+    def finish(self) -> bool:
+        """Report events no write accounts for. Returns True if nothing diverged."""
+        for seq, event in self.by_seq.items():
+            self.diverged("unexpected", event.table, event.key, event.operation, seq)
+        for events in self.deletes.values():
+            for event in events:
+                self.diverged(
+                    "unexpected", event.table, event.key, event.operation, None
+                )
+        log.info("journal_reconciled", database=self.database, **self.counts)
+        return not any(self.counts[kind] for kind in DIVERGENCE_KINDS)
+
+
+def reconcile_journal(directory: str, events_path: str) -> bool:
+    """Compare every journal in directory with captured change events.
+
+    events_path holds CES events as JSON lines, in arrival order - e.g. the
+    file a LAG_SOURCE or CES_STANDIN_SINK wrote. Events are indexed in
+    memory, then the journals of each database are streamed through in
+    LoadgenSeq order. Returns True when every write has exactly one matching
+    event, in order, and every event has a write.
+    """
+    journals: dict[str, list[Iterator[JournalRecord]]] = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".journal"):
+            database, records = read_journal(os.path.join(directory, name))
+            journals.setdefault(database, []).append(records)
+
+    states = {database: _Reconciliation(database) for database in journals}
+    with open(events_path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+                database = parse_change_event(event)[0]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                log.warning("ces_event_invalid", position=position, error=str(e))
+                continue
+            state = states.get(database)
+            if state is None:
+                state = states[database] = _Reconciliation(database)
+            state.add_event(position, event)
+
+    consistent = True
+    for database, state in sorted(states.items()):
+        for record in heapq.merge(
+            *journals.get(database, []), key=lambda record: record.seq
+        ):
+            state.check(record)
+        consistent = state.finish() and consistent
+    return consistent
@@ -0,0 +1,176 @@
+"""Key selection - chooses existing rows for update and delete operations."""
+
+import random
+import time
+
+from loadgen.backends import Backend, Connection, Cursor
+from loadgen.rng import UNSEEDED
+from loadgen.skew import KeySkew
+
+# Identity ranges are refreshed at most this often (seconds)
+RANGE_TTL_SECONDS = 5.0
+
+
+class KeySelector:
+    """Chooses target rows for update/delete operations.
+
+    LoadGenerator reports every key it creates or changes through the
+    *_added/order_updated hooks, and asks for targets through the pick_*
+    methods. pick_* receive a cursor so implementations may query the
+    database, but are not required to, and the worker's RNG stream to draw
+    from.
+
+    Set wants_item_ids when items_added needs real OrderItemIds; otherwise
+    the generator may skip reading them back.
+    """
+
+    wants_item_ids = False
+
+    def prepare(self, connection: Connection) -> None:
+        """Called once per new connection, before any other method."""
+
+    def customer_added(self, customer_id: int) -> None:
+        """Record a customer inserted by this generator."""
+
+    def order_added(self, order_id: int, status: str) -> None:
+        """Record an order inserted by this generator."""
+
+    def items_added(self, order_id: int, status: str, item_ids: list[int]) -> None:
+        """Record order items inserted by this generator."""
+
+    def order_updated(self, order_id: int, status: str) -> None:
+        """Record an order whose status was changed by this generator."""
+
+    def pick_customer(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> int | None:
+        """Return a CustomerId, or None if there are no customers."""
+        raise NotImplementedError
+
+    def pick_open_order(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, str] | None:
+        """Return (OrderId, Status) of an order that isn't completed."""
+        raise NotImplementedError
+
+    def pick_deletable_item(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, int] | None:
+        """Return (OrderItemId, OrderId) of an item on a pending/processing order."""
+        raise NotImplementedError
+
+
+class KeySampler(KeySelector):
+    """Picks random rows by probing the identity range instead of sorting.
+
+    ORDER BY NEWID() scans and sorts the whole table on every pick. Instead we
+    cache MIN/MAX of each identity column (two seeks on the clustered key),
+    pick a random value in that range and seek to the first row at or after
+    it. Gaps left by deletes make the pick slightly non-uniform, which is fine
+    for load generation. With a skew the random value is drawn from it over
+    the range instead, so hot keys are the lowest (zipf) or highest (latest)
+    identities.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        range_ttl: float = RANGE_TTL_SECONDS,
+        skew: KeySkew | None = None,
+    ):
+        self.backend = backend
+        self.range_ttl = range_ttl
+        self.skew = skew or KeySkew()
+        self._ranges: dict[str, tuple[int, int, float]] = {}
+
+    def _observe(self, table: str, key: int) -> None:
+        """Extend a cached range with a key this generator just inserted."""
+        cached = self._ranges.get(table)
+        if cached and key > cached[1]:
+            self._ranges[table] = (cached[0], key, cached[2])
+
+    def customer_added(self, customer_id: int) -> None:
+        """Extend the cached customer range."""
+        self._observe("Customers", customer_id)
+
+    def order_added(self, order_id: int, status: str) -> None:
+        """Extend the cached open-order range."""
+        self._observe("Orders", order_id)
+
+    def _range(
+        self, cursor: Cursor, table: str, sql: str
+    ) -> tuple[int, int] | None:
+        """Return the cached (min, max) key range, refreshing it when stale."""
+        cached = self._ranges.get(table)
+        now = time.monotonic()
+        if cached is None or now - cached[2] > self.range_ttl:
+            cursor.execute(sql)
+            low, high = cursor.fetchone()
+            if low is None:
+                self._ranges.pop(table, None)
+                return None
+            cached = self._ranges[table] = (low, high, now)
+        return cached[0], cached[1]
+
+    def _probe(
+        self,
+        cursor: Cursor,
+        table: str,
+        range_sql: str,
+        sql: str,
+        rng: random.Random,
+    ) -> tuple | None:
+        """Seek to the first matching row at or after a chosen key, wrapping once."""
+        key_range = self._range(cursor, table, range_sql)
+        if key_range is None:
+            return None
+        low, high = key_range
+        cursor.execute(sql, (low + self.skew.index(high - low + 1, rng),))
+        row = cursor.fetchone()
+        if row is None:
+            # Landed past the last match - wrap around to the start of the range
+            cursor.execute(sql, (low,))
+            row = cursor.fetchone()
+        if row is None:
+            # Range is stale (e.g. rows deleted); refresh on next pick
+            self._ranges.pop(table, None)
+        return row
+
+    def pick_customer(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> int | None:
+        """Return a random CustomerId, or None if there are no customers."""
+        row = self._probe(
+            cursor,
+            "Customers",
+            self.backend.CUSTOMER_RANGE,
+            self.backend.CUSTOMER_PROBE,
+            rng,
+        )
+        return row[0] if row else None
+
+    def pick_open_order(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, str] | None:
+        """Return (OrderId, Status) of a random order that isn't completed."""
+        row = self._probe(
+            cursor,
+            "Orders",
+            self.backend.OPEN_ORDER_RANGE,
+            self.backend.OPEN_ORDER_PROBE,
+            rng,
+        )
+        return (row[0], row[1]) if row else None
+
+    def pick_deletable_item(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, int] | None:
+        """Return (OrderItemId, OrderId) of an item on a pending/processing order."""
+        row = self._probe(
+            cursor,
+            "Orders",
+            self.backend.OPEN_ORDER_RANGE,
+            self.backend.DELETABLE_ITEM_PROBE,
+            rng,
+        )
+        return (row[0], row[1]) if row else None
@@ -0,0 +1,368 @@
+"""CES lag - matches change events back to the writes that caused them."""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import UTC, datetime
+
+import structlog
+
+from loadgen.metrics import LatencyRecorder
+
+log = structlog.get_logger()
+
+ENDPOINT_KINDS = ("file", "udp")
+
+# CES operation codes, as the lag histograms name them
+OPERATIONS = {"INS": "insert", "UPD": "update", "DEL": "delete"}
+
+PRIMARY_KEYS = {
+    "Customers": "CustomerId",
+    "Orders": "OrderId",
+    "OrderItems": "OrderItemId",
+}
+
+# Writes with no event after this long are counted missing (seconds)
+MISSING_AFTER_SECONDS = 60.0
+
+# How long a read waits for a datagram, and sleeps at the end of a tailed file
+POLL_SECONDS = 0.5
+FILE_POLL_SECONDS = 0.01
+MAX_DATAGRAM_BYTES = 65_507
+
+
+def parse_endpoint(spec: str) -> tuple[str, str]:
+    """Split "file:/path/events.jsonl" or "udp:host:port" into (kind, target)."""
+    kind, _, target = spec.partition(":")
+    if kind not in ENDPOINT_KINDS or not target:
+        raise ValueError(
+            f"Invalid event endpoint {spec!r}, expected file:PATH or udp:HOST:PORT"
+        )
+    return kind, target
+
+
+def _address(target: str) -> tuple[str, int]:
+    """Parse "host:port"."""
+    host, _, port = target.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def change_event(
+    database: str, table: str, operation: str, old: str | None, current: str | None
+) -> dict:
+    """Build a CloudEvent shaped like SQL CES output; rows are JSON text."""
+    return {
+        "specversion": "1.0",
+        "type": "com.microsoft.SQL.CES.DML.V1",
+        "source": f"/{database}",
+        "id": str(uuid.uuid4()),
+        "time": datetime.now(UTC).isoformat(),
+        "operation": operation,
+        "datacontenttype": "application/json",
+        "data": json.dumps(
+            {
+                "eventsource": {"db": database, "schema": "dbo", "tbl": table},
+                "eventrow": {"old": old or "", "current": current or ""},
+            }
+        ),
+    }
+
+
+def _row(value: str | dict | None) -> dict | None:
+    """A row image, which CES sends as JSON text inside the JSON payload."""
+    if not value:
+        return None
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def parse_change_event(event: dict) -> tuple[str, str, str, dict | None, dict | None]:
+    """Return (database, table, operation, old row, current row) of a CloudEvent."""
+    data = event["data"]
+    if isinstance(data, str):
+        data = json.loads(data)
+    source, row = data["eventsource"], data["eventrow"]
+    operation = event.get("operation") or event.get("op", "")
+    return (
+        source["db"],
+        source["tbl"],
+        operation.upper(),
+        _row(row.get("old")),
+        _row(row.get("current")),
+    )
+
+
+class EventSink:
+    """Publishes change events as JSON lines to a file, or as UDP datagrams."""
+
+    def __init__(self, spec: str):
+        self.kind, target = parse_endpoint(spec)
+        self._lock = threading.Lock()
+        if self.kind == "file":
+            directory = os.path.dirname(target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(target, "a", encoding="utf-8")
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._address = _address(target)
+
+    def send(self, events: list[dict]) -> None:
+        """Publish events, in order."""
+        lines = [json.dumps(event) for event in events]
+        with self._lock:
+            if self.kind == "file":
+                self._file.write("".join(line + "\n" for line in lines))
+                self._file.flush()
+                return
+            for line in lines:
+                try:
+                    self._socket.sendto(line.encode(), self._address)
+                except OSError as e:
+                    # e.g. an event with a large payload exceeds a datagram
+                    log.warning("ces_sink_failed", error=str(e), bytes=len(line))
+
+    def close(self) -> None:
+        """Close the file or socket."""
+        with self._lock:
+            if self.kind == "file":
+                self._file.close()
+            else:
+                self._socket.close()
+
+
+class EventSource:
+    """Reads change events from a tailed JSON-lines file or a UDP socket.
+
+    A file is followed from its end at startup, like tail -f, so events from
+    earlier runs are not replayed.
+    """
+
+    def __init__(self, spec: str):
+        self.kind, target = parse_endpoint(spec)
+        if self.kind == "file":
+            # Create the file if no event has been written yet
+            self._file = open(target, "a+", encoding="utf-8")
+            self._file.seek(0, os.SEEK_END)
+            self._partial = ""
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.bind(_address(target))
+            self._socket.settimeout(POLL_SECONDS)
+
+    def read(self) -> list[str]:
+        """Return the events available now, waiting briefly if there are none."""
+        if self.kind == "udp":
+            try:
+                data, _ = self._socket.recvfrom(MAX_DATAGRAM_BYTES)
+            except TimeoutError:
+                return []
+            return [data.decode()]
+        chunk = self._file.read()
+        if not chunk:
+            time.sleep(FILE_POLL_SECONDS)
+            return []
+        # Keep a line still being written for the next read
+        *lines, self._partial = (self._partial + chunk).split("\n")
+        return [line for line in lines if line]
+
+    def close(self) -> None:
+        """Close the file or socket."""
+        if self.kind == "file":
+            self._file.close()
+        else:
+            self._socket.close()
+
+
+class LagMonitor:
+    """Matches CES events to committed writes and reports lag in real time.
+
+    Every inserted and updated row carries a LoadgenSeq; LoadGenerator calls
+    expect() with the seqs (and, for deletes, the (table, key) pairs) of
+    each write once it has committed. Lag is the time from that commit to
+    the event's arrival. An expected write with no event after missing_after
+    seconds counts as missing; an event matching an already-matched write
+    within that window is a duplicate; an event matching no write is
+    unexpected (e.g. written by another tool, or by seeding).
+
+    Lag is logged as ces_lag_interval/ces_lag_total histograms per database,
+    with the table and CES operation as the operation; the event counts as
+    ces_events_interval/ces_events_total.
+    """
+
+    COUNTERS = ("matched", "missing", "duplicates", "unexpected", "unstamped")
+
+    def __init__(
+        self,
+        source: EventSource,
+        interval: float = 60.0,
+        missing_after: float = MISSING_AFTER_SECONDS,
+    ):
+        self.source = source
+        self.interval = interval
+        self.missing_after = missing_after
+        self.latencies = LatencyRecorder()
+        self.totals = LatencyRecorder()
+        # key -> committed_at, in commit order
+        self._pending: dict[tuple, float] = {}
+        # Events that arrived before their write was reported: key -> (arrived, op)
+        self._early: dict[tuple, tuple[float, str]] = {}
+        # Matched keys, kept for duplicate detection: key -> matched_at
+        self._matched: dict[tuple, float] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+        self._total_counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def expect(self, database: str, keys: list, committed_at: float) -> None:
+        """Record committed writes: LoadgenSeq values, or (table, key) deletes."""
+        with self._lock:
+            for key in keys:
+                key = (database, key)
+                early = self._early.pop(key, None)
+                if early is None:
+                    self._pending[key] = committed_at
+                else:
+                    # The event beat the generator's own bookkeeping
+                    arrived, operation = early
+                    self._match(key, max(arrived - committed_at, 0.0), operation)
+
+    def start(self) -> None:
+        """Start consuming events on a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="loadgen-lag-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop consuming and log the run totals."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.source.close()
+        self.report()
+        self.totals.log_summary("ces_lag_total")
+        with self._lock:
+            pending = self._pending_by_database()
+        for database, counts in sorted(self._total_counts.items()):
+            log.info(
+                "ces_events_total",
+                database=database,
+                pending=pending.get(database, 0),
+                **counts,
+            )
+
+    def observe(self, event: dict, arrived: float) -> None:
+        """Match one received event."""
+        database, table, operation, old, current = parse_change_event(event)
+        if operation == "DEL":
+            key = (database, (table, (old or {}).get(PRIMARY_KEYS.get(table))))
+        else:
+            seq = (current or {}).get("LoadgenSeq")
+            if seq is None:
+                with self._lock:
+                    self._count(database, "unstamped")
+                return
+            key = (database, seq)
+        name = f"{table}.{OPERATIONS.get(operation, operation.lower())}"
+        with self._lock:
+            committed_at = self._pending.pop(key, None)
+            if committed_at is not None:
+                self._match(key, arrived - committed_at, name)
+            elif key in self._matched:
+                self._count(database, "duplicates")
+            else:
+                self._early[key] = (arrived, name)
+
+    def report(self) -> None:
+        """Expire old writes and events, then log lag and counts since last time."""
+        self._expire(time.time())
+        interval = LatencyRecorder()
+        interval.merge(self.latencies.drain())
+        interval.log_summary("ces_lag_interval")
+        self.totals.merge(interval.drain())
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            pending = self._pending_by_database()
+        for database, database_counts in sorted(counts.items()):
+            log.info(
+                "ces_events_interval",
+                database=database,
+                pending=pending.get(database, 0),
+                **database_counts,
+            )
+
+    def _match(self, key: tuple, lag: float, operation: str) -> None:
+        """Record a matched event; the caller holds the lock."""
+        self._matched[key] = time.time()
+        self.latencies.record(key[0], operation, lag)
+        self._count(key[0], "matched")
+
+    def _count(self, database: str, counter: str) -> None:
+        """Bump an interval and a total counter; the caller holds the lock."""
+        for counts in (self._counts, self._total_counts):
+            database_counts = counts.get(database)
+            if database_counts is None:
+                database_counts = counts[database] = dict.fromkeys(self.COUNTERS, 0)
+            database_counts[counter] += 1
+
+    def _pending_by_database(self) -> dict[str, int]:
+        """Writes still awaiting their event, per database."""
+        pending: dict[str, int] = {}
+        for database, _ in self._pending:
+            pending[database] = pending.get(database, 0) + 1
+        return pending
+
+    def _expire(self, now: float) -> None:
+        """Count writes past missing_after as missing and forget old events."""
+        cutoff = now - self.missing_after
+        with self._lock:
+            # All three dicts are in time order, so stop at the first young entry
+            while self._pending:
+                key, committed_at = next(iter(self._pending.items()))
+                if committed_at > cutoff:
+                    break
+                del self._pending[key]
+                self._count(key[0], "missing")
+            while self._early:
+                key, (arrived, _) = next(iter(self._early.items()))
+                if arrived > cutoff:
+                    break
+                del self._early[key]
+                self._count(key[0], "unexpected")
+            while self._matched:
+                key, matched_at = next(iter(self._matched.items()))
+                if matched_at > cutoff:
+                    break
+                del self._matched[key]
+
+    def _run(self) -> None:
+        """Consume events until stopped, reporting every interval."""
+        next_report = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            self._consume()
+            if self.interval > 0 and time.monotonic() >= next_report:
+                next_report += self.interval
+                self.report()
+        # Events for the last writes may still be on their way
+        while self._consume():
+            pass
+
+    def _consume(self) -> int:
+        """Read and match the events available now. Returns how many were read."""
+        try:
+            lines = self.source.read()
+        except OSError as e:
+            log.error("ces_source_failed", error=str(e))
+            time.sleep(POLL_SECONDS)
+            return 0
+        arrived = time.time()
+        for line in lines:
+            try:
+                self.observe(json.loads(line), arrived)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                log.warning("ces_event_invalid", error=str(e))
+        return len(lines)
@@ -1,17 +1,42 @@
 """Main entry point for the load generator."""
 
+import hashlib
 import logging
 import os
+import signal
 import sys
+import tempfile
 import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TextIO
 
 import structlog
 from yoyo import get_backend, read_migrations
+from yoyo.migrations import MigrationList
 
+from loadgen.async_engine import AsyncEngine
+from loadgen.backends import SqliteBackend, SqlServerBackend
+from loadgen.checksum import RangeReconciler, replay_events
+from loadgen.datapool import DataPool
+from loadgen.engine import WorkerEngine
 from loadgen.generator import LoadGenerator
+from loadgen.journal import OperationJournal, reconcile_journal
+from loadgen.keys import KeySampler
+from loadgen.lag import EventSink, EventSource, LagMonitor
+from loadgen.metrics import LatencyReporter
+from loadgen.recording import WorkloadRecorder
+from loadgen.registry import KeyRegistry
+from loadgen.replay import WorkloadReplayer
+from loadgen.rng import Streams, derive
+from loadgen.scheduler import ArrivalScheduler
+from loadgen.seed import Seeder, seed_databases
+from loadgen.workload import DEFAULT_MIX, load_workloads
 
 log = structlog.get_logger()
 
+COMMANDS = ("run", "seed", "replay", "reconcile-journal", "reconcile-checksums")
+
 
 def configure_azure_monitor() -> None:
     """Configure Azure Monitor OpenTelemetry if connection string is available."""
@@ -71,35 +96,139 @@ def get_yoyo_connection_string(database: str) -> str:
     return f"odbc:///?odbc_connect={quote_plus(odbc_conn)}"
 
 
-def run_migrations(databases: list[str], migrations_path: str) -> None:
-    """Run yoyo migrations against all databases."""
-    for db in databases:
+def migrate_database(db: str, migrations: MigrationList) -> int:
+    """Apply pending migrations to one database. Returns how many were applied."""
+    backend = get_backend(get_yoyo_connection_string(db))
+    with backend.lock():
+        pending = backend.to_apply(migrations)
+        backend.apply_migrations(pending)
+    return len(pending)
+
+
+def migrations_fingerprint(hashes: Iterable[str]) -> str:
+    """Order-independent digest of a set of migration hashes."""
+    return hashlib.sha256("\n".join(sorted(hashes)).encode()).hexdigest()[:16]
+
+
+def run_migrations(
+    databases: list[str],
+    migrations_path: str,
+    concurrency: int = 8,
+    backend: SqlServerBackend | None = None,
+) -> None:
+    """Run yoyo migrations against all databases, up to concurrency at a time.
+
+    Migrations are read and parsed once and shared by every database; each
+    database still takes its own yoyo lock, so concurrent containers stay safe.
+
+    With a backend, each database is first checked with a single query against
+    yoyo's bookkeeping table. When every local migration is already recorded
+    the database is skipped without connecting through yoyo or locking.
+    """
+    migrations = read_migrations(migrations_path)
+    # Parse up front - yoyo loads migration modules lazily and not thread-safely
+    for migration in migrations:
+        migration.load()
+    local_hashes = {migration.hash for migration in migrations}
+    fingerprint = migrations_fingerprint(local_hashes)
+    current: list[str] = []
+
+    def migrate(db: str) -> float:
+        start = time.monotonic()
+        if backend is not None:
+            applied_hashes = backend.applied_migrations(db)
+            if applied_hashes is not None and local_hashes <= applied_hashes:
+                duration = time.monotonic() - start
+                current.append(db)
+                log.info(
+                    "migrations_current",
+                    database=db,
+                    fingerprint=fingerprint,
+                    duration_ms=round(duration * 1000, 1),
+                )
+                return duration
         log.info("running_migrations", database=db)
-        try:
-            backend = get_backend(get_yoyo_connection_string(db))
-            migrations = read_migrations(migrations_path)
-
-            with backend.lock():
-                backend.apply_migrations(backend.to_apply(migrations))
-
-            log.info("migrations_complete", database=db)
-        except Exception as e:
-            log.error("migration_failed", database=db, error=str(e))
-            raise
-
-
-def main() -> int:
-    """Main entry point."""
-    # Configure standard logging first (OpenTelemetry hooks into this)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(message)s",
-        stream=sys.stdout,
+        applied = migrate_database(db, migrations)
+        duration = time.monotonic() - start
+        log.info(
+            "migrations_complete",
+            database=db,
+            applied=applied,
+            duration_ms=round(duration * 1000, 1),
+        )
+        return duration
+
+    start = time.monotonic()
+    timings: dict[str, float] = {}
+    failed: list[str] = []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(databases))),
+        thread_name_prefix="loadgen-migrate",
+    ) as executor:
+        futures = {executor.submit(migrate, db): db for db in databases}
+        for future in as_completed(futures):
+            db = futures[future]
+            try:
+                timings[db] = future.result()
+            except Exception as e:
+                log.error("migration_failed", database=db, error=str(e))
+                failed.append(db)
+
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+    log.info(
+        "migrations_report",
+        databases=len(databases),
+        current=len(current),
+        failed=len(failed),
+        concurrency=concurrency,
+        fingerprint=fingerprint,
+        total_ms=round((time.monotonic() - start) * 1000, 1),
+        slowest={db: round(duration * 1000, 1) for db, duration in slowest[:5]},
     )
-
-    # Configure Azure Monitor for Application Insights telemetry
-    configure_azure_monitor()
-
+    if failed:
+        raise RuntimeError(f"Migrations failed for: {', '.join(sorted(failed))}")
+
+
+def reconcile_checksums(
+    source: SqliteBackend | SqlServerBackend,
+    databases: list[str],
+    sink_spec: str | None,
+    fanout: int,
+    leaf_keys: int,
+) -> int:
+    """Compare each database with its sink export by range checksums.
+
+    sink_spec is sqlite:DIR, a directory of exported tenant files laid out
+    like SQLITE_DIR, or events:PATH, captured CES events replayed into a
+    scratch SQLite export. Returns the process exit code.
+    """
+    kind, _, target = (sink_spec or "").partition(":")
+    if kind not in ("sqlite", "events") or not target:
+        log.error(
+            "reconcile_not_configured",
+            error="RECONCILE_SINK must be sqlite:DIR or events:PATH",
+        )
+        return 2
+    with tempfile.TemporaryDirectory(prefix="loadgen-sink-") as scratch:
+        if kind == "sqlite":
+            sink = SqliteBackend(target)
+        else:
+            sink = SqliteBackend(scratch)
+            replay_events(target, sink)
+            # Tenants with no captured events still get (empty) tables
+            for db in databases:
+                sink.create_schema(db)
+        results = [
+            RangeReconciler(
+                source, sink, db, fanout=fanout, leaf_keys=leaf_keys
+            ).run()
+            for db in databases
+        ]
+    return 0 if all(results) else 1
+
+
+def configure_logging(stream: TextIO = sys.stdout) -> None:
+    """Route structlog through stdlib logging as JSON (console when a TTY)."""
     # Configure structlog to use Python's standard logging as backend
     # This allows Azure Monitor to capture all structured logs
     structlog.configure(
@@ -122,56 +251,312 @@ def main() -> int:
     # Add JSON formatting for structured logging
     formatter = structlog.stdlib.ProcessorFormatter(
         processor=structlog.dev.ConsoleRenderer()
-        if sys.stdout.isatty()
+        if stream.isatty()
         else structlog.processors.JSONRenderer(),
     )
-    handler = logging.StreamHandler(sys.stdout)
+    handler = logging.StreamHandler(stream)
     handler.setFormatter(formatter)
 
     root_logger = logging.getLogger()
     root_logger.handlers = [handler]
     root_logger.setLevel(logging.INFO)
 
+
+def main() -> int:
+    """Main entry point: `loadgen` runs the workload, `loadgen seed` bulk-loads,
+    `loadgen replay` replays a recorded run, `loadgen reconcile-journal` checks
+    the operation journal against CES events and `loadgen reconcile-checksums`
+    compares tables with a sink export.
+    """
+    # Configure standard logging first (OpenTelemetry hooks into this)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
+    # Configure Azure Monitor for Application Insights telemetry
+    configure_azure_monitor()
+
+    configure_logging()
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command not in COMMANDS:
+        log.error("unknown_command", command=command, expected=COMMANDS)
+        return 2
+
     # Configuration from environment
     databases = os.environ.get("DATABASES", "tenant_db_alpha,tenant_db_beta").split(",")
+    backend_name = os.environ.get("BACKEND", "sqlserver")
+    sqlite_dir = os.environ.get("SQLITE_DIR", "./data")
     migrations_path = os.environ.get("MIGRATIONS_PATH", "/app/migrations")
-    min_delay = float(os.environ.get("MIN_DELAY_SECONDS", "1"))
-    max_delay = float(os.environ.get("MAX_DELAY_SECONDS", "5"))
+    workers_per_database = int(os.environ.get("WORKERS_PER_DATABASE", "1"))
+    engine_mode = os.environ.get("ENGINE", "thread")
+    virtual_users = int(os.environ.get("VIRTUAL_USERS_PER_DATABASE", "100"))
+    max_in_flight = int(os.environ.get("MAX_IN_FLIGHT", "100"))
+    late_threshold = float(os.environ.get("LATE_THRESHOLD_SECONDS", "0.1"))
+    metrics_interval = float(os.environ.get("METRICS_INTERVAL_SECONDS", "60"))
+    key_selection = os.environ.get("KEY_SELECTION", "registry")
+    registry_capacity = int(os.environ.get("KEY_REGISTRY_CAPACITY", "500000"))
+    data_pool_size = int(os.environ.get("DATA_POOL_SIZE", "10000"))
+    data_pool_refresh = int(os.environ.get("DATA_POOL_REFRESH_DRAWS", "0"))
+    insert_mode = os.environ.get("INSERT_MODE", "statements")
+    ops_per_commit = int(os.environ.get("OPS_PER_COMMIT", "0"))
+    workload_file = os.environ.get("WORKLOAD_FILE")
+    seed = int(os.environ["SEED"]) if os.environ.get("SEED") else None
+    lag_source = os.environ.get("LAG_SOURCE")
+    lag_missing_after = float(os.environ.get("LAG_MISSING_AFTER_SECONDS", "60"))
+    ces_standin_sink = os.environ.get("CES_STANDIN_SINK") or lag_source
+    journal_dir = os.environ.get("JOURNAL_DIR")
+    record_file = os.environ.get("RECORD_FILE")
+    replay_file = os.environ.get("REPLAY_FILE")
+    replay_speed = os.environ.get("REPLAY_SPEED", "1")
+    reconcile_events = os.environ.get("RECONCILE_EVENTS")
+    reconcile_sink = os.environ.get("RECONCILE_SINK")
+    checksum_fanout = int(os.environ.get("CHECKSUM_FANOUT", "16"))
+    checksum_leaf_keys = int(os.environ.get("CHECKSUM_LEAF_KEYS", "256"))
+    migration_concurrency = int(os.environ.get("MIGRATION_CONCURRENCY", "8"))
+    seed_target_customers = int(os.environ.get("SEED_TARGET_CUSTOMERS", "1000000"))
+    seed_orders_per_customer = int(os.environ.get("SEED_ORDERS_PER_CUSTOMER", "3"))
+    seed_items_per_order = int(os.environ.get("SEED_ITEMS_PER_ORDER", "2"))
+    seed_batch_size = int(os.environ.get("SEED_BATCH_SIZE", "5000"))
+    seed_concurrency = int(os.environ.get("SEED_CONCURRENCY", "4"))
+
+    # Workload defaults - WORKLOAD_FILE may override them, globally or per tenant
+    workload_defaults = {
+        "operations": dict(DEFAULT_MIX),
+        "pacing": {
+            "min_delay_seconds": float(os.environ.get("MIN_DELAY_SECONDS", "1")),
+            "max_delay_seconds": float(os.environ.get("MAX_DELAY_SECONDS", "5")),
+            "target_ops_per_sec": float(os.environ.get("TARGET_OPS_PER_SEC", "0")),
+            "arrival_distribution": os.environ.get("ARRIVAL_DISTRIBUTION", "poisson"),
+            "load_shape": os.environ.get("LOAD_SHAPE", ""),
+            "workers": workers_per_database,
+            "virtual_users": virtual_users,
+        },
+        "data": {
+            "items_per_order": os.environ.get("ITEMS_PER_ORDER", "uniform:1:3"),
+            "items_per_existing_order": os.environ.get(
+                "ITEMS_PER_EXISTING_ORDER", "uniform:1:2"
+            ),
+            "payload_bytes": os.environ.get("PAYLOAD_BYTES", ""),
+            "key_distribution": os.environ.get("KEY_DISTRIBUTION", "uniform"),
+        },
+    }
 
     log.info(
         "starting_load_generator",
+        command=command,
         databases=databases,
-        min_delay=min_delay,
-        max_delay=max_delay,
+        backend=backend_name,
+        workload_file=workload_file,
+        seed=seed,
+        lag_source=lag_source,
+        journal_dir=journal_dir,
+        record_file=record_file,
+        workers_per_database=workers_per_database,
+        engine=engine_mode,
+        key_selection=key_selection,
+        insert_mode=insert_mode,
+        ops_per_commit=ops_per_commit,
     )
 
-    # Run migrations first
-    run_migrations(databases, migrations_path)
+    if command == "reconcile-journal":
+        # Offline: needs only the journal files and a capture of the events
+        if not journal_dir or not reconcile_events:
+            log.error(
+                "reconcile_not_configured",
+                error="JOURNAL_DIR and RECONCILE_EVENTS must both be set",
+            )
+            return 2
+        return 0 if reconcile_journal(journal_dir, reconcile_events) else 1
+
+    if command == "replay" and not replay_file:
+        log.error("replay_not_configured", error="REPLAY_FILE must be set")
+        return 2
+
+    # Compile workloads before touching any database, so a bad spec fails fast
+    workloads = load_workloads(workload_file, databases, workload_defaults)
+
+    # Run migrations first - the SQLite stand-in carries its own schema
+    if backend_name == "sqlite":
+        ces_sink = EventSink(ces_standin_sink) if ces_standin_sink else None
+        backend = SqliteBackend(sqlite_dir, ces_sink=ces_sink)
+        for db in databases:
+            backend.create_schema(db)
+    else:
+        backend = SqlServerBackend(get_connection_string)
+        run_migrations(
+            databases, migrations_path, migration_concurrency, backend=backend
+        )
+
+    if command == "reconcile-checksums":
+        return reconcile_checksums(
+            backend, databases, reconcile_sink, checksum_fanout, checksum_leaf_keys
+        )
+
+    # Fake data is generated once up front and shared by all workers
+    data_pool = DataPool(
+        size=data_pool_size, refresh_after=data_pool_refresh, seed=seed
+    )
 
-    # Create generators for each database
-    generators = [
-        LoadGenerator(
-            connection_string=get_connection_string(db),
-            database_name=db,
-            min_delay=min_delay,
-            max_delay=max_delay,
+    if command == "seed":
+        seeders = [
+            Seeder(
+                backend,
+                db,
+                data_pool,
+                target_customers=seed_target_customers,
+                orders_per_customer=seed_orders_per_customer,
+                items_per_order=seed_items_per_order,
+                batch_size=seed_batch_size,
+                seed=seed,
+            )
+            for db in databases
+        ]
+        try:
+            return 0 if seed_databases(seeders, seed_concurrency) else 1
+        except KeyboardInterrupt:
+            log.info("shutdown_requested")
+            return 1
+
+    # CES lag: change events are matched back to the writes that caused them
+    lag_monitor = (
+        LagMonitor(
+            EventSource(lag_source),
+            interval=metrics_interval,
+            missing_after=lag_missing_after,
         )
-        for db in databases
-    ]
+        if lag_source
+        else None
+    )
 
-    # Run load generation loop
-    log.info("starting_crud_loop")
+    # Operation journal: one append-only file per worker
+    journal = OperationJournal(journal_dir) if journal_dir else None
+
+    # Workload recording: every applied operation, streamed to one file
+    recorder = WorkloadRecorder(record_file) if record_file else None
+
+    if command == "replay":
+        # One generator per database applies the recorded operations in order;
+        # probing keeps the key selector from warm-loading keys it won't use
+        generators = [
+            LoadGenerator(
+                backend=backend,
+                database_name=db,
+                keys=KeySampler(backend),
+                data=data_pool,
+                insert_mode=insert_mode,
+                ops_per_commit=ops_per_commit,
+                lag=lag_monitor,
+                journal=journal.writer(db) if journal else None,
+                streams=Streams.derive(seed, db, "replay"),
+                recorder=recorder,
+            )
+            for db in databases
+        ]
+        engine = WorkloadReplayer(
+            replay_file,
+            generators,
+            speed=0.0 if replay_speed == "max" else float(replay_speed),
+        )
+    else:
+        # The key registry is shared by all workers of a database
+        registries = {
+            db: KeyRegistry(
+                db,
+                backend,
+                capacity=registry_capacity,
+                skew=workloads[db].key_skew,
+                rng=derive(seed, db, "registry"),
+            )
+            for db in databases
+        }
+
+        # Create generators for each worker - each has its own connection and its
+        # own RNG streams, derived from SEED and its place in the tenant list
+        generators = [
+            LoadGenerator(
+                backend=backend,
+                database_name=db,
+                min_delay=workloads[db].min_delay,
+                max_delay=workloads[db].max_delay,
+                keys=registries[db]
+                if key_selection == "registry"
+                else KeySampler(backend, skew=workloads[db].key_skew),
+                data=data_pool,
+                insert_mode=insert_mode,
+                ops_per_commit=ops_per_commit,
+                items_per_order=workloads[db].items_per_order,
+                items_per_existing_order=workloads[db].items_per_existing_order,
+                payload_bytes=workloads[db].payload_bytes,
+                mix=workloads[db].mix,
+                lag=lag_monitor,
+                journal=journal.writer(db) if journal else None,
+                streams=Streams.derive(seed, db, worker),
+                recorder=recorder,
+            )
+            for db in databases
+            for worker in range(workloads[db].workers)
+        ]
+
+        # Open-loop pacing: issue arrivals at a target rate (or shape) per database
+        schedulers = {
+            db: ArrivalScheduler(
+                database_name=db,
+                rate=workloads[db].target_rate,
+                distribution=workloads[db].arrival_distribution,
+                max_in_flight=max_in_flight,
+                late_threshold=late_threshold,
+                shape=workloads[db].load_shape,
+                rng=derive(seed, db, "arrivals"),
+            )
+            for db in databases
+            if workloads[db].open_loop
+        }
+
+        # Run load generation workers concurrently
+        log.info("starting_crud_loop")
+        if engine_mode == "async":
+            # Workers become the connection pool shared by the virtual users
+            engine = AsyncEngine(
+                generators,
+                virtual_users_per_database={
+                    db: workloads[db].virtual_users for db in databases
+                },
+                schedulers=schedulers,
+            )
+        else:
+            engine = WorkerEngine(generators, schedulers=schedulers)
+
+    # Latency histograms are merged across workers and logged periodically
+    reporter = LatencyReporter(
+        [gen.latencies for gen in generators], interval=metrics_interval
+    )
+    reporter.start()
+    if lag_monitor:
+        lag_monitor.start()
+    # SIGTERM (docker stop) shuts down like Ctrl-C, flushing journal and recording
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     try:
-        while True:
-            for gen in generators:
-                gen.execute_random_operation()
-                time.sleep(gen.get_random_delay())
+        if not engine.run():
+            log.error("fatal_error", error="Worker failed")
+            return 1
+        return 0
     except KeyboardInterrupt:
         log.info("shutdown_requested")
         return 0
     except Exception as e:
         log.error("fatal_error", error=str(e))
         return 1
+    finally:
+        reporter.stop()
+        if lag_monitor:
+            lag_monitor.stop()
+        if journal:
+            journal.close()
+        if recorder:
+            recorder.close()
 
 
 if __name__ == "__main__":
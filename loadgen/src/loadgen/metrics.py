@@ -0,0 +1,179 @@
+"""Latency metrics - HDR-style histograms per database and operation."""
+
+import threading
+from array import array
+
+import structlog
+
+log = structlog.get_logger()
+
+# Log-linear buckets with 2^7 sub-buckets per power of two (~1% precision)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+# Track values up to 2^36 microseconds (~19 hours)
+MAX_VALUE_BITS = 36
+BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 2) * SUB_BUCKET_HALF
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of latencies in microseconds.
+
+    Bucket boundaries are identical for every instance, so histograms from
+    different workers can be merged by adding counts.
+    """
+
+    def __init__(self):
+        self.counts = array("q", bytes(8 * BUCKET_COUNT))
+        self.total = 0
+        self.max_value = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        """Map a value to its bucket index."""
+        shift = max(value.bit_length() - SUB_BUCKET_BITS, 0)
+        return shift * SUB_BUCKET_HALF + (value >> shift)
+
+    @staticmethod
+    def _highest_equivalent(index: int) -> int:
+        """Return the largest value that maps to a bucket index."""
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_HALF - 1
+        sub_bucket = index - shift * SUB_BUCKET_HALF
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        """Record a latency given in seconds."""
+        value = min(max(int(seconds * 1_000_000), 0), (1 << MAX_VALUE_BITS) - 1)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add another histogram's counts into this one."""
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.total += other.total
+        self.max_value = max(self.max_value, other.max_value)
+
+    def percentile(self, percentile: float) -> int:
+        """Return the latency in microseconds at the given percentile."""
+        if self.total == 0:
+            return 0
+        target = max(1, round(self.total * percentile / 100.0))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_value)
+        return self.max_value
+
+    def summary(self) -> dict[str, float]:
+        """Return count, percentiles and max in milliseconds."""
+        result: dict[str, float] = {"count": self.total}
+        for percentile in PERCENTILES:
+            key = f"p{percentile:g}".replace(".", "_")
+            result[f"{key}_ms"] = self.percentile(percentile) / 1000.0
+        result["max_ms"] = self.max_value / 1000.0
+        return result
+
+
+class LatencyRecorder:
+    """Latency histograms keyed by (database, operation, outcome) for one worker.
+
+    Failed operations are recorded under outcome "failed", so timeouts show
+    up in their own percentiles instead of vanishing from the "ok" ones.
+    """
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, database: str, operation: str, seconds: float, outcome: str = "ok"
+    ) -> None:
+        """Record one latency sample."""
+        key = (database, operation, outcome)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def drain(self) -> dict[tuple[str, str, str], LatencyHistogram]:
+        """Return the histograms recorded so far and start fresh ones."""
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+        return histograms
+
+    def merge(self, histograms: dict[tuple[str, str, str], LatencyHistogram]) -> None:
+        """Add histograms (e.g. drained from another recorder) into this one."""
+        with self._lock:
+            for key, histogram in histograms.items():
+                target = self._histograms.get(key)
+                if target is None:
+                    target = self._histograms[key] = LatencyHistogram()
+                target.merge(histogram)
+
+    def log_summary(self, event: str) -> None:
+        """Log one line per (database, operation, outcome) histogram."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        for (database, operation, outcome), histogram in items:
+            log.info(
+                event,
+                database=database,
+                operation=operation,
+                outcome=outcome,
+                **histogram.summary(),
+            )
+
+
+class LatencyReporter:
+    """Periodically merges worker recorders and logs latency percentiles.
+
+    Each interval report covers only the samples since the previous one; the
+    run totals are logged once more on stop().
+    """
+
+    def __init__(self, recorders: list[LatencyRecorder], interval: float = 60.0):
+        self.recorders = recorders
+        self.interval = interval
+        self.totals = LatencyRecorder()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the periodic reporting thread."""
+        if self.interval > 0:
+            self._thread = threading.Thread(
+                target=self._run, name="loadgen-latency-reporter", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop reporting and log the run totals."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.report()
+        self.totals.log_summary("latency_total")
+
+    def report(self) -> None:
+        """Collect samples since the last report and log them."""
+        interval = LatencyRecorder()
+        for recorder in self.recorders:
+            interval.merge(recorder.drain())
+        interval.log_summary("latency_interval")
+        self.totals.merge(interval.drain())
+
+    def _run(self) -> None:
+        """Reporting loop."""
+        while not self._stop.wait(self.interval):
+            self.report()
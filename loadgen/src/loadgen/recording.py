@@ -0,0 +1,143 @@
+"""Workload recording - the operations of a run, streamed to a gzip file.
+
+Each line records one applied operation: when it was intended to start,
+the database, the operation, the arguments its plan step chose and the keys
+it created. WorkloadReplayer applies the same arguments against another
+server, on the same timeline or compressed.
+"""
+
+import gzip
+import json
+import threading
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+import structlog
+
+log = structlog.get_logger()
+
+FORMAT = "loadgen-recording"
+VERSION = 1
+
+# Buffered lines are compressed and flushed to disk at least this often
+FLUSH_SECONDS = 1.0
+
+# Speed over ratio: the file is written while the load runs
+COMPRESS_LEVEL = 6
+
+
+class RecordedOperation(NamedTuple):
+    # Intended start, in seconds since the recording started
+    offset: float
+    database: str
+    operation: str
+    # Keyword arguments of the generator's apply_<operation>
+    arguments: dict
+    # Keys the operation created: customer_id, order_id, item_ids
+    keys: dict
+
+
+class WorkloadRecorder:
+    """Appends the operations of every generator to one gzip JSON-lines file.
+
+    Generators record operations once committed, so the file is in commit
+    order; intended starts are on the time.monotonic() clock and stored as
+    offsets from the recorder's creation. The first line is a header.
+
+    Payloads are recorded as sizes, not text - the replaying generator
+    fills them from its own data pool.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = gzip.open(
+            path, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL
+        )
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._flushed_at = self._started
+        self.operations = 0
+        header = {
+            "format": FORMAT,
+            "version": VERSION,
+            "started_at": datetime.now(UTC).isoformat(),
+        }
+        self._file.write(json.dumps(header) + "\n")
+        log.info("recording_started", path=path)
+
+    def record_many(self, operations: Iterable[tuple]) -> None:
+        """Record (database, intended_start, operation, arguments, keys) tuples."""
+        lines = [
+            json.dumps(
+                [
+                    round(max(intended_start - self._started, 0.0), 6),
+                    database,
+                    operation,
+                    arguments,
+                    keys,
+                ],
+                separators=(",", ":"),
+            )
+            + "\n"
+            for database, intended_start, operation, arguments, keys in operations
+        ]
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.writelines(lines)
+            self.operations += len(lines)
+            now = time.monotonic()
+            if now - self._flushed_at >= FLUSH_SECONDS:
+                # A sync flush, so a killed run still leaves a readable prefix
+                self._file.flush()
+                self._flushed_at = now
+
+    def record(
+        self,
+        database: str,
+        intended_start: float,
+        operation: str,
+        arguments: dict,
+        keys: dict,
+    ) -> None:
+        """Record one applied operation."""
+        self.record_many([(database, intended_start, operation, arguments, keys)])
+
+    def close(self) -> None:
+        """Finish the gzip stream."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+        log.info("recording_closed", path=self.path, operations=self.operations)
+
+
+def read_recording(
+    path: str, database: str | None = None
+) -> Iterator[RecordedOperation]:
+    """Stream the operations of a recording, one line at a time.
+
+    With a database, only that tenant's operations are returned; other
+    lines are skipped without being decoded. A recording cut off by a
+    killed run is read up to its last complete line.
+    """
+    # Lines start [offset,"database",... - the offset never holds a comma
+    tenant = None if database is None else json.dumps(database) + ","
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline() or "{}")
+            if header.get("format") != FORMAT or header.get("version") != VERSION:
+                raise ValueError(
+                    f"{path} is not a version {VERSION} loadgen recording"
+                )
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                if tenant and not line.startswith(tenant, line.find(",") + 1):
+                    continue
+                yield RecordedOperation(*json.loads(line))
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            log.warning("recording_truncated", path=path, error=str(e))
@@ -0,0 +1,244 @@
+"""Live key registry - tracks keys client-side so picks need no SELECT."""
+
+import random
+import threading
+from array import array
+
+import structlog
+
+from loadgen.backends import Backend, Connection, Cursor
+from loadgen.keys import KeySelector
+from loadgen.rng import UNSEEDED
+from loadgen.skew import KeySkew
+
+log = structlog.get_logger()
+
+# Statuses whose orders can still progress, and whose items can be deleted
+OPEN_STATUSES = ("Pending", "Processing", "Shipped")
+DELETABLE_STATUSES = ("Pending", "Processing")
+
+WARM_LOAD_BATCH_SIZE = 10_000
+
+
+class KeyPool:
+    """Bounded, array-backed bag of (key, parent) pairs.
+
+    Supports O(1) add, random pick and random pop. Once full, new keys replace
+    random slots (reservoir sampling), so the pool stays a uniform sample of
+    every key ever added while memory stays at capacity * 16 bytes.
+
+    Slots are in insertion order until the pool fills or keys are popped,
+    which is what a KeySkew's oldest/newest indices refer to. Reservoir
+    sampling scatters new keys over the slots, so with keep_newest a full
+    pool instead overwrites its oldest key, treating the arrays as a ring:
+    slots stay in insertion order for good, bar pops, which move the newest
+    key into the popped slot.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        rng: random.Random | None = None,
+        keep_newest: bool = False,
+    ):
+        self.capacity = capacity
+        self.keep_newest = keep_newest
+        # Evictions only; picks draw from the caller's stream
+        self._random = rng or random.Random()
+        self._keys = array("q")
+        self._parents = array("q")
+        # Slot of the oldest key, and the number of keys from there on
+        self._head = 0
+        self._size = 0
+        self._seen = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _slot(self, index: int) -> int:
+        """Array position of the index-th oldest key."""
+        return (self._head + index) % self.capacity
+
+    def _put(self, slot: int, key: int, parent: int) -> None:
+        if slot == len(self._keys):
+            self._keys.append(key)
+            self._parents.append(parent)
+        else:
+            self._keys[slot] = key
+            self._parents[slot] = parent
+
+    def add(self, key: int, parent: int = 0) -> None:
+        """Add a key, evicting the oldest or a random one if the pool is full."""
+        self._seen += 1
+        if self._size < self.capacity:
+            self._put(self._slot(self._size), key, parent)
+            self._size += 1
+            return
+        if self.keep_newest and self.capacity:
+            # The oldest slot becomes the newest
+            self._put(self._head, key, parent)
+            self._head = (self._head + 1) % self.capacity
+            return
+        slot = self._random.randrange(self._seen)
+        if slot < self.capacity:
+            self._put(self._slot(slot), key, parent)
+
+    def pick(self, skew: KeySkew, rng: random.Random = UNSEEDED) -> int:
+        """Return a key chosen by skew without removing it."""
+        return self._keys[self._slot(skew.index(self._size, rng))]
+
+    def pop(self, skew: KeySkew, rng: random.Random = UNSEEDED) -> tuple[int, int]:
+        """Remove and return a (key, parent) pair chosen by skew."""
+        slot = self._slot(skew.index(self._size, rng))
+        key, parent = self._keys[slot], self._parents[slot]
+        # Move the newest key into the slot so removal is O(1)
+        last = self._slot(self._size - 1)
+        self._keys[slot] = self._keys[last]
+        self._parents[slot] = self._parents[last]
+        self._size -= 1
+        return key, parent
+
+
+class KeyRegistry(KeySelector):
+    """In-memory registry of live keys for one database, shared by its workers.
+
+    Open orders are bucketed by status and deletable items are tracked with
+    their order, so update and delete targets are chosen without a round
+    trip. Picked orders and items are removed from the registry, so two
+    workers never target the same row at once; update_order_status re-adds
+    the order under its new status. The registry is warm-loaded from the
+    database on the first connection in a single streamed batch.
+
+    skew decides which of the known keys are picked; it defaults to uniform.
+    latest only ever targets the newest keys, so under it a full pool drops
+    its oldest key rather than sampling (see KeyPool). Picks draw from the
+    calling worker's stream; rng only decides evictions once a pool is full.
+    Which keys the registry holds depends on the order workers' writes land,
+    so with several workers a seed reproduces each worker's draws but not
+    the keys they resolve to.
+    """
+
+    wants_item_ids = True
+
+    def __init__(
+        self,
+        database_name: str,
+        backend: Backend,
+        capacity: int = 500_000,
+        skew: KeySkew | None = None,
+        rng: random.Random | None = None,
+    ):
+        self.database_name = database_name
+        self.backend = backend
+        self.skew = skew or KeySkew()
+        # The pools are only touched under the lock, so they share one stream
+        rng = rng or random.Random()
+        keep_newest = self.skew.kind == "latest"
+        self.customers = KeyPool(capacity, rng, keep_newest)
+        self.orders = {
+            status: KeyPool(capacity, rng, keep_newest) for status in OPEN_STATUSES
+        }
+        self.items = KeyPool(capacity, rng, keep_newest)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def prepare(self, connection: Connection) -> None:
+        """Warm-load the registry once, on the first worker to connect."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._warm_load(connection.cursor())
+            self._loaded = True
+
+    def _warm_load(self, cursor: Cursor) -> None:
+        """Stream existing keys from the database in one batch."""
+        results = self.backend.execute_batch(
+            cursor,
+            [
+                self.backend.CUSTOMER_KEYS,
+                self.backend.OPEN_ORDER_KEYS,
+                self.backend.DELETABLE_ITEM_KEYS,
+            ],
+        )
+        result = next(results)
+        while rows := result.fetchmany(WARM_LOAD_BATCH_SIZE):
+            for (customer_id,) in rows:
+                self.customers.add(customer_id)
+        result = next(results)
+        while rows := result.fetchmany(WARM_LOAD_BATCH_SIZE):
+            for order_id, status in rows:
+                if status in self.orders:
+                    self.orders[status].add(order_id)
+        result = next(results)
+        while rows := result.fetchmany(WARM_LOAD_BATCH_SIZE):
+            for item_id, order_id in rows:
+                self.items.add(item_id, order_id)
+
+        log.info(
+            "key_registry_loaded",
+            database=self.database_name,
+            customers=len(self.customers),
+            open_orders=sum(len(pool) for pool in self.orders.values()),
+            deletable_items=len(self.items),
+        )
+
+    def customer_added(self, customer_id: int) -> None:
+        """Track a new customer."""
+        with self._lock:
+            self.customers.add(customer_id)
+
+    def order_added(self, order_id: int, status: str) -> None:
+        """Track a new open order."""
+        self.order_updated(order_id, status)
+
+    def items_added(self, order_id: int, status: str, item_ids: list[int]) -> None:
+        """Track new items while their order still allows deletion."""
+        if status not in DELETABLE_STATUSES:
+            return
+        with self._lock:
+            for item_id in item_ids:
+                self.items.add(item_id, order_id)
+
+    def order_updated(self, order_id: int, status: str) -> None:
+        """Track an order under its new status; completed orders are dropped."""
+        pool = self.orders.get(status)
+        if pool is not None:
+            with self._lock:
+                pool.add(order_id)
+
+    def pick_customer(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> int | None:
+        """Return a known customer, chosen by the skew."""
+        with self._lock:
+            return self.customers.pick(self.skew, rng) if len(self.customers) else None
+
+    def pick_open_order(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, str] | None:
+        """Remove and return an open order, chosen by the skew within a status.
+
+        The status bucket is picked in proportion to its size, so each
+        status keeps its share of updates however skewed the keys are.
+        """
+        with self._lock:
+            total = sum(len(pool) for pool in self.orders.values())
+            if total == 0:
+                return None
+            choice = rng.randrange(total)
+            for status, pool in self.orders.items():
+                if choice < len(pool):
+                    return pool.pop(self.skew, rng)[0], status
+                choice -= len(pool)
+        return None
+
+    def pick_deletable_item(
+        self, cursor: Cursor, rng: random.Random = UNSEEDED
+    ) -> tuple[int, int] | None:
+        """Remove and return an (OrderItemId, OrderId) chosen by the skew.
+
+        The item's order may have progressed since it was registered, so the
+        caller's DELETE must re-check the order status.
+        """
+        with self._lock:
+            return self.items.pop(self.skew, rng) if len(self.items) else None
@@ -0,0 +1,297 @@
+"""Workload replay - applies a recording against a server on its recorded timeline."""
+
+import bisect
+import queue
+import threading
+import time
+
+import structlog
+
+from loadgen.generator import LoadGenerator
+from loadgen.recording import RecordedOperation, read_recording
+from loadgen.workload import OPERATIONS
+
+log = structlog.get_logger()
+
+# Records read ahead per database; bounds memory however long the recording
+QUEUE_RECORDS = 10_000
+
+# Arguments and created keys that hold a key, and the table it keys
+KEY_TABLES = {
+    "customer_id": "Customers",
+    "order_id": "Orders",
+    "item_id": "OrderItems",
+    "item_ids": "OrderItems",
+}
+
+
+class KeyMap:
+    """Maps keys created during recording to those created during replay.
+
+    Identity values depend on what else the server was doing, so each key
+    an operation creates is mapped to the one the replay got for it; keys
+    not created by the recording, like seeded rows, pass through.
+
+    Only keys that differ are mapped, and as runs: consecutive recorded keys
+    whose replayed keys are offset by the same amount share one entry. A
+    replay assigns identities in the order the recording created them, so
+    the map grows with the number of places the two sequences diverge - a
+    rolled-back insert, an identity cache jump - rather than with the keys.
+    """
+
+    def __init__(self):
+        # table -> first recorded key of each run, sorted, and each run's
+        # [last recorded key, offset]
+        self._starts: dict[str, list[int]] = {}
+        self._runs: dict[str, list[list[int]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    def _run(self, table: str, key: int) -> int:
+        """Index of the run of table that covers key, or -1."""
+        starts = self._starts.get(table, ())
+        index = bisect.bisect_right(starts, key) - 1
+        if index >= 0 and key <= self._runs[table][index][0]:
+            return index
+        return -1
+
+    def key(self, table: str, key: int) -> int:
+        """The replayed key of a recorded key."""
+        index = self._run(table, key)
+        return key if index < 0 else key + self._runs[table][index][1]
+
+    def translate(self, arguments: dict) -> dict:
+        """Return arguments with recorded keys replaced by replayed ones."""
+        translated = dict(arguments)
+        for name, value in arguments.items():
+            table = KEY_TABLES.get(name)
+            if table and isinstance(value, int):
+                translated[name] = self.key(table, value)
+        return translated
+
+    def learn(self, recorded: dict, replayed: dict) -> None:
+        """Map the keys an operation created when recorded to those it created now."""
+        for name, recorded_keys in recorded.items():
+            table = KEY_TABLES[name]
+            replayed_keys = replayed.get(name)
+            if not isinstance(recorded_keys, list):
+                recorded_keys, replayed_keys = [recorded_keys], [replayed_keys]
+            for old, new in zip(recorded_keys, replayed_keys or ()):
+                if old and new and old != new:
+                    self._map(table, old, new - old)
+
+    def _map(self, table: str, key: int, offset: int) -> None:
+        """Map one recorded key, extending or joining the runs beside it."""
+        starts = self._starts.setdefault(table, [])
+        runs = self._runs.setdefault(table, [])
+        index = bisect.bisect_right(starts, key)
+        before = runs[index - 1] if index else None
+        after = index < len(starts) and starts[index] == key + 1
+        if before and before[0] == key - 1 and before[1] == offset:
+            before[0] = key
+            if after and runs[index][1] == offset:
+                # The key closes the gap between two runs
+                before[0] = runs[index][0]
+                del starts[index], runs[index]
+        elif after and runs[index][1] == offset:
+            starts[index] = key
+        else:
+            starts.insert(index, key)
+            runs.insert(index, [key, offset])
+
+    def forget(self, table: str, key: int) -> None:
+        """Drop the mapping of a recorded key that no longer exists.
+
+        Trims the key off the end of its run, or drops a run of one; a key
+        in the middle of a run costs nothing to keep, so stays.
+        """
+        index = self._run(table, key)
+        if index < 0:
+            return
+        starts, runs = self._starts[table], self._runs[table]
+        if starts[index] == key == runs[index][0]:
+            del starts[index], runs[index]
+        elif starts[index] == key:
+            starts[index] = key + 1
+        elif runs[index][0] == key:
+            runs[index][0] = key - 1
+
+
+class WorkloadReplayer:
+    """Replays a recording with one generator per database.
+
+    Each database has a reader thread streaming its own operations from the
+    file into a bounded queue, and a worker applying them in recorded
+    (commit) order, waiting for each intended start compressed by speed -
+    2.0 runs twice as fast, 0 as fast as the server allows. Every database
+    runs against the same clock, so tenants stay in step with each other,
+    and a tenant that falls behind holds up only its own reader.
+
+    Latency is measured from the intended start, so a server that falls
+    behind the recorded timeline shows it. One worker per database keeps
+    operations that depend on each other in order; operations whose target
+    has moved on (an order already shipped) are counted as skipped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        generators: list[LoadGenerator],
+        speed: float = 1.0,
+        queue_records: int = QUEUE_RECORDS,
+    ):
+        if speed < 0:
+            raise ValueError(f"Replay speed must be >= 0, got {speed}")
+        databases = [generator.database_name for generator in generators]
+        if len(set(databases)) != len(databases):
+            raise ValueError("Replay takes exactly one generator per database")
+        self.path = path
+        self.generators = {
+            generator.database_name: generator for generator in generators
+        }
+        self.speed = speed
+        self._queues: dict[str, queue.Queue[RecordedOperation | None]] = {
+            database: queue.Queue(queue_records) for database in self.generators
+        }
+        self._stop = threading.Event()
+        self._failed = False
+        self._start = 0.0
+        # Latest intended start read per database
+        self._recorded_seconds: dict[str, float] = {}
+
+    def run(self) -> bool:
+        """Replay the whole recording, or until interrupted. False on failure."""
+        self._start = time.monotonic()
+        threads = []
+        for database, generator in self.generators.items():
+            records = self._queues[database]
+            threads.append(
+                threading.Thread(
+                    target=self._read,
+                    args=(database, records),
+                    name=f"loadgen-{database}-replay-reader",
+                    daemon=True,
+                )
+            )
+            threads.append(
+                threading.Thread(
+                    target=self._run_database,
+                    args=(generator, records),
+                    name=f"loadgen-{database}-replay",
+                    daemon=True,
+                )
+            )
+        log.info(
+            "replay_started",
+            path=self.path,
+            databases=len(self.generators),
+            speed=self.speed,
+        )
+        for thread in threads:
+            thread.start()
+        try:
+            # Join in slices so the main thread stays responsive to Ctrl-C
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1.0)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        log.info(
+            "replay_finished",
+            path=self.path,
+            recorded_seconds=round(max(self._recorded_seconds.values(), default=0), 3),
+            duration_seconds=round(time.monotonic() - self._start, 3),
+            speed=self.speed,
+        )
+        return not self._failed
+
+    def _put(self, records: queue.Queue, record: RecordedOperation | None) -> bool:
+        """Queue a record, waiting for room unless stopped. False once stopped."""
+        while not self._stop.is_set():
+            try:
+                records.put(record, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(
+        self, database: str, records: queue.Queue[RecordedOperation | None]
+    ) -> None:
+        """Reader loop: queue one database's recorded operations."""
+        try:
+            for record in read_recording(self.path, database):
+                if record.operation not in OPERATIONS:
+                    raise ValueError(f"Unknown operation {record.operation!r}")
+                self._recorded_seconds[database] = max(
+                    self._recorded_seconds.get(database, 0.0), record.offset
+                )
+                if not self._put(records, record):
+                    return
+        except Exception as e:
+            log.error(
+                "replay_read_failed", path=self.path, database=database, error=str(e)
+            )
+            self._failed = True
+            self._stop.set()
+        finally:
+            self._put(records, None)
+
+    def _run_database(
+        self, generator: LoadGenerator, records: queue.Queue[RecordedOperation | None]
+    ) -> None:
+        """Worker loop: apply one database's operations on the recorded timeline."""
+        keys = KeyMap()
+        applied = skipped = 0
+        max_behind = 0.0
+        try:
+            while not self._stop.is_set():
+                try:
+                    record = records.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if record is None:
+                    break
+                intended_start = None
+                if self.speed:
+                    intended_start = self._start + record.offset / self.speed
+                    delay = intended_start - time.monotonic()
+                    # When behind the timeline, apply at once - and report it
+                    if delay > 0 and self._stop.wait(delay):
+                        break
+                    max_behind = max(max_behind, -delay)
+                created = generator.replay_operation(
+                    record.operation, keys.translate(record.arguments), intended_start
+                )
+                if created is None:
+                    skipped += 1
+                    continue
+                applied += 1
+                keys.learn(record.keys, created)
+                if record.operation == "delete_order_item":
+                    keys.forget("OrderItems", record.arguments["item_id"])
+        except Exception as e:
+            log.error(
+                "worker_failed", database=generator.database_name, error=str(e)
+            )
+            self._failed = True
+            self._stop.set()
+        finally:
+            generator.close()
+            if not applied + skipped and not self._stop.is_set():
+                log.warning(
+                    "replay_database_not_recorded",
+                    database=generator.database_name,
+                    path=self.path,
+                )
+            log.info(
+                "replay_database_complete",
+                database=generator.database_name,
+                applied=applied,
+                skipped=skipped,
+                max_behind_seconds=round(max_behind, 3),
+                mapped_key_runs=len(keys),
+            )
@@ -0,0 +1,39 @@
+"""Random streams - independent RNGs derived from a master seed, per worker."""
+
+import hashlib
+import random
+from typing import NamedTuple
+
+# For callers that don't pass a stream of their own: shared and unseeded
+UNSEEDED = random.Random()
+
+
+def derive(seed: int | None, *path: object) -> random.Random:
+    """Return a Random seeded from seed and a path such as (database, worker).
+
+    Every path gets its own stream, unrelated to its neighbours', so adding
+    a worker or a draw in one stream never shifts another. Without a seed
+    the stream is seeded from the OS, as random.Random() is.
+    """
+    if seed is None:
+        return random.Random()
+    digest = hashlib.blake2b(repr((seed, *path)).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+class Streams(NamedTuple):
+    """The RNG streams of one worker, one per kind of decision."""
+
+    # Which operation runs next
+    operations: random.Random
+    # Which existing rows updates and deletes target
+    keys: random.Random
+    # Names, amounts, quantities, statuses, item counts and payloads
+    data: random.Random
+    # Closed-loop think time between operations
+    delays: random.Random
+
+    @classmethod
+    def derive(cls, seed: int | None, *path: object) -> "Streams":
+        """Derive every stream of the worker at path from seed."""
+        return cls(*(derive(seed, *path, name) for name in cls._fields))
@@ -0,0 +1,158 @@
+"""Open-loop arrival scheduler - issues operations at a target rate."""
+
+import random
+import threading
+
+import structlog
+
+from loadgen.shapes import LoadShape
+
+log = structlog.get_logger()
+
+DISTRIBUTIONS = ("constant", "poisson", "uniform")
+
+# Dispatchers re-check a shaped rate at least this often, even with no arrival
+IDLE_INTERVAL_SECONDS = 0.1
+
+# A shaped rate is logged again once it has moved this far from the last log
+RATE_LOG_CHANGE = 0.1
+
+
+class ArrivalScheduler:
+    """Generates intended start times at a target rate for one database.
+
+    Arrivals are scheduled against an absolute timeline rather than after the
+    previous operation completes, so a slow database does not slow the
+    generator down. Arrivals that would exceed the in-flight limit are dropped,
+    and arrivals that start more than late_threshold after their intended time
+    are counted as late.
+
+    With a LoadShape the target rate follows the shape over the elapsed run
+    time. Each gap is drawn as an amount of work at 1 op/sec and used up at
+    whatever rate is current, in steps of at most IDLE_INTERVAL_SECONDS, so
+    every distribution follows a ramp or spike as it happens. Gaps are drawn
+    from rng, so a seeded scheduler issues the same timeline.
+    """
+
+    def __init__(
+        self,
+        database_name: str,
+        rate: float = 0.0,
+        distribution: str = "poisson",
+        max_in_flight: int = 100,
+        late_threshold: float = 0.1,
+        shape: LoadShape | None = None,
+        rng: random.Random | None = None,
+    ):
+        if shape is None:
+            if rate <= 0:
+                raise ValueError(f"Arrival rate must be positive, got {rate}")
+            shape = LoadShape("constant", rate)
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown arrival distribution {distribution!r}, "
+                f"expected one of {', '.join(DISTRIBUTIONS)}"
+            )
+        self.database_name = database_name
+        self.shape = shape
+        self.rate = shape.rate_at(0.0)
+        self.distribution = distribution
+        self.max_in_flight = max_in_flight
+        self.late_threshold = late_threshold
+        self._random = rng or random.Random()
+        self.issued = 0
+        self.dropped = 0
+        self.late = 0
+        self.completed = 0
+        self._in_flight = 0
+        self._logged_rate: float | None = None
+        # What is left of the current gap, in seconds at 1 op/sec
+        self._remaining: float | None = None
+        self._lock = threading.Lock()
+
+    def next_interval(self, elapsed: float = 0.0) -> float | None:
+        """Return the gap until the next arrival, or None for no arrival yet.
+
+        elapsed is the time since the run started, on the dispatcher's clock.
+        On None the dispatcher waits IDLE_INTERVAL_SECONDS and asks again.
+        """
+        self.rate = self.shape.rate_at(elapsed)
+        if self.shape.kind != "constant":
+            self._log_rate(elapsed)
+        if self.rate <= 0:
+            return None
+        if self._remaining is None:
+            self._remaining = self._draw_gap()
+        interval = self._remaining / self.rate
+        # A shaped rate may change before a long gap is over: wait one idle
+        # step at the current rate and carry the rest of the gap forward, so a
+        # low rate early in a ramp doesn't hold back the rest of it
+        if interval > IDLE_INTERVAL_SECONDS and self.shape.kind != "constant":
+            self._remaining -= IDLE_INTERVAL_SECONDS * self.rate
+            return None
+        self._remaining = None
+        return interval
+
+    def _draw_gap(self) -> float:
+        """Draw the next gap as it would be at a rate of 1 op/sec."""
+        if self.distribution == "poisson":
+            return self._random.expovariate(1.0)
+        if self.distribution == "uniform":
+            # Jitter around the mean interval, keeping the same average rate
+            return self._random.uniform(0.0, 2.0)
+        return 1.0
+
+    def _log_rate(self, elapsed: float) -> None:
+        """Log the shaped rate whenever it has moved noticeably."""
+        last = self._logged_rate
+        threshold = RATE_LOG_CHANGE * max(last or 0.0, 1.0)
+        if last is not None and abs(self.rate - last) <= threshold:
+            return
+        self._logged_rate = self.rate
+        log.info(
+            "arrival_rate_changed",
+            database=self.database_name,
+            target_rate=round(self.rate, 2),
+            elapsed_s=round(elapsed, 1),
+            shape=repr(self.shape),
+        )
+
+    def try_acquire(self) -> bool:
+        """Admit an arrival if the in-flight limit allows, else count it dropped."""
+        with self._lock:
+            self.issued += 1
+            if self._in_flight >= self.max_in_flight:
+                self.dropped += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, intended_start: float, actual_start: float) -> None:
+        """Record completion of an admitted arrival."""
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+            if actual_start - intended_start > self.late_threshold:
+                self.late += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return arrival accounting counters."""
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "dropped": self.dropped,
+                "late": self.late,
+                "completed": self.completed,
+                "in_flight": self._in_flight,
+            }
+
+    def log_stats(self) -> None:
+        """Log arrival accounting for this database."""
+        log.info(
+            "arrival_stats",
+            database=self.database_name,
+            target_rate=self.rate,
+            shape=repr(self.shape),
+            distribution=self.distribution,
+            **self.stats(),
+        )
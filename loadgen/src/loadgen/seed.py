@@ -0,0 +1,309 @@
+"""Bulk seeding - pre-populates tenant databases with realistic volumes of rows."""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import structlog
+
+from loadgen.backends import Backend
+from loadgen.datapool import DataPool
+from loadgen.rng import derive
+
+log = structlog.get_logger()
+
+# Seeded orders mostly look like history, with a tail still in flight
+SEED_STATUSES = ("Pending", "Processing", "Shipped", "Completed")
+SEED_STATUS_WEIGHTS = (10, 10, 10, 70)
+
+PROGRESS_INTERVAL_SECONDS = 10.0
+
+# Batches buffered between pipeline stages before the upstream stage waits
+PIPELINE_DEPTH = 4
+
+_DONE = None
+
+
+class SeedAborted(Exception):
+    """Another pipeline stage failed."""
+
+
+class Seeder:
+    """Tops one database up to a target number of customers.
+
+    Keys are assigned client-side from the current MAX + 1 of each table, so
+    orders and items reference their parents without reading anything back.
+    Customers, orders and items are written by three pipelined stages, each on
+    its own connection and committing per batch: orders for a customer batch
+    are inserted while the next customer batch is in flight, and the same for
+    items. Foreign keys always point at rows an upstream stage has committed.
+
+    Explicit keys mean the load generator must not insert into the same
+    database while it is being seeded.
+
+    Each stage draws from its own stream derived from seed, so a seeded run
+    against the same starting rows writes the same rows every time.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        database_name: str,
+        data: DataPool,
+        target_customers: int,
+        orders_per_customer: int = 3,
+        items_per_order: int = 2,
+        batch_size: int = 5_000,
+        seed: int | None = None,
+    ):
+        self.backend = backend
+        self.database_name = database_name
+        self.data = data
+        self.target_customers = target_customers
+        self.orders_per_customer = orders_per_customer
+        self.items_per_order = max(items_per_order, 1)
+        self.batch_size = batch_size
+        self.seed = seed
+        self.rows = {"Customers": 0, "Orders": 0, "OrderItems": 0}
+        self._abort = threading.Event()
+
+    def run(self) -> None:
+        """Seed the database, blocking until every stage has finished."""
+        connection = self.backend.connect(self.database_name)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self.backend.SEED_HIGH_WATER)
+            existing, max_customer, max_order, max_item = cursor.fetchone()
+        finally:
+            connection.close()
+
+        to_seed = self.target_customers - existing
+        if to_seed <= 0:
+            log.info(
+                "seed_skipped",
+                database=self.database_name,
+                customers=existing,
+                target=self.target_customers,
+            )
+            return
+
+        log.info(
+            "seed_started",
+            database=self.database_name,
+            existing_customers=existing,
+            customers_to_seed=to_seed,
+        )
+        start = time.monotonic()
+        customer_batches: queue.Queue = queue.Queue(PIPELINE_DEPTH)
+        order_batches: queue.Queue = queue.Queue(PIPELINE_DEPTH)
+        first_customer = (max_customer or 0) + 1
+        first_order = (max_order or 0) + 1
+        first_item = (max_item or 0) + 1
+        stages = [
+            (self._seed_customers, (to_seed, first_customer, customer_batches)),
+            (self._seed_orders, (first_order, customer_batches, order_batches)),
+            (self._seed_items, (first_item, order_batches)),
+        ]
+        errors: list[Exception] = []
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(stage, args, errors),
+                name=f"loadgen-seed-{self.database_name}-{stage.__name__}",
+                daemon=True,
+            )
+            for stage, args in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+        duration = time.monotonic() - start
+        log.info(
+            "seed_complete",
+            database=self.database_name,
+            duration_s=round(duration, 1),
+            rows_per_sec=round(sum(self.rows.values()) / duration),
+            **{table.lower(): count for table, count in self.rows.items()},
+        )
+
+    def abort(self) -> None:
+        """Stop every stage at its next batch boundary."""
+        self._abort.set()
+
+    def _run_stage(self, stage, args: tuple, errors: list[Exception]) -> None:
+        """Run one stage; on failure record the error and abort the others."""
+        try:
+            stage(*args)
+        except SeedAborted:
+            pass
+        except Exception as e:
+            log.error(
+                "seed_stage_failed",
+                database=self.database_name,
+                stage=stage.__name__,
+                error=str(e),
+            )
+            errors.append(e)
+            self._abort.set()
+
+    def _put(self, batches: queue.Queue, batch) -> None:
+        """Hand a batch downstream, giving up if another stage failed."""
+        while not self._abort.is_set():
+            try:
+                batches.put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise SeedAborted
+
+    def _get(self, batches: queue.Queue):
+        """Take a batch from upstream, giving up if another stage failed."""
+        while not self._abort.is_set():
+            try:
+                return batches.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        raise SeedAborted
+
+    def _insert(self, connection, table: str, rows: list[tuple]) -> None:
+        """Bulk insert and commit one batch."""
+        self.backend.bulk_insert(connection.cursor(), table, rows)
+        connection.commit()
+        self.rows[table] += len(rows)
+
+    def _seed_customers(
+        self, count: int, first_id: int, customer_batches: queue.Queue
+    ) -> None:
+        """Stage 1: insert customers, passing each committed id range on."""
+        connection = self.backend.bulk_connect(self.database_name, "Customers")
+        rng = derive(self.seed, self.database_name, "seed", "Customers")
+        try:
+            for offset in range(0, count, self.batch_size):
+                start_id = first_id + offset
+                size = min(self.batch_size, count - offset)
+                rows = [
+                    (customer_id, *self.data.person(rng))
+                    for customer_id in range(start_id, start_id + size)
+                ]
+                self._insert(connection, "Customers", rows)
+                self._put(customer_batches, range(start_id, start_id + size))
+            self._put(customer_batches, _DONE)
+        finally:
+            connection.close()
+
+    def _seed_orders(
+        self, first_id: int, customer_batches: queue.Queue, order_batches: queue.Queue
+    ) -> None:
+        """Stage 2: insert 0..2N orders per customer, passing order ids on."""
+        connection = self.backend.bulk_connect(self.database_name, "Orders")
+        rng = derive(self.seed, self.database_name, "seed", "Orders")
+        order_id = first_id
+        rows: list[tuple] = []
+        try:
+            while (customer_ids := self._get(customer_batches)) is not _DONE:
+                for customer_id in customer_ids:
+                    for _ in range(rng.randint(0, 2 * self.orders_per_customer)):
+                        rows.append(
+                            (
+                                order_id,
+                                customer_id,
+                                round(rng.uniform(10.0, 500.0), 2),
+                                rng.choices(SEED_STATUSES, SEED_STATUS_WEIGHTS)[0],
+                            )
+                        )
+                        order_id += 1
+                    if len(rows) >= self.batch_size:
+                        self._insert(connection, "Orders", rows)
+                        self._put(order_batches, [row[0] for row in rows])
+                        rows = []
+            if rows:
+                self._insert(connection, "Orders", rows)
+                self._put(order_batches, [row[0] for row in rows])
+            self._put(order_batches, _DONE)
+        finally:
+            connection.close()
+
+    def _seed_items(self, first_id: int, order_batches: queue.Queue) -> None:
+        """Stage 3: insert 1..2N-1 items per order."""
+        connection = self.backend.bulk_connect(self.database_name, "OrderItems")
+        rng = derive(self.seed, self.database_name, "seed", "OrderItems")
+        item_id = first_id
+        rows: list[tuple] = []
+        try:
+            while (order_ids := self._get(order_batches)) is not _DONE:
+                for order_id in order_ids:
+                    for _ in range(rng.randint(1, 2 * self.items_per_order - 1)):
+                        rows.append(
+                            (
+                                item_id,
+                                order_id,
+                                self.data.product_name(rng),
+                                rng.randint(1, 5),
+                                round(rng.uniform(5.0, 100.0), 2),
+                            )
+                        )
+                        item_id += 1
+                    if len(rows) >= self.batch_size:
+                        self._insert(connection, "OrderItems", rows)
+                        rows = []
+            if rows:
+                self._insert(connection, "OrderItems", rows)
+        finally:
+            connection.close()
+
+
+def seed_databases(
+    seeders: list[Seeder],
+    concurrency: int = 4,
+    progress_interval: float = PROGRESS_INTERVAL_SECONDS,
+) -> bool:
+    """Seed databases concurrently, logging progress. Returns False on failure."""
+    start = time.monotonic()
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(seeders))),
+        thread_name_prefix="loadgen-seed",
+    ) as executor:
+        futures = {executor.submit(seeder.run): seeder for seeder in seeders}
+        pending = set(futures)
+        while pending:
+            try:
+                _, pending = wait(pending, timeout=progress_interval)
+            except KeyboardInterrupt:
+                for seeder in seeders:
+                    seeder.abort()
+                raise
+            elapsed = time.monotonic() - start
+            for seeder in seeders:
+                log.info(
+                    "seed_progress",
+                    database=seeder.database_name,
+                    rows_per_sec=round(sum(seeder.rows.values()) / elapsed),
+                    **{table.lower(): count for table, count in seeder.rows.items()},
+                )
+
+    failed = []
+    for future, seeder in futures.items():
+        if future.exception() is not None:
+            log.error(
+                "seed_failed",
+                database=seeder.database_name,
+                error=str(future.exception()),
+            )
+            failed.append(seeder.database_name)
+
+    duration = time.monotonic() - start
+    total = sum(sum(seeder.rows.values()) for seeder in seeders)
+    log.info(
+        "seed_summary",
+        databases=len(seeders),
+        failed=len(failed),
+        rows=total,
+        duration_s=round(duration, 1),
+        rows_per_sec=round(total / duration) if duration else 0,
+    )
+    return not failed
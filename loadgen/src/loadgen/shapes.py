@@ -0,0 +1,88 @@
+"""Load shapes - the target arrival rate as a function of elapsed time."""
+
+import math
+
+
+class LoadShape:
+    """An arrival rate over time parsed from "kind:param:param".
+
+    Kinds (rates in ops/sec, durations in seconds):
+        constant:RATE                   always RATE
+        ramp:FROM:TO:DURATION           linear from FROM to TO, then holds TO
+        steps:START:STEP:HOLD[:COUNT]   plateaus of HOLD seconds, each STEP
+                                        higher; holds the COUNTth plateau
+        spike:BASE:PEAK:EVERY:LENGTH    BASE, with PEAK for LENGTH seconds at
+                                        the start of every EVERY seconds
+        diurnal:LOW:HIGH:PERIOD         sine from LOW up to HIGH and back over
+                                        PERIOD seconds - a compressed day
+
+    Steps are the tool for finding the saturation knee: hold each rate long
+    enough for lag to settle, then read off where it stops settling.
+    """
+
+    KINDS = {
+        "constant": (1, 1),
+        "ramp": (3, 3),
+        "steps": (3, 4),
+        "spike": (4, 4),
+        "diurnal": (3, 3),
+    }
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(
+                f"Unknown load shape {kind!r}, expected one of {', '.join(self.KINDS)}"
+            )
+        low, high = self.KINDS[kind]
+        if not low <= len(params) <= high:
+            expected = low if low == high else f"{low}-{high}"
+            raise ValueError(
+                f"Load shape {kind!r} takes {expected} parameter(s), "
+                f"got {len(params)}"
+            )
+        if any(param < 0 for param in params):
+            raise ValueError(f"Load shape {kind!r} parameters must be >= 0")
+        if kind in ("ramp", "diurnal") and params[2] <= 0:
+            raise ValueError(f"Load shape {kind!r} needs a positive duration")
+        if kind == "steps" and params[2] <= 0:
+            raise ValueError("Load shape 'steps' needs a positive HOLD")
+        if kind == "steps" and len(params) == 4 and params[3] < 1:
+            raise ValueError("Load shape 'steps' needs COUNT >= 1")
+        if kind == "spike" and not 0 < params[3] <= params[2]:
+            raise ValueError("Load shape 'spike' needs 0 < LENGTH <= EVERY")
+        self.kind = kind
+        self.params = tuple(float(param) for param in params)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LoadShape":
+        """Build a shape from a spec such as "ramp:10:500:600"."""
+        kind, *params = spec.strip().split(":")
+        try:
+            values = [float(param) for param in params]
+        except ValueError:
+            raise ValueError(f"Invalid load shape spec {spec!r}") from None
+        return cls(kind.strip().lower(), *values)
+
+    def rate_at(self, elapsed: float) -> float:
+        """Target rate elapsed seconds after the run started."""
+        kind, params = self.kind, self.params
+        if kind == "constant":
+            return params[0]
+        if kind == "ramp":
+            start, end, duration = params
+            return start + (end - start) * min(elapsed / duration, 1.0)
+        if kind == "steps":
+            start, step, hold = params[:3]
+            completed = int(elapsed // hold)
+            if len(params) == 4:
+                completed = min(completed, int(params[3]) - 1)
+            return start + step * completed
+        if kind == "spike":
+            base, peak, every, length = params
+            return peak if elapsed % every < length else base
+        low, high, period = params
+        return low + (high - low) * (1 - math.cos(2 * math.pi * elapsed / period)) / 2
+
+    def __repr__(self) -> str:
+        params = ":".join(f"{param:g}" for param in self.params)
+        return f"{self.kind}:{params}"
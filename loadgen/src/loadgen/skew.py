@@ -0,0 +1,111 @@
+"""Key skew - how update and delete targets are spread over existing keys."""
+
+import random
+from array import array
+
+from loadgen.rng import UNSEEDED
+
+# zeta(n) is summed exactly up to here, and extrapolated beyond
+ZETA_TABLE_SIZE = 10_000
+
+
+class KeySkew:
+    """Picks an index in [0, n) from a short spec; index 0 is the oldest key.
+
+    Specs:
+        uniform         every key equally likely
+        zipf:THETA      Zipfian over key age, oldest keys hottest; THETA in
+                        (0, 1), 0.99 being YCSB's default
+        latest:N        uniform over the N newest keys only
+
+    n changes as keys are added and removed, so the Zipf normalisation
+    zeta(n) comes from a table built once up to ZETA_TABLE_SIZE, extended
+    with the Euler-Maclaurin tail for larger n. Every pick is O(1) whatever
+    the number of keys.
+    """
+
+    KINDS = ("uniform", "zipf", "latest")
+
+    def __init__(self, kind: str = "uniform", param: float | None = None):
+        if kind not in self.KINDS:
+            raise ValueError(
+                f"Unknown key distribution {kind!r}, "
+                f"expected one of {', '.join(self.KINDS)}"
+            )
+        if (param is None) != (kind == "uniform"):
+            raise ValueError(f"Key distribution {kind!r} takes one parameter")
+        if kind == "zipf" and not 0 < param < 1:
+            raise ValueError("zipf THETA must be between 0 and 1 (exclusive)")
+        if kind == "latest" and param < 1:
+            raise ValueError("latest N must be >= 1")
+        self.kind = kind
+        self.param = param
+        if kind == "zipf":
+            self._init_zipf(param)
+
+    @classmethod
+    def parse(cls, spec: str) -> "KeySkew":
+        """Build a skew from a spec such as "zipf:0.99"."""
+        kind, *params = spec.strip().split(":")
+        try:
+            values = [float(param) for param in params]
+        except ValueError:
+            raise ValueError(f"Invalid key distribution spec {spec!r}") from None
+        if len(values) > 1:
+            raise ValueError(f"Invalid key distribution spec {spec!r}")
+        return cls(kind.strip().lower(), *values)
+
+    def _init_zipf(self, theta: float) -> None:
+        """Precompute zeta(n) for small n and the constants of every pick."""
+        self._theta = theta
+        self._alpha = 1.0 / (1.0 - theta)
+        self._zeta = array("d", [0.0])
+        total = 0.0
+        for i in range(1, ZETA_TABLE_SIZE + 1):
+            total += i**-theta
+            self._zeta.append(total)
+        self._half_pow_theta = 1.0 + 0.5**theta
+        # (n, zeta(n), eta) of the last pick, swapped as one tuple so workers
+        # sharing the skew never see a mix of two n
+        self._cached = (0, 0.0, 0.0)
+
+    def _zeta_of(self, n: int) -> float:
+        """sum(i ** -theta for i in 1..n)."""
+        if n <= ZETA_TABLE_SIZE:
+            return self._zeta[n]
+        m, theta = ZETA_TABLE_SIZE, self._theta
+        # Integral of the tail plus the endpoint correction
+        return (
+            self._zeta[m]
+            + (n ** (1 - theta) - m ** (1 - theta)) / (1 - theta)
+            + (n**-theta - m**-theta) / 2
+        )
+
+    def _zipf(self, n: int, rng: random.Random) -> int:
+        """Zipfian rank in [0, n) for n > 2 (Gray et al., as used by YCSB)."""
+        cached_n, zetan, eta = self._cached
+        if n != cached_n:
+            zetan = self._zeta_of(n)
+            eta = (1 - (2 / n) ** (1 - self._theta)) / (1 - self._zeta[2] / zetan)
+            self._cached = (n, zetan, eta)
+        uz = rng.random() * zetan
+        if uz < 1.0:
+            return 0
+        if uz < self._half_pow_theta:
+            return 1
+        u = uz / zetan
+        return min(int(n * (eta * u - eta + 1) ** self._alpha), n - 1)
+
+    def index(self, n: int, rng: random.Random = UNSEEDED) -> int:
+        """Return an index in [0, n) drawn from rng; n must be positive."""
+        if self.kind == "zipf" and n > 2:
+            return self._zipf(n, rng)
+        if self.kind == "latest":
+            return n - 1 - rng.randrange(min(int(self.param), n))
+        # Uniform, and Zipf over too few keys to skew
+        return rng.randrange(n)
+
+    def __repr__(self) -> str:
+        if self.param is None:
+            return self.kind
+        return f"{self.kind}:{self.param:g}"
@@ -0,0 +1,254 @@
+"""Workload specs - operation mix, pacing and data shape, per tenant."""
+
+import random
+import tomllib
+
+import structlog
+
+from loadgen.distributions import Distribution
+from loadgen.rng import UNSEEDED
+from loadgen.scheduler import DISTRIBUTIONS
+from loadgen.shapes import LoadShape
+from loadgen.skew import KeySkew
+
+log = structlog.get_logger()
+
+# More inserts/updates than deletes
+DEFAULT_MIX = {
+    "insert_customer_with_order": 40,
+    "update_order_status": 30,
+    "insert_order_for_existing": 15,
+    "update_customer": 10,
+    "delete_order_item": 5,
+}
+
+OPERATIONS = tuple(DEFAULT_MIX)
+
+# Upper bound on a single row's payload, however the size distribution is set
+MAX_PAYLOAD_BYTES = 16 * 1024 * 1024
+
+# Upper bound on the items of one order, however the count distribution is set
+MAX_ITEMS_PER_ORDER = 1000
+
+# Keys allowed in each section of a workload file, with their types
+SECTIONS = {
+    "operations": {name: (int, float) for name in OPERATIONS},
+    "pacing": {
+        "min_delay_seconds": (int, float),
+        "max_delay_seconds": (int, float),
+        "target_ops_per_sec": (int, float),
+        "arrival_distribution": str,
+        "load_shape": str,
+        "workers": int,
+        "virtual_users": int,
+    },
+    "data": {
+        "items_per_order": str,
+        "items_per_existing_order": str,
+        "payload_bytes": str,
+        "key_distribution": str,
+    },
+}
+
+
+class AliasTable:
+    """Weighted random choice in O(1) per pick (Vose's alias method).
+
+    Each of the n slots holds a probability and an alias; a pick chooses a
+    slot uniformly and returns it or its alias. Building the table is O(n)
+    and happens once.
+    """
+
+    def __init__(self, weights: list[float]):
+        total = sum(weights)
+        if not weights or total <= 0 or any(weight < 0 for weight in weights):
+            raise ValueError("Weights must be non-negative with a positive sum")
+        n = self._n = len(weights)
+        scaled = [weight * n / total for weight in weights]
+        self._probability = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Slots left in either list keep probability 1.0 (off only by rounding)
+
+    def pick(self, rng: random.Random = UNSEEDED) -> int:
+        """Return a slot index with probability proportional to its weight."""
+        u = rng.random() * self._n
+        slot = int(u)
+        return slot if u - slot < self._probability[slot] else self._alias[slot]
+
+
+class OperationMix:
+    """Weighted choice of LoadGenerator operation names."""
+
+    def __init__(self, weights: dict[str, float]):
+        unknown = set(weights) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown operation(s) {', '.join(sorted(unknown))}, "
+                f"expected some of {', '.join(OPERATIONS)}"
+            )
+        # Zero weights disable an operation
+        self.weights = {name: weight for name, weight in weights.items() if weight}
+        self.names = list(self.weights)
+        self._table = AliasTable(list(self.weights.values()))
+
+    def choose(self, rng: random.Random = UNSEEDED) -> str:
+        """Return the name of the next operation to run, drawn from rng."""
+        return self.names[self._table.pick(rng)]
+
+    def shares(self) -> dict[str, float]:
+        """Each operation's share of the mix, in percent."""
+        total = sum(self.weights.values())
+        return {
+            name: round(100 * weight / total, 1)
+            for name, weight in self.weights.items()
+        }
+
+
+class Workload:
+    """The compiled workload of one tenant database."""
+
+    def __init__(self, settings: dict[str, dict], profile: str | None = None):
+        pacing, data = settings["pacing"], settings["data"]
+        self.profile = profile
+        self.mix = OperationMix(settings["operations"])
+        self.min_delay = float(pacing["min_delay_seconds"])
+        self.max_delay = float(pacing["max_delay_seconds"])
+        self.target_rate = float(pacing["target_ops_per_sec"])
+        self.arrival_distribution = pacing["arrival_distribution"]
+        if self.arrival_distribution not in DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown arrival distribution {self.arrival_distribution!r}, "
+                f"expected one of {', '.join(DISTRIBUTIONS)}"
+            )
+        # A load shape drives the open-loop rate over time instead of target_rate
+        self.load_shape = (
+            LoadShape.parse(pacing["load_shape"]) if pacing["load_shape"] else None
+        )
+        self.workers = pacing["workers"]
+        self.virtual_users = pacing["virtual_users"]
+        if self.workers < 1 or self.virtual_users < 1:
+            raise ValueError("pacing.workers and pacing.virtual_users must be >= 1")
+        self.items_per_order = Distribution.parse(
+            data["items_per_order"], maximum=MAX_ITEMS_PER_ORDER
+        )
+        self.items_per_existing_order = Distribution.parse(
+            data["items_per_existing_order"], maximum=MAX_ITEMS_PER_ORDER
+        )
+        self.payload_bytes = (
+            Distribution.parse(data["payload_bytes"], maximum=MAX_PAYLOAD_BYTES)
+            if data["payload_bytes"]
+            else None
+        )
+        self.key_skew = KeySkew.parse(data["key_distribution"])
+
+    @property
+    def open_loop(self) -> bool:
+        """Whether arrivals are scheduled rather than paced by think time."""
+        return self.target_rate > 0 or self.load_shape is not None
+
+    def describe(self) -> dict:
+        """Summary for logging."""
+        return {
+            "profile": self.profile,
+            "mix": self.mix.shares(),
+            "min_delay": self.min_delay,
+            "max_delay": self.max_delay,
+            "target_rate": self.target_rate or None,
+            "load_shape": repr(self.load_shape) if self.load_shape else None,
+            "workers": self.workers,
+            "virtual_users": self.virtual_users,
+            "items_per_order": repr(self.items_per_order),
+            "items_per_existing_order": repr(self.items_per_existing_order),
+            "payload_bytes": repr(self.payload_bytes) if self.payload_bytes else None,
+            "key_distribution": repr(self.key_skew),
+        }
+
+
+def _check_sections(spec: dict, where: str) -> None:
+    """Reject unknown sections, keys and wrongly typed values."""
+    for section, values in spec.items():
+        if section not in SECTIONS or not isinstance(values, dict):
+            raise ValueError(f"{where}: unknown section [{section}]")
+        for key, value in values.items():
+            expected = SECTIONS[section].get(key)
+            if expected is None:
+                raise ValueError(f"{where}: unknown key {section}.{key}")
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise ValueError(f"{where}: {section}.{key} has the wrong type")
+
+
+def _merge(base: dict[str, dict], override: dict[str, dict]) -> dict[str, dict]:
+    """Overlay override onto base, key by key within pacing and data.
+
+    An operations section is a whole mix, so it replaces the base mix.
+    """
+    merged = {
+        section: {**base.get(section, {}), **override.get(section, {})}
+        for section in SECTIONS
+    }
+    if "operations" in override:
+        merged["operations"] = dict(override["operations"])
+    return merged
+
+
+def load_workloads(
+    path: str | None, databases: list[str], defaults: dict[str, dict]
+) -> dict[str, Workload]:
+    """Compile one Workload per database.
+
+    defaults (from environment variables) are overlaid by the top-level
+    sections of the TOML file at path, then by the [profiles.<name>] the
+    tenant names with profile = "<name>", then by its own [tenants.<database>]
+    sections (see _merge). Without a path every database gets the defaults.
+    """
+    spec: dict = {}
+    if path:
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+
+    tenants = spec.pop("tenants", {})
+    profiles = spec.pop("profiles", {})
+    for key, table in (("tenants", tenants), ("profiles", profiles)):
+        if not isinstance(table, dict):
+            raise ValueError(f"{path}: {key} must be a table")
+        for name, value in table.items():
+            if not isinstance(value, dict):
+                raise ValueError(f"{path}: {key}.{name} must be a table")
+    _check_sections(spec, path or "workload")
+    for name, profile in profiles.items():
+        _check_sections(profile, f"{path} [profiles.{name}]")
+
+    tenant_profiles: dict[str, str | None] = {}
+    for database, overrides in tenants.items():
+        where = f"{path} [tenants.{database}]"
+        profile = overrides.pop("profile", None)
+        if profile is not None and not isinstance(profile, str):
+            raise ValueError(f"{where}: profile has the wrong type")
+        if profile is not None and profile not in profiles:
+            raise ValueError(f"{where}: unknown profile {profile!r}")
+        tenant_profiles[database] = profile
+        _check_sections(overrides, where)
+        if database not in databases:
+            log.warning("workload_tenant_unused", database=database, path=path)
+
+    settings = _merge(defaults, spec)
+    workloads = {}
+    for database in databases:
+        profile = tenant_profiles.get(database)
+        tenant = _merge(settings, profiles[profile]) if profile else settings
+        workloads[database] = Workload(
+            _merge(tenant, tenants.get(database, {})), profile=profile
+        )
+    for database, workload in workloads.items():
+        log.info(
+            "workload_compiled", database=database, path=path, **workload.describe()
+        )
+    return workloads
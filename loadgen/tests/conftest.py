@@ -0,0 +1,24 @@
+"""Test fixtures - SQLite tenant databases in a temporary directory.
+
+The SQLite stand-in implements the same schema and operations as SQL
+Server, so correctness tests run against real files without a server.
+"""
+
+import pytest
+
+from loadgen.backends import SqliteBackend
+from loadgen.datapool import DataPool
+
+
+@pytest.fixture
+def backend(tmp_path) -> SqliteBackend:
+    """A SqliteBackend holding one empty tenant database, "t1"."""
+    backend = SqliteBackend(str(tmp_path / "source"))
+    backend.create_schema("t1")
+    return backend
+
+
+@pytest.fixture(scope="session")
+def data_pool() -> DataPool:
+    """A small seeded data pool shared by every test."""
+    return DataPool(size=100, seed=0)
@@ -0,0 +1,80 @@
+"""Backend statements stay within the database's per-statement limits."""
+
+import pytest
+
+from loadgen.backends import BATCH_ITEMS, SqlServerBackend
+
+CUSTOMER = ("Jane", "Doe", "jane.doe1@example.com", 1, "2024-01-01 00:00:00")
+ORDER = (9.99, "Pending", None, 2, "2024-01-01 00:00:00")
+
+
+def items(count: int) -> list[tuple]:
+    """count stamped items, LoadgenSeq numbered from 100."""
+    return [
+        ("Widget", 1, 9.99, None, 100 + n, "2024-01-01 00:00:00")
+        for n in range(count)
+    ]
+
+
+class LimitCursor:
+    """Stand-in pyodbc cursor failing like SQL Server on oversized statements."""
+
+    def __init__(self):
+        self.statements = 0
+        self._results: list[list[tuple]] = []
+        self._ids = iter(range(1, 1_000_000))
+
+    def execute(self, sql: str, params: tuple = ()) -> None:
+        if len(params) > 2100:
+            raise AssertionError(f"{len(params)} parameters, SQL Server allows 2100")
+        if sql.count("(@OrderId, ?") > 1000:
+            raise AssertionError("SQL Server allows 1000 rows per VALUES list")
+        self.statements += 1
+        if "SCOPE_IDENTITY" in sql:
+            self._results = [
+                [(next(self._ids), next(self._ids))],
+                [(next(self._ids), seq) for seq in params[14::6]],
+            ]
+        else:
+            self._results = [[(next(self._ids), seq) for seq in params[5::6]]]
+
+    def fetchone(self) -> tuple:
+        return self._results[0][0]
+
+    def fetchall(self) -> list[tuple]:
+        return self._results[0]
+
+    def nextset(self) -> bool:
+        del self._results[0]
+        return bool(self._results)
+
+
+class LimitBackend(SqlServerBackend):
+    """SqlServerBackend without a driver; statements go to a LimitCursor."""
+
+    def __init__(self):
+        self.error = AssertionError
+
+
+@pytest.mark.parametrize("count", [1, BATCH_ITEMS, BATCH_ITEMS + 1, 1000, 5000])
+def test_sqlserver_batch_splits_large_orders(count):
+    cursor = LimitCursor()
+    backend = LimitBackend()
+    _, _, keys = backend.insert_customer_order(cursor, CUSTOMER, ORDER, items(count))
+    assert [seq for _, seq in keys] == list(range(100, 100 + count))
+    assert cursor.statements == -(-count // BATCH_ITEMS)
+
+
+@pytest.mark.parametrize("count", [1, 5000])
+def test_sqlite_batch_inserts_past_variable_limit(backend, count):
+    connection = backend.connect("t1")
+    cursor = connection.cursor()
+    _, order_id, keys = backend.insert_customer_order(
+        cursor, CUSTOMER, ORDER, items(count)
+    )
+    assert sorted(seq for _, seq in keys) == list(range(100, 100 + count))
+    (rows,) = cursor.execute(
+        "SELECT COUNT(*) FROM OrderItems WHERE OrderId = ?", (order_id,)
+    ).fetchone()
+    assert rows == count
+    connection.close()
@@ -0,0 +1,96 @@
+"""Range checksums find the rows that differ between a source and a sink."""
+
+import pytest
+from structlog.testing import capture_logs
+
+from loadgen.backends import SqliteBackend
+from loadgen.checksum import RangeReconciler, replay_events
+from loadgen.generator import LoadGenerator
+from loadgen.lag import EventSink
+from loadgen.rng import Streams
+
+OPERATIONS = 300
+
+
+@pytest.fixture
+def source_and_sink(tmp_path, data_pool) -> tuple[SqliteBackend, SqliteBackend]:
+    """A source written by a generator, and a sink replayed from its events."""
+    events = str(tmp_path / "ces.jsonl")
+    ces_sink = EventSink(f"file:{events}")
+    source = SqliteBackend(str(tmp_path / "source"), ces_sink=ces_sink)
+    source.create_schema("t1")
+    generator = LoadGenerator(
+        source, "t1", data=data_pool, streams=Streams.derive(0, "t1", 0)
+    )
+    for _ in range(OPERATIONS):
+        generator.execute_random_operation()
+    generator.close()
+    ces_sink.close()
+
+    sink = SqliteBackend(str(tmp_path / "sink"))
+    assert replay_events(events, sink) == ["t1"]
+    return source, sink
+
+
+def reconcile(source, sink) -> tuple[bool, dict[str, dict]]:
+    """Reconcile t1 with small ranges, returning the per-table summaries."""
+    with capture_logs() as logs:
+        consistent = RangeReconciler(source, sink, "t1", fanout=4, leaf_keys=4).run()
+    summaries = {
+        log["table"]: log for log in logs if log["event"] == "checksum_reconciled"
+    }
+    return consistent, summaries
+
+
+def sink_execute(sink: SqliteBackend, sql: str, params: tuple = ()) -> None:
+    connection = sink.connect("t1", ces=False)
+    connection.execute("PRAGMA foreign_keys = OFF")
+    connection.execute(sql, params)
+    connection.close()
+
+
+def test_replayed_sink_matches_source(source_and_sink):
+    consistent, summaries = reconcile(*source_and_sink)
+    assert consistent
+    for summary in summaries.values():
+        assert summary["source_rows"] == summary["sink_rows"] > 0
+        # A matching table is settled by its key range and top-level buckets
+        assert summary["queries"] == 4
+        assert summary["rows_compared"] == 0
+
+
+def test_divergent_rows_are_found(source_and_sink):
+    source, sink = source_and_sink
+    sink_execute(sink, "DELETE FROM OrderItems WHERE OrderItemId = 5")
+    sink_execute(sink, "UPDATE Customers SET Email = 'x@y' WHERE CustomerId = 7")
+    sink_execute(
+        sink,
+        "INSERT INTO Orders (OrderId, CustomerId, TotalAmount, Status, LoadgenSeq) "
+        "VALUES (100000, 1, 1.0, 'Pending', 1)",
+    )
+
+    consistent, summaries = reconcile(source, sink)
+    assert not consistent
+    expected = {
+        "Customers": ("mismatched", 1),
+        "Orders": ("unexpected", 1),
+        "OrderItems": ("missing", 1),
+    }
+    for table, (kind, count) in expected.items():
+        summary = summaries[table]
+        assert summary[kind] == count, table
+        assert summary["missing"] + summary["unexpected"] + summary["mismatched"] == 1
+        # Only the leaf ranges around the divergent key are compared row by row
+        assert summary["rows_compared"] < summary["source_rows"] / 4, table
+
+
+def test_lost_update_with_the_same_value_is_found(source_and_sink):
+    # LoadgenSeq is hashed, so an update that never arrived shows even when
+    # the value it wrote matches what the sink holds
+    source, sink = source_and_sink
+    sink_execute(
+        sink, "UPDATE Orders SET LoadgenSeq = LoadgenSeq - 1 WHERE OrderId = 3"
+    )
+    consistent, summaries = reconcile(source, sink)
+    assert not consistent
+    assert summaries["Orders"]["mismatched"] == 1
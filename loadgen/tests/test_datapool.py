@@ -0,0 +1,65 @@
+"""Data pool refreshes are seeded per stream, and payloads don't compress away."""
+
+import threading
+import lzma
+
+import pytest
+
+from loadgen.datapool import PAYLOAD_BLOCK_BYTES, DataPool
+from loadgen.rng import derive
+
+REFRESH = 50
+
+
+def names(pool: DataPool, worker: int, count: int = 4 * REFRESH) -> list[str]:
+    rng = derive(7, "t1", worker, "data")
+    return [pool.product_name(rng) for _ in range(count)]
+
+
+def test_refresh_moves_on_to_new_values():
+    pool = DataPool(size=100, refresh_after=REFRESH, seed=7)
+    rng = derive(7, "t1", 0, "data")
+    first = pool._pools(rng).product_words
+    for _ in range(REFRESH):
+        pool.product_name(rng)
+    assert pool._pools(rng).product_words != first
+
+
+def test_refresh_is_reproducible_per_stream():
+    alone = names(DataPool(size=100, refresh_after=REFRESH, seed=7), 0)
+
+    # Another worker drawing ahead, several generations on, shifts nothing
+    pool = DataPool(size=100, refresh_after=REFRESH, seed=7)
+    names(pool, 1, count=10 * REFRESH)
+    assert names(pool, 0) == alone
+
+
+def test_concurrent_workers_draw_what_they_draw_alone():
+    alone = [
+        names(DataPool(size=100, refresh_after=REFRESH, seed=7), worker)
+        for worker in range(4)
+    ]
+
+    pool = DataPool(size=100, refresh_after=REFRESH, seed=7)
+    drawn: list[list[str]] = [[] for _ in range(4)]
+
+    def work(worker: int) -> None:
+        drawn[worker] = names(pool, worker)
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert drawn == alone
+
+
+@pytest.mark.parametrize("size", [1000, 3 * PAYLOAD_BLOCK_BYTES + 7])
+def test_payloads_compress_only_by_base64s_redundancy(size):
+    pool = DataPool(size=100, seed=7)
+    payload = pool.payload(size, derive(7, "t1", 0, "data"))
+    assert len(payload) == size
+    # 6 bits per character: about 3/4, however many blocks the payload spans,
+    # with a window that would find any repeat of the block
+    compressed = lzma.compress(payload.encode(), preset=2)
+    assert len(compressed) / size > 0.74
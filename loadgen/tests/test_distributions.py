@@ -0,0 +1,39 @@
+"""Distribution specs respect their maximum: clamped, or rejected when bounded."""
+
+import random
+
+import pytest
+
+from loadgen.distributions import Distribution
+from loadgen.workload import MAX_ITEMS_PER_ORDER, MAX_PAYLOAD_BYTES
+
+
+@pytest.mark.parametrize(
+    "spec, maximum",
+    [
+        (f"uniform:1:{MAX_ITEMS_PER_ORDER + 1}", MAX_ITEMS_PER_ORDER),
+        ("uniform:1:5000", MAX_ITEMS_PER_ORDER),
+        ("constant:32M", MAX_PAYLOAD_BYTES),
+    ],
+)
+def test_bounded_spec_past_maximum_is_rejected(spec, maximum):
+    with pytest.raises(ValueError, match="more than the maximum"):
+        Distribution.parse(spec, maximum=maximum)
+
+
+def test_bounded_spec_at_maximum_is_accepted():
+    distribution = Distribution.parse(
+        f"uniform:1:{MAX_ITEMS_PER_ORDER}", maximum=MAX_ITEMS_PER_ORDER
+    )
+    assert distribution.upper_bound() == MAX_ITEMS_PER_ORDER
+
+
+@pytest.mark.parametrize(
+    "spec", ["lognormal:500:3", "exponential:2000", "normal:900:500"]
+)
+def test_unbounded_spec_is_clamped(spec):
+    distribution = Distribution.parse(spec, maximum=MAX_ITEMS_PER_ORDER)
+    rng = random.Random(0)
+    samples = [distribution.sample(rng) for _ in range(10_000)]
+    assert max(samples) == MAX_ITEMS_PER_ORDER
+    assert min(samples) >= 0
@@ -0,0 +1,183 @@
+"""The operation journal round-trips, and reconcile reports injected divergence."""
+
+import json
+import os
+import time
+
+import pytest
+from structlog.testing import capture_logs
+
+from loadgen import journal as journal_module
+from loadgen.backends import SqliteBackend
+from loadgen.generator import LoadGenerator
+from loadgen.journal import (
+    HEADER,
+    RECORD,
+    OperationJournal,
+    read_journal,
+    reconcile_journal,
+)
+from loadgen.lag import EventSink
+from loadgen.rng import Streams
+
+OPERATIONS = 100
+
+
+@pytest.fixture
+def journaled_run(tmp_path, data_pool) -> tuple[str, str]:
+    """Run a generator with a CES stand-in sink and a journal.
+
+    Returns the journal directory and the captured events file.
+    """
+    events = str(tmp_path / "ces.jsonl")
+    sink = EventSink(f"file:{events}")
+    backend = SqliteBackend(str(tmp_path / "source"), ces_sink=sink)
+    backend.create_schema("t1")
+    journal = OperationJournal(str(tmp_path / "journal"))
+    generator = LoadGenerator(
+        backend,
+        "t1",
+        data=data_pool,
+        journal=journal.writer("t1"),
+        streams=Streams.derive(0, "t1", 0),
+    )
+    for _ in range(OPERATIONS):
+        generator.execute_random_operation()
+    generator.close()
+    journal.close()
+    sink.close()
+    return journal.directory, events
+
+
+def reconcile(directory: str, events: str) -> tuple[bool, dict]:
+    """Reconcile, returning the result and the journal_reconciled counts."""
+    with capture_logs() as logs:
+        consistent = reconcile_journal(directory, events)
+    (summary,) = [log for log in logs if log["event"] == "journal_reconciled"]
+    return consistent, summary
+
+
+def edit_events(path: str, edit) -> None:
+    """Rewrite the events file as edit(list of event dicts) returns it."""
+    with open(path, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(event) + "\n" for event in edit(events))
+
+
+def table_of(event: dict) -> str:
+    return json.loads(event["data"])["eventsource"]["tbl"]
+
+
+def row_of(event: dict) -> dict:
+    return json.loads(json.loads(event["data"])["eventrow"]["current"])
+
+
+def with_row(event: dict, row: dict) -> dict:
+    data = json.loads(event["data"])
+    data["eventrow"]["current"] = json.dumps(row)
+    return {**event, "data": json.dumps(data)}
+
+
+def test_journal_round_trip(tmp_path):
+    journal = OperationJournal(str(tmp_path))
+    writer = journal.writer("t1")
+    writer.append("Customers", "insert", 7, 1, ("Ada", "Lovelace", "ada@x.org"))
+    writer.append("Orders", "update", 9, 2, ("Shipped",))
+    writer.append("OrderItems", "delete", 11, 3, ())
+    journal.close()
+
+    database, records = read_journal(writer.path)
+    assert database == "t1"
+    assert [record[:4] for record in records] == [
+        (1, 7, "Customers", "insert"),
+        (2, 9, "Orders", "update"),
+        (3, 11, "OrderItems", "delete"),
+    ]
+
+
+def test_idle_writer_is_flushed(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "FLUSH_SECONDS", 0.01)
+    journal = OperationJournal(str(tmp_path))
+    writer = journal.writer("t1")
+    writer.append("Orders", "update", 9, 1, ("Shipped",))
+    # No further appends: the flusher writes the buffer out on its own
+    size = HEADER.size + len("t1") + RECORD.size
+    deadline = time.monotonic() + 5
+    while os.path.getsize(writer.path) < size and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert os.path.getsize(writer.path) == size
+    journal.close()
+
+
+def test_reconcile_clean_run(journaled_run):
+    consistent, summary = reconcile(*journaled_run)
+    assert consistent
+    assert summary["matched"] == summary["records"] == summary["events"] > OPERATIONS
+
+
+def test_reconcile_reports_a_dropped_event(journaled_run):
+    directory, events = journaled_run
+    edit_events(events, lambda events: events[:10] + events[11:])
+    consistent, summary = reconcile(directory, events)
+    assert not consistent
+    assert summary["missing"] == 1
+
+
+def test_reconcile_reports_a_changed_value(journaled_run):
+    directory, events = journaled_run
+
+    def change_first_update(events):
+        for index, event in enumerate(events):
+            if event["operation"] == "UPD":
+                row = row_of(event)
+                row["Status"] = row["Email"] = "tampered"
+                events[index] = with_row(event, row)
+                return events
+
+    edit_events(events, change_first_update)
+    consistent, summary = reconcile(directory, events)
+    assert not consistent
+    assert summary["mismatched"] == 1
+
+
+def test_reconcile_reports_duplicate_and_unexpected_events(journaled_run):
+    directory, events = journaled_run
+
+    def duplicate_and_invent(events):
+        invented = row_of(events[0])
+        invented["LoadgenSeq"] = 10**9
+        return [*events, events[0], with_row(events[0], invented)]
+
+    edit_events(events, duplicate_and_invent)
+    consistent, summary = reconcile(directory, events)
+    assert not consistent
+    assert summary["duplicates"] == 1
+    assert summary["unexpected"] == 1
+
+
+def test_reconcile_reports_reordered_events(journaled_run):
+    directory, events = journaled_run
+
+    def update_before_insert(events):
+        # Move the first order status update ahead of the order's insert
+        update = next(
+            index
+            for index, event in enumerate(events)
+            if event["operation"] == "UPD" and table_of(event) == "Orders"
+        )
+        order_id = row_of(events[update])["OrderId"]
+        insert = next(
+            index
+            for index, event in enumerate(events)
+            if event["operation"] == "INS"
+            and table_of(event) == "Orders"
+            and row_of(event)["OrderId"] == order_id
+        )
+        events.insert(insert, events.pop(update))
+        return events
+
+    edit_events(events, update_before_insert)
+    consistent, summary = reconcile(directory, events)
+    assert not consistent
+    assert summary["reordered"] == 1
@@ -0,0 +1,221 @@
+"""Replays remap created keys, count stale operations and keep tenants apart."""
+
+import shutil
+import threading
+import time
+
+import pytest
+from structlog.testing import capture_logs
+
+from loadgen.backends import SqliteBackend
+from loadgen.datapool import DataPool
+from loadgen.generator import LoadGenerator
+from loadgen.recording import WorkloadRecorder, read_recording
+from loadgen.replay import KeyMap, WorkloadReplayer
+from loadgen.rng import Streams
+from loadgen.seed import Seeder
+
+OPERATIONS = 200
+
+
+def test_key_map_passes_unmapped_keys_through():
+    keys = KeyMap()
+    keys.learn({"customer_id": 5, "order_id": 9}, {"customer_id": 5, "order_id": 12})
+    assert keys.translate({"customer_id": 5, "order_id": 9, "status": "Pending"}) == {
+        "customer_id": 5,
+        "order_id": 12,
+        "status": "Pending",
+    }
+    assert keys.key("Orders", 8) == 8
+    assert keys.key("OrderItems", 9) == 9
+
+
+def test_key_map_keeps_runs_of_one_offset():
+    keys = KeyMap()
+    for order_id in range(1, 1001):
+        items = [2 * order_id, 2 * order_id + 1]
+        keys.learn(
+            {"order_id": order_id, "item_ids": items},
+            {"order_id": order_id + 10, "item_ids": [item + 7 for item in items]},
+        )
+    # One run per table, however many keys
+    assert len(keys) == 2
+    assert keys.key("Orders", 500) == 510
+    assert keys.key("OrderItems", 1001) == 1008
+
+    # A jump in the target's identities starts a new run
+    keys.learn({"order_id": 1001}, {"order_id": 2000})
+    keys.learn({"order_id": 1002}, {"order_id": 2001})
+    assert len(keys) == 3
+    assert keys.key("Orders", 1000) == 1010
+    assert keys.key("Orders", 1002) == 2001
+
+
+def test_key_map_joins_runs_learned_out_of_order():
+    keys = KeyMap()
+    for order_id in (1, 2, 4, 5, 3):
+        keys.learn({"order_id": order_id}, {"order_id": order_id + 100})
+    assert len(keys) == 1
+    keyed = [keys.key("Orders", key) for key in range(1, 7)]
+    assert keyed == [101, 102, 103, 104, 105, 6]
+
+
+def test_key_map_forgets_deleted_keys_at_run_ends():
+    keys = KeyMap()
+    keys.learn({"item_ids": [1, 2, 3]}, {"item_ids": [11, 12, 13]})
+    keys.learn({"item_ids": [7]}, {"item_ids": [30]})
+    keys.forget("OrderItems", 7)
+    keys.forget("OrderItems", 1)
+    keys.forget("OrderItems", 3)
+    assert len(keys) == 1
+    assert [keys.key("OrderItems", key) for key in (1, 2, 3, 7)] == [1, 12, 3, 7]
+    keys.forget("OrderItems", 2)
+    assert len(keys) == 0
+
+
+@pytest.fixture
+def recorded(tmp_path, data_pool) -> tuple[SqliteBackend, str]:
+    """A seeded source and a recording of a run against it.
+
+    The source's seeded state is copied to tmp_path/"start" before the run.
+    """
+    source = SqliteBackend(str(tmp_path / "source"))
+    source.create_schema("t1")
+    Seeder(source, "t1", DataPool(size=100, seed=7), 50, seed=7).run()
+    shutil.copytree(source.directory, tmp_path / "start")
+
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = WorkloadRecorder(path)
+    generator = LoadGenerator(
+        source,
+        "t1",
+        data=data_pool,
+        streams=Streams.derive(7, "t1", 0),
+        recorder=recorder,
+    )
+    for _ in range(OPERATIONS):
+        generator.execute_random_operation()
+    generator.close()
+    recorder.close()
+    return source, path
+
+
+def replay(backend: SqliteBackend, path: str, data_pool: DataPool) -> dict:
+    """Replay path against backend's t1; return its replay_database_complete."""
+    generator = LoadGenerator(backend, "t1", data=data_pool)
+    with capture_logs() as logs:
+        assert WorkloadReplayer(path, [generator], speed=0).run()
+    (complete,) = [log for log in logs if log["event"] == "replay_database_complete"]
+    return complete
+
+
+def rows(backend: SqliteBackend, sql: str) -> list[tuple]:
+    connection = backend.connect("t1")
+    try:
+        return sorted(connection.execute(sql).fetchall())
+    finally:
+        connection.close()
+
+
+def test_replay_remaps_keys_on_a_shifted_target(tmp_path, recorded, data_pool):
+    source, path = recorded
+    target = SqliteBackend(str(tmp_path / "start"))
+    # Rows the recorded server never had shift every identity on the target
+    connection = target.connect("t1")
+    connection.execute(
+        "INSERT INTO Customers (FirstName, LastName, Email) VALUES ('x', 'y', 'z')"
+    )
+    connection.execute(
+        "INSERT INTO Orders (CustomerId, TotalAmount, Status) VALUES (1, 1, 'Shipped')"
+    )
+    connection.execute(
+        "INSERT INTO OrderItems (OrderId, ProductName, Quantity, UnitPrice) "
+        "VALUES (1, 'p', 1, 1)"
+    )
+    connection.close()
+
+    complete = replay(target, path, data_pool)
+    assert complete["applied"] == sum(1 for _ in read_recording(path))
+    assert complete["skipped"] == 0
+    assert 0 < complete["mapped_key_runs"] <= 3
+
+    # Same rows, apart from the three inserted above
+    for sql in (
+        "SELECT FirstName, LastName, Email FROM Customers WHERE Email != 'z'",
+        "SELECT TotalAmount, Status FROM Orders WHERE TotalAmount != 1",
+        "SELECT ProductName, Quantity, UnitPrice FROM OrderItems "
+        "WHERE ProductName != 'p'",
+    ):
+        assert rows(target, sql) == rows(source, sql)
+
+
+def test_replay_counts_operations_whose_rows_moved_on(recorded, data_pool):
+    # Replaying against the end state: updates and deletes of seeded rows
+    # find them already moved on, while rows the recording created are
+    # created again and replayed in full
+    source, path = recorded
+    created: set[tuple[str, int]] = set()
+    stale = 0
+    for record in read_recording(path):
+        if record.operation == "update_order_status":
+            stale += ("order_id", record.arguments["order_id"]) not in created
+        elif record.operation == "delete_order_item":
+            stale += ("item_id", record.arguments["item_id"]) not in created
+        for name, keys in record.keys.items():
+            for key in keys if isinstance(keys, list) else [keys]:
+                created.add((name.removesuffix("s"), key))
+    assert stale > 0
+
+    complete = replay(source, path, data_pool)
+    assert complete["skipped"] == stale
+    assert complete["applied"] + stale == sum(1 for _ in read_recording(path))
+
+
+class BlockedGenerator:
+    """Stands in for a LoadGenerator whose server stalls until released."""
+
+    def __init__(self, database_name: str, release: threading.Event):
+        self.database_name = database_name
+        self.release = release
+        self.applied = 0
+
+    def replay_operation(self, operation, arguments, intended_start):
+        self.release.wait()
+        self.applied += 1
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+def test_stalled_tenant_does_not_hold_up_the_others(tmp_path):
+    path = str(tmp_path / "run.jsonl.gz")
+    recorder = WorkloadRecorder(path)
+    for customer_id in range(1, 51):
+        for database in ("slow", "fast"):
+            recorder.record(
+                database,
+                0.0,
+                "update_customer",
+                {"customer_id": customer_id, "email": "e"},
+                {},
+            )
+    recorder.close()
+
+    stalled, running = threading.Event(), threading.Event()
+    running.set()
+    slow = BlockedGenerator("slow", stalled)
+    fast = BlockedGenerator("fast", running)
+    replayer = WorkloadReplayer(path, [slow, fast], speed=0, queue_records=2)
+    thread = threading.Thread(target=replayer.run)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while fast.applied < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert fast.applied == 50
+        assert slow.applied == 0
+    finally:
+        stalled.set()
+        thread.join()
+    assert slow.applied == 50
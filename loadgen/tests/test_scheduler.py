@@ -0,0 +1,57 @@
+"""ArrivalScheduler follows a load shape with every arrival distribution."""
+
+import random
+
+import pytest
+
+from loadgen.scheduler import DISTRIBUTIONS, IDLE_INTERVAL_SECONDS, ArrivalScheduler
+from loadgen.shapes import LoadShape
+
+
+def arrivals(scheduler: ArrivalScheduler, duration: float) -> list[float]:
+    """Replay the dispatcher's timeline for duration seconds, without sleeping."""
+    starts = []
+    next_start = 0.0
+    while next_start < duration:
+        interval = scheduler.next_interval(next_start)
+        if interval is None:
+            next_start += IDLE_INTERVAL_SECONDS
+        else:
+            next_start += interval
+            starts.append(next_start)
+    return starts
+
+
+def shaped(spec: str, distribution: str) -> ArrivalScheduler:
+    return ArrivalScheduler(
+        "t1",
+        distribution=distribution,
+        shape=LoadShape.parse(spec),
+        rng=random.Random(0),
+    )
+
+
+@pytest.mark.parametrize("distribution", DISTRIBUTIONS)
+def test_spike_windows_get_peak_rate(distribution):
+    # 5 s at 500 ops/sec at the start of each minute, 0.1 ops/sec otherwise
+    starts = arrivals(shaped("spike:0.1:500:60:5", distribution), 180)
+    in_spikes = sum(1 for start in starts if start % 60 < 5)
+    assert in_spikes == pytest.approx(3 * 5 * 500, rel=0.05)
+    assert len(starts) - in_spikes <= 3 * 55 * 0.1 * 2
+
+
+@pytest.mark.parametrize("distribution", DISTRIBUTIONS)
+def test_ramp_from_zero_starts_early(distribution):
+    # The first arrival is due after ~3.5 s (constant), not after the 60 s gap
+    # drawn at the 0.017 ops/sec of the first idle step
+    starts = arrivals(shaped("ramp:0:100:600", distribution), 600)
+    assert starts[0] < 15
+    # The integral of the ramp: 100 ops/sec * 600 s / 2
+    assert len(starts) == pytest.approx(30_000, rel=0.02)
+
+
+@pytest.mark.parametrize("distribution", DISTRIBUTIONS)
+def test_constant_rate_is_not_capped(distribution):
+    scheduler = ArrivalScheduler("t1", rate=2.0, distribution=distribution)
+    starts = arrivals(scheduler, 1000)
+    assert len(starts) == pytest.approx(2000, rel=0.1)
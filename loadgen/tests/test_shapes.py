@@ -0,0 +1,48 @@
+"""LoadShape specs parse into the rate curves they describe."""
+
+import pytest
+
+from loadgen.shapes import LoadShape
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("constant:50", [(0, 50), (1000, 50)]),
+        ("ramp:10:110:100", [(0, 10), (50, 60), (100, 110), (500, 110)]),
+        ("steps:50:50:300", [(0, 50), (299, 50), (300, 100), (3000, 550)]),
+        ("steps:50:50:300:3", [(600, 150), (3000, 150)]),
+        ("spike:1:500:60:5", [(0, 500), (4.9, 500), (5, 1), (60, 500), (125, 1)]),
+        ("diurnal:10:110:3600", [(0, 10), (900, 60), (1800, 110), (3600, 10)]),
+    ],
+)
+def test_rate_at(spec, expected):
+    shape = LoadShape.parse(spec)
+    for elapsed, rate in expected:
+        assert shape.rate_at(elapsed) == pytest.approx(rate), elapsed
+
+
+def test_parse_normalises_and_round_trips():
+    shape = LoadShape.parse(" Ramp:10:500:600 ")
+    assert shape.kind == "ramp"
+    assert shape.params == (10.0, 500.0, 600.0)
+    assert repr(shape) == "ramp:10:500:600"
+
+
+@pytest.mark.parametrize(
+    "spec, message",
+    [
+        ("sawtooth:1:2", "Unknown load shape"),
+        ("ramp:10:500", "takes 3 parameter"),
+        ("steps:1:2:3:4:5", "takes 3-4 parameter"),
+        ("ramp:ten:500:600", "Invalid load shape spec"),
+        ("constant:-1", "must be >= 0"),
+        ("ramp:10:500:0", "positive duration"),
+        ("steps:50:50:0", "positive HOLD"),
+        ("steps:50:50:300:0", "COUNT >= 1"),
+        ("spike:1:500:60:90", "LENGTH <= EVERY"),
+    ],
+)
+def test_parse_rejects_invalid_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        LoadShape.parse(spec)
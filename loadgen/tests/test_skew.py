@@ -0,0 +1,96 @@
+"""KeySkew picks ranks with the frequencies its spec describes."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from loadgen.registry import KeyPool
+from loadgen.skew import ZETA_TABLE_SIZE, KeySkew
+
+PICKS = 100_000
+
+
+def counts(spec: str, n: int) -> Counter[int]:
+    skew, rng = KeySkew.parse(spec), random.Random(0)
+    return Counter(skew.index(n, rng) for _ in range(PICKS))
+
+
+def zeta(n: int, theta: float) -> float:
+    return sum(i**-theta for i in range(1, n + 1))
+
+
+@pytest.mark.parametrize("theta", [0.5, 0.99])
+def test_zipf_rank_frequencies(theta):
+    n = 1000
+    picks = counts(f"zipf:{theta}", n)
+    assert min(picks) >= 0 and max(picks) < n
+    # The two hottest ranks are exact in Gray's method, the tail approximate
+    for rank in (0, 1):
+        expected = PICKS * (rank + 1) ** -theta / zeta(n, theta)
+        assert picks[rank] == pytest.approx(expected, rel=0.05)
+    hottest_tenth = sum(picks[rank] for rank in range(n // 10)) / PICKS
+    expected = zeta(n // 10, theta) / zeta(n, theta)
+    assert hottest_tenth == pytest.approx(expected, abs=0.03)
+
+
+def test_zipf_zeta_extrapolates_past_the_table():
+    skew = KeySkew.parse("zipf:0.99")
+    n = ZETA_TABLE_SIZE * 5
+    assert skew._zeta_of(n) == pytest.approx(zeta(n, 0.99), rel=1e-6)
+
+
+def test_zipf_over_two_keys_is_uniform():
+    picks = counts("zipf:0.99", 2)
+    assert picks[0] == pytest.approx(PICKS / 2, rel=0.05)
+
+
+def test_latest_picks_only_the_newest_keys_evenly():
+    picks = counts("latest:10", 1000)
+    assert set(picks) == set(range(990, 1000))
+    for count in picks.values():
+        assert count == pytest.approx(PICKS / 10, rel=0.05)
+
+
+def test_latest_over_fewer_keys_uses_them_all():
+    assert set(counts("latest:10", 3)) == {0, 1, 2}
+
+
+def test_latest_targets_the_newest_keys_of_a_full_pool():
+    skew, rng = KeySkew.parse("latest:10"), random.Random(0)
+    pool = KeyPool(100, keep_newest=True)
+    for key in range(1000):
+        pool.add(key)
+    assert len(pool) == 100
+    assert {pool.pick(skew, rng) for _ in range(1000)} == set(range(990, 1000))
+
+    # Pops take from the newest, and keys added after them are newer still
+    popped = {pool.pop(skew, rng)[0] for _ in range(5)}
+    assert popped <= set(range(990, 1000))
+    for key in range(1000, 1003):
+        pool.add(key)
+    newest = {988, 989, *range(990, 1003)} - popped
+    assert {pool.pick(skew, rng) for _ in range(1000)} == newest
+    assert len(pool) == 98
+
+
+def test_uniform_spreads_over_every_key():
+    picks = counts("uniform", 10)
+    for rank in range(10):
+        assert picks[rank] == pytest.approx(PICKS / 10, rel=0.05)
+
+
+@pytest.mark.parametrize(
+    "spec, message",
+    [
+        ("pareto:1", "Unknown key distribution"),
+        ("zipf", "takes one parameter"),
+        ("uniform:1", "takes one parameter"),
+        ("zipf:1", "between 0 and 1"),
+        ("latest:0", "N must be >= 1"),
+        ("zipf:0.5:2", "Invalid key distribution spec"),
+    ],
+)
+def test_parse_rejects_invalid_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        KeySkew.parse(spec)
@@ -0,0 +1,173 @@
+"""Workload files compile to the mix and settings each tenant runs with."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from loadgen.workload import DEFAULT_MIX, AliasTable, OperationMix, load_workloads
+
+DEFAULTS = {
+    "operations": dict(DEFAULT_MIX),
+    "pacing": {
+        "min_delay_seconds": 1.0,
+        "max_delay_seconds": 5.0,
+        "target_ops_per_sec": 0.0,
+        "arrival_distribution": "poisson",
+        "load_shape": "",
+        "workers": 1,
+        "virtual_users": 100,
+    },
+    "data": {
+        "items_per_order": "uniform:1:3",
+        "items_per_existing_order": "uniform:1:2",
+        "payload_bytes": "",
+        "key_distribution": "uniform",
+    },
+}
+
+
+@pytest.fixture
+def workload_file(tmp_path):
+    def write(text: str) -> str:
+        path = tmp_path / "workload.toml"
+        path.write_text(text)
+        return str(path)
+
+    return write
+
+
+@pytest.mark.parametrize("weights", [[1, 1], [40, 30, 15, 10, 5], [1, 0, 99]])
+def test_alias_table_picks_in_proportion(weights):
+    table = AliasTable(weights)
+    rng = random.Random(0)
+    picks = 100_000
+    counts = Counter(table.pick(rng) for _ in range(picks))
+    for slot, weight in enumerate(weights):
+        expected = picks * weight / sum(weights)
+        assert counts[slot] == pytest.approx(expected, rel=0.05, abs=50)
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_alias_table_rejects_invalid_weights(weights):
+    with pytest.raises(ValueError, match="non-negative"):
+        AliasTable(weights)
+
+
+def test_operation_mix_drops_zero_weights():
+    mix = OperationMix({"update_order_status": 3, "delete_order_item": 0})
+    assert mix.names == ["update_order_status"]
+    assert mix.shares() == {"update_order_status": 100.0}
+
+
+def test_without_a_file_every_database_gets_the_defaults():
+    workloads = load_workloads(None, ["t1", "t2"], DEFAULTS)
+    for workload in workloads.values():
+        assert workload.mix.weights == DEFAULT_MIX
+        assert workload.max_delay == 5.0
+
+
+def test_top_level_overrides_defaults_key_by_key(workload_file):
+    path = workload_file(
+        """
+        [operations]
+        update_customer = 1
+
+        [pacing]
+        max_delay_seconds = 9
+        """
+    )
+    workload = load_workloads(path, ["t1"], DEFAULTS)["t1"]
+    # An operations section replaces the whole mix
+    assert workload.mix.weights == {"update_customer": 1}
+    assert workload.max_delay == 9.0
+    assert workload.min_delay == 1.0
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("[timing]\nworkers = 2", r"unknown section \[timing\]"),
+        ("[pacing]\nthreads = 2", "unknown key pacing.threads"),
+        ("[pacing]\nworkers = '2'", "pacing.workers has the wrong type"),
+        ("[pacing]\nworkers = true", "pacing.workers has the wrong type"),
+        ("[operations]\ntruncate = 1", "unknown key operations.truncate"),
+        ("[pacing]\narrival_distribution = 'poison'", "Unknown arrival distribution"),
+        ('tenants = "t1"', "tenants must be a table"),
+        ("[profiles]\nheavy = 1", "profiles.heavy must be a table"),
+        ("[tenants.t1]\nprofile = 1", r"\[tenants.t1\]: profile has the wrong type"),
+    ],
+)
+def test_invalid_files_are_rejected(workload_file, text, message):
+    with pytest.raises(ValueError, match=message):
+        load_workloads(workload_file(text), ["t1"], DEFAULTS)
+
+
+def test_profile_then_tenant_override_the_top_level(workload_file):
+    path = workload_file(
+        """
+        [pacing]
+        min_delay_seconds = 2
+        max_delay_seconds = 8
+        workers = 2
+
+        [profiles.noisy.operations]
+        update_order_status = 1
+
+        [profiles.noisy.pacing]
+        max_delay_seconds = 3
+        workers = 8
+
+        [profiles.noisy.data]
+        key_distribution = "zipf:0.99"
+
+        [tenants.beta]
+        profile = "noisy"
+
+        [tenants.beta.pacing]
+        workers = 4
+
+        [tenants.gamma.pacing]
+        workers = 6
+        """
+    )
+    workloads = load_workloads(path, ["alpha", "beta", "gamma"], DEFAULTS)
+    alpha, beta, gamma = workloads["alpha"], workloads["beta"], workloads["gamma"]
+
+    assert alpha.profile is None
+    assert (alpha.min_delay, alpha.max_delay, alpha.workers) == (2.0, 8.0, 2)
+    assert alpha.mix.weights == DEFAULT_MIX
+
+    # Tenant over profile over top level over defaults, key by key
+    assert beta.profile == "noisy"
+    assert (beta.min_delay, beta.max_delay, beta.workers) == (2.0, 3.0, 4)
+    assert beta.mix.weights == {"update_order_status": 1}
+    assert repr(beta.key_skew) == "zipf:0.99"
+    assert beta.virtual_users == 100
+
+    assert (gamma.max_delay, gamma.workers) == (8.0, 6)
+    assert repr(gamma.key_skew) == "uniform"
+
+
+def test_tenant_operations_replace_the_profile_mix(workload_file):
+    path = workload_file(
+        """
+        [profiles.noisy.operations]
+        update_order_status = 1
+
+        [tenants.beta]
+        profile = "noisy"
+
+        [tenants.beta.operations]
+        update_customer = 2
+        delete_order_item = 1
+        """
+    )
+    beta = load_workloads(path, ["beta"], DEFAULTS)["beta"]
+    assert beta.mix.weights == {"update_customer": 2, "delete_order_item": 1}
+
+
+def test_unknown_profile_is_rejected(workload_file):
+    path = workload_file('[tenants.beta]\nprofile = "missing"')
+    with pytest.raises(ValueError, match="unknown profile 'missing'"):
+        load_workloads(path, ["beta"], DEFAULTS)